@@ -7,28 +7,37 @@
 # Description: This program contains the initialization code for the Valgrind Checker package.                              #                                                                                                 
 #############################################################################################################################
 
-from logs import setup_logger
-from Checks.dynamic_analysis.run_valgrind_check import (
-    run_valgrind_check,
-    run_valgrind_for_compiled,
-    run_valgrind_for_java,
-    run_valgrind_for_interpreter,
-    process_valgrind_output,
-    save_json_output
-)
+from Checks.lazy_exports import lazy_exports
 
-# Set up app_logger
-app_logger = setup_logger()
+# Names re-exported per module; a module is imported when one of its names is first used
+_EXPORTS = {
+    "Checks.dynamic_analysis.run_valgrind_check": [
+        "run_valgrind_check",
+        "run_valgrind_for_compiled",
+        "compile_program",
+        "needs_compilation",
+        "run_valgrind_for_java",
+        "run_valgrind_for_interpreter",
+        "process_valgrind_output",
+        "save_json_output",
+    ],
+    "Checks.dynamic_analysis.compile_cache": [
+        "compile_cache_key",
+        "fetch_cached_binary",
+        "store_cached_binary",
+        "evict_binaries",
+    ],
+    "Checks.dynamic_analysis.pch_cache": [
+        "precompiled_header_flags",
+        "build_precompiled_headers",
+        "start_precompiled_header_build",
+    ],
+    "Checks.dynamic_analysis.valgrind_xml": ["MemoryIssueRecords", "ValgrindXmlParser", "run_valgrind_xml"],
+    "Checks.dynamic_analysis.deadline": ["TOOL_DEADLINES", "Deadline", "run_with_deadline"],
+    "Checks.dynamic_analysis.python_runtime": ["run_python_runtime_check"],
+    "Checks.dynamic_analysis.sanitizers": ["run_sanitizer_check", "parse_sanitizer_reports"],
+}
 
-# Expose the primary function for external usage
-__all__ = [
-    "run_valgrind_check",
-    "run_valgrind_for_compiled",
-    "run_valgrind_for_java",
-    "run_valgrind_for_interpreter",
-    "process_valgrind_output",
-    "save_json_output"
-]
-
-# Log package initialization using app_logger
-app_logger.info("Valgrind Checker package initialized.")
\ No newline at end of file
+# Expose the primary functions for external usage
+__all__ = [name for names in _EXPORTS.values() for name in names]
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
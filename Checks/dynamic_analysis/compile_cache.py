@@ -0,0 +1,166 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/compile_cache.py                                                                         #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the content-addressed cache of compiled binaries. Binaries are keyed by the source     #
+# hash, the compiler identity and the compiler flags, so byte-identical submissions skip the compile step.                  #
+#############################################################################################################################
+
+import os
+import shutil
+import hashlib
+import fcntl
+import subprocess
+import threading
+from functools import lru_cache
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+COMPILE_CACHE_DIR = "temp/cache/binaries"           # Directory of the cached binaries
+COMPILE_CACHE_BYTES = 512 * 1024 * 1024             # Maximum total size of the cached binaries
+
+_eviction_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def compiler_identity(compiler):
+    """
+    Identify a compiler by its resolved path, modification time and version banner, so that upgrading or
+    switching the compiler invalidates its cached binaries.
+
+    params:
+        compiler (str): The compiler executable.
+
+    returns:
+        identity (str): A string identifying the compiler.
+    """
+    path = shutil.which(compiler) or compiler
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    try:
+        result = subprocess.run([compiler, "--version"], capture_output=True, text=True, timeout=30)
+        banner = (result.stdout or result.stderr).strip().splitlines()[0]
+    except Exception:
+        banner = "unknown"
+    return f"{path}|{mtime}|{banner}"
+
+def compile_cache_key(file_path, compiler, flags):
+    """
+    Build the cache key of a compilation.
+
+    params:
+        file_path (str): The path to the source file.
+        compiler (str): The compiler executable.
+        flags (list): The compiler flags, excluding the source and output paths.
+
+    returns:
+        key (str): The hex SHA-256 digest identifying the binary.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(b"\0" + compiler_identity(compiler).encode("utf-8"))
+    digest.update(b"\0" + "\0".join(flags).encode("utf-8"))
+    return digest.hexdigest()
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, key[:2], key)
+
+def fetch_cached_binary(key, output_file, cache_dir=None):
+    """
+    Place a cached binary at output_file. The binary is hard-linked (or copied across file systems),
+    so a concurrent eviction cannot remove it while it runs.
+
+    params:
+        key (str): The key built by compile_cache_key.
+        output_file (str): Where the binary is expected.
+        cache_dir (str): The cache directory; defaults to COMPILE_CACHE_DIR.
+
+    returns:
+        hit (bool): True if the binary was found in the cache.
+    """
+    cached = _cache_path(key, cache_dir or COMPILE_CACHE_DIR)
+    try:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        try:
+            os.link(cached, output_file)
+        except OSError as e:
+            if not os.path.exists(cached):
+                return False
+            logger.info(f"Hard link of cached binary failed ({e}); copying it instead.")
+            shutil.copy2(cached, output_file)
+        os.utime(cached)                                # Mark as recently used
+        logger.info(f"Using cached binary {key} for {output_file}")
+        return True
+    except FileNotFoundError:
+        return False
+
+def store_cached_binary(key, binary_path, cache_dir=None, max_bytes=None):
+    """
+    Add a freshly compiled binary to the cache. The binary is written under a unique temporary name and
+    renamed into place, so concurrent writers of the same key never expose a partial file.
+
+    params:
+        key (str): The key built by compile_cache_key.
+        binary_path (str): The path to the compiled binary.
+        cache_dir (str): The cache directory; defaults to COMPILE_CACHE_DIR.
+        max_bytes (int): The size cap of the cache; defaults to COMPILE_CACHE_BYTES.
+    """
+    cache_dir = cache_dir or COMPILE_CACHE_DIR
+    cached = _cache_path(key, cache_dir)
+    temp_path = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        shutil.copy2(binary_path, temp_path)
+        os.replace(temp_path, cached)
+    except OSError as e:
+        logger.error(f"Failed to cache binary {binary_path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return
+    evict_binaries(cache_dir, max_bytes)
+
+def evict_binaries(cache_dir=None, max_bytes=None):
+    """
+    Remove the least recently used binaries until the cache fits its size cap.
+    A lock file serializes evictions across threads and processes.
+
+    params:
+        cache_dir (str): The cache directory; defaults to COMPILE_CACHE_DIR.
+        max_bytes (int): The size cap of the cache; defaults to COMPILE_CACHE_BYTES.
+    """
+    cache_dir = cache_dir or COMPILE_CACHE_DIR
+    max_bytes = COMPILE_CACHE_BYTES if max_bytes is None else max_bytes
+    os.makedirs(cache_dir, exist_ok=True)
+    with _eviction_lock, open(os.path.join(cache_dir, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        entries = []
+        for root, _, files in os.walk(cache_dir):
+            for name in files:
+                if name == ".lock" or name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted cached binary {path}")
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,176 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/deadline.py                                                                              #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the deadline enforcement of the dynamic analysis tools. Every tool runs in its own     #
+# process group with a CPU-time limit, a wall-clock watchdog kills the whole group when the deadline passes, and stdin is   #
+# fed from the request (or left empty) and closed, so a program waiting for input sees end-of-file instead of hanging.      #
+#############################################################################################################################
+
+import os
+import signal
+import resource
+import threading
+import subprocess
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Wall-clock and CPU-time limits in seconds per tool run, and optionally an address space limit in bytes
+TOOL_DEADLINES = {
+    "valgrind": {"wall": 60, "cpu": 30},
+    "compile": {"wall": 60, "cpu": 60},
+    "javac": {"wall": 90, "cpu": 90},
+    "python": {"wall": 30, "cpu": 20, "memory": 1024**3},
+    "sanitizers": {"wall": 30, "cpu": 20},
+}
+
+def spawn_limited(command, cpu=None, memory=None, **popen_kwargs):
+    """
+    Start a command in a new process group with a CPU-time limit.
+
+    params:
+        command (list): The command line.
+        cpu (int): The CPU seconds after which the kernel stops the process (SIGXCPU, then SIGKILL), or None.
+        memory (int): The address space in bytes beyond which allocations fail, or None.
+        popen_kwargs: Further subprocess.Popen arguments.
+
+    returns:
+        process (subprocess.Popen): The started process, the leader of its own process group.
+    """
+    process = subprocess.Popen(command, start_new_session=True, **popen_kwargs)
+    if cpu is not None:
+        try:
+            # Set from the parent rather than a preexec_fn, which is unsafe in a threaded server
+            resource.prlimit(process.pid, resource.RLIMIT_CPU, (cpu, cpu + 1))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not limit the CPU time of {command[0]}: {e}")
+    if memory is not None:
+        try:
+            resource.prlimit(process.pid, resource.RLIMIT_AS, (memory, memory))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not limit the memory of {command[0]}: {e}")
+    return process
+
+def kill_process_group(process):
+    """
+    Kill a process started by spawn_limited and everything it started.
+
+    params:
+        process (subprocess.Popen): The process group leader.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+class Deadline:
+    """
+    A wall-clock watchdog that kills a process group when the deadline passes. Use it as a context manager
+    around waiting for the process; "expired" tells whether it fired.
+
+    params:
+        process (subprocess.Popen): The process group leader.
+        seconds (float): The wall-clock limit, or None for no limit.
+    """
+    def __init__(self, process, seconds):
+        self.process = process
+        self.expired = False
+        self._timer = threading.Timer(seconds, self._expire) if seconds is not None else None
+
+    def _expire(self):
+        self.expired = True
+        kill_process_group(self.process)
+
+    def __enter__(self):
+        if self._timer is not None:
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._timer is not None:
+            self._timer.cancel()
+
+def feed_stdin(process, stdin_data):
+    """
+    Write the program's input in a background thread and close stdin, so the caller can keep reading
+    the program's output and a program that does not read its input cannot block the writer.
+
+    params:
+        process (subprocess.Popen): A process started with stdin=subprocess.PIPE.
+        stdin_data (str or bytes): The input, or None for an empty input.
+
+    returns:
+        thread (threading.Thread): The writer thread.
+    """
+    data = stdin_data.encode("utf-8") if isinstance(stdin_data, str) else (stdin_data or b"")
+
+    def write():
+        try:
+            if data:
+                process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            pass                                # The program exited without reading all of it
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=write, name="stdin-feeder", daemon=True)
+    thread.start()
+    return thread
+
+def cpu_limit_exceeded(return_code):
+    """
+    Tell whether a process was stopped by its CPU-time limit.
+
+    params:
+        return_code (int): The process's return code.
+
+    returns:
+        exceeded (bool): True if the process died of SIGXCPU.
+    """
+    return return_code in (-signal.SIGXCPU, 128 + signal.SIGXCPU)
+
+def run_with_deadline(command, tool, stdin_data=None, check=False, **popen_kwargs):
+    """
+    Run a command to completion under the deadlines of a tool, like subprocess.run with captured text output.
+
+    params:
+        command (list): The command line.
+        tool (str): The key of the tool's limits in TOOL_DEADLINES.
+        stdin_data (str): The input, or None for an empty input.
+        check (bool): Whether to raise CalledProcessError on a non-zero return code.
+        popen_kwargs: Further subprocess.Popen arguments, e.g. cwd.
+
+    returns:
+        result (subprocess.CompletedProcess): The finished process.
+
+    exceptions:
+        subprocess.TimeoutExpired: If the wall-clock or CPU deadline passed; the process group was killed.
+        subprocess.CalledProcessError: If check is set and the command failed.
+    """
+    limits = TOOL_DEADLINES[tool]
+    process = spawn_limited(
+        command,
+        cpu = limits.get("cpu"),
+        memory = limits.get("memory"),
+        stdin = subprocess.PIPE,
+        stdout = subprocess.PIPE,
+        stderr = subprocess.PIPE,
+        text = True,
+        **popen_kwargs
+    )
+    with Deadline(process, limits.get("wall")) as deadline:
+        stdout, stderr = process.communicate(stdin_data or "")
+    if deadline.expired or cpu_limit_exceeded(process.returncode):
+        kill_process_group(process)
+        raise subprocess.TimeoutExpired(command, limits.get("wall"), output=stdout, stderr=stderr)
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
@@ -0,0 +1,249 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/pch_cache.py                                                                             #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the cache of precompiled standard headers shared by the compile step and clang-tidy.   #
+# Configured sets of common headers are precompiled once per compiler and flag set (gcc .gch files, clang .pch files), and #
+# a submission is given the largest set it includes entirely, so parsing those headers is not repeated on every request.   #
+#############################################################################################################################
+
+import os
+import re
+import shutil
+import hashlib
+import threading
+import subprocess
+from logs import setup_logger
+from Checks.dynamic_analysis.compile_cache import compiler_identity
+
+# Set up logger
+logger = setup_logger()
+
+PCH_ENABLED = True                                  # Use precompiled headers in the compile step and clang-tidy
+PCH_CACHE_DIR = "temp/cache/pch"                    # Directory of the precompiled headers
+PCH_BUILD_TIMEOUT = 120                             # Seconds a header set may take to precompile
+
+# Header sets per source language; a submission uses the largest set whose headers it all includes itself,
+# so the precompiled header never makes a declaration visible that the submission did not include
+PCH_HEADER_SETS = {
+    "c++": [
+        ["iostream"],
+        ["iostream", "string", "vector"],
+        ["algorithm", "iostream", "string", "vector"],
+        ["algorithm", "cmath", "iostream", "map", "set", "string", "unordered_map", "vector"],
+    ],
+    "c": [
+        ["stdio.h"],
+        ["stdio.h", "stdlib.h"],
+        ["stdio.h", "stdlib.h", "string.h"],
+    ],
+}
+# Compilers whose header sets are built at startup: (compiler, kind, language, flags)
+PCH_COMPILER_TARGETS = [
+    ("g++", "gcc", "c++", []),
+    ("gcc", "gcc", "c", []),
+]
+SOURCE_LANGUAGES = {".cpp": "c++", ".cc": "c++", ".cxx": "c++", ".c": "c"}
+
+INCLUDE_PATTERN = re.compile(r"^\s*#\s*include\s*<([^>]+)>")
+DIRECTIVE_PATTERN = re.compile(r"^\s*#")
+
+_headers = {}                                       # Build key -> header path, or None if the build failed
+_building = set()
+_headers_lock = threading.Lock()
+
+def source_language(file_path):
+    """
+    Get the language a source file is precompiled for.
+
+    params:
+        file_path (str): The path to the source file.
+
+    returns:
+        language (str): "c++", "c", or None if headers are not precompiled for the file type.
+    """
+    return SOURCE_LANGUAGES.get(os.path.splitext(file_path)[1])
+
+def leading_standard_includes(file_path):
+    """
+    Collect the standard headers a source file includes before its first other preprocessor directive.
+    A later #define, #if or quoted #include could change what the headers declare, so headers after it are ignored.
+
+    params:
+        file_path (str): The path to the source file.
+
+    returns:
+        includes (set): The names of the included standard headers.
+    """
+    includes = set()
+    with open(file_path, "r", errors="replace") as f:
+        for line in f:
+            match = INCLUDE_PATTERN.match(line)
+            if match:
+                includes.add(match.group(1).strip())
+            elif DIRECTIVE_PATTERN.match(line):
+                break
+    return includes
+
+def select_header_set(language, includes):
+    """
+    Pick the largest configured header set that the includes cover.
+
+    params:
+        language (str): The source language.
+        includes (set): The standard headers the source includes.
+
+    returns:
+        headers (list): The header set, or None if no set is covered.
+    """
+    candidates = [headers for headers in PCH_HEADER_SETS.get(language, []) if set(headers) <= includes]
+    return max(candidates, key=len) if candidates else None
+
+def _build_key(compiler, kind, language, flags, headers):
+    digest = hashlib.sha256(compiler_identity(compiler).encode("utf-8"))
+    for part in (kind, language, "\0".join(flags), "\0".join(headers)):
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()
+
+def _paths(key, kind):
+    header = os.path.join(PCH_CACHE_DIR, key, "cdp_pch.h")
+    return header, header + (".gch" if kind == "gcc" else ".pch")
+
+def build_precompiled_header(compiler, kind, language, flags, headers):
+    """
+    Precompile a header set, unless it is already built. The header is written once and never rewritten, since
+    clang checks that the inputs of a .pch file are unchanged; the precompiled file is compiled under a unique
+    temporary name and renamed into place, so concurrent builders never expose a partial file.
+
+    params:
+        compiler (str): The compiler executable.
+        kind (str): "gcc" for a .gch file used with -include, "clang" for a .pch file used with -include-pch.
+        language (str): The source language, "c++" or "c".
+        flags (list): The compiler flags the header will be used with.
+        headers (list): The standard headers to precompile.
+
+    returns:
+        header (str): The path to the header the precompiled file belongs to, or None if the build failed.
+    """
+    key = _build_key(compiler, kind, language, flags, headers)
+    header, compiled = _paths(key, kind)
+    if os.path.isfile(compiled):
+        return header
+
+    temp_path = f"{compiled}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(header), exist_ok=True)
+        try:
+            with open(header, "x") as f:
+                f.writelines(f"#include <{name}>\n" for name in headers)
+        except FileExistsError:
+            pass
+        # gcc looks for header.gch next to the included header, so the temporary file must not end in .gch
+        command = [compiler, "-x", f"{language}-header", *flags, header, "-o", temp_path]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=PCH_BUILD_TIMEOUT)
+        if result.returncode != 0:
+            logger.error(f"Precompiling {headers} with {compiler} failed: {result.stderr.strip()}")
+            return None
+        os.replace(temp_path, compiled)
+        logger.info(f"Precompiled {headers} with {compiler} {' '.join(flags)}.")
+        return header
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error(f"Precompiling {headers} with {compiler} failed: {e}")
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _build_in_background(key, compiler, kind, language, flags, headers):
+    header = build_precompiled_header(compiler, kind, language, flags, headers)
+    with _headers_lock:
+        _headers[key] = header
+        _building.discard(key)
+
+def precompiled_header_flags(compiler, kind, file_paths, flags=(), wait=False):
+    """
+    Get the compiler flags that use a precompiled header for some source files. If the matching header set
+    has not been built yet, its build starts in the background and no precompiled header is used this time.
+
+    params:
+        compiler (str): The compiler executable.
+        kind (str): "gcc" or "clang".
+        file_paths (list): The source files compiled together; they must share one language.
+        flags (list): The other compiler flags.
+        wait (bool): Whether to build a missing header set before returning.
+
+    returns:
+        pch_flags (list): The flags to add, or an empty list if no precompiled header applies.
+    """
+    if not PCH_ENABLED or not file_paths:
+        return []
+    languages = {source_language(path) for path in file_paths}
+    if len(languages) != 1 or None in languages:
+        return []
+    language = languages.pop()
+    includes = set.intersection(*(leading_standard_includes(path) for path in file_paths))
+    headers = select_header_set(language, includes)
+    if headers is None:
+        return []
+
+    flags = list(flags)
+    key = _build_key(compiler, kind, language, flags, headers)
+    with _headers_lock:
+        known = key in _headers
+        header = _headers.get(key)
+        start = not known and key not in _building and not wait
+        if start:
+            _building.add(key)
+    if not known:
+        if wait:
+            header = build_precompiled_header(compiler, kind, language, flags, headers)
+            with _headers_lock:
+                _headers[key] = header
+        elif start:
+            threading.Thread(
+                target=_build_in_background,
+                args=(key, compiler, kind, language, flags, headers),
+                name="pch-build",
+                daemon=True
+            ).start()
+    if header is None:
+        return []
+    return ["-include", header] if kind == "gcc" else ["-include-pch", _paths(key, kind)[1]]
+
+def build_precompiled_headers(targets=None):
+    """
+    Precompile every configured header set for every target.
+
+    params:
+        targets (list): (compiler, kind, language, flags) tuples; defaults to PCH_COMPILER_TARGETS.
+
+    returns:
+        built (int): The number of header sets available.
+    """
+    built = 0
+    for compiler, kind, language, flags in targets if targets is not None else PCH_COMPILER_TARGETS:
+        if shutil.which(compiler) is None:
+            continue
+        for headers in PCH_HEADER_SETS.get(language, []):
+            key = _build_key(compiler, kind, language, list(flags), headers)
+            header = build_precompiled_header(compiler, kind, language, list(flags), headers)
+            with _headers_lock:
+                _headers[key] = header
+            built += header is not None
+    return built
+
+def start_precompiled_header_build(targets=None):
+    """
+    Precompile the configured header sets in a background thread, so startup is not delayed.
+
+    params:
+        targets (list): (compiler, kind, language, flags) tuples; defaults to PCH_COMPILER_TARGETS.
+
+    returns:
+        thread (threading.Thread): The started build thread.
+    """
+    thread = threading.Thread(target=build_precompiled_headers, args=(targets,), name="pch-build", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,111 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/python_runner.py                                                                         #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program runs a Python submission in the child process of the native Python dynamic analysis. It runs   #
+# the program as __main__ with tracemalloc tracing its allocations, captures an uncaught exception or the exit status, and   #
+# writes a JSON report. It is executed as a script and imports only the standard library.                                   #
+#############################################################################################################################
+
+import gc
+import os
+import sys
+import json
+import runpy
+import traceback
+import tracemalloc
+
+def exception_record(exception, program, max_frames):
+    """
+    Describe an uncaught exception.
+
+    params:
+        exception (BaseException): The exception.
+        program (str): The path of the program.
+        max_frames (int): The number of innermost traceback frames kept.
+
+    returns:
+        record (dict): The exception type, message and traceback frames, innermost first, without the
+                       frames of the runner and runpy.
+    """
+    frames = traceback.extract_tb(exception.__traceback__)
+    first = next((i for i, frame in enumerate(frames) if frame.filename == program), 0)
+    frames = frames[first:]
+    return {
+        "type": type(exception).__name__,
+        "message": str(exception),
+        "traceback": [f"{frame.name} ({frame.filename}:{frame.lineno})" for frame in reversed(frames)][:max_frames],
+    }
+
+def allocation_records(snapshot, program, top):
+    """
+    Summarize the memory the program's own lines still hold after its globals were released, e.g. in
+    caches of other modules or in objects reachable from builtins.
+
+    params:
+        snapshot (tracemalloc.Snapshot): The snapshot taken when the program finished.
+        program (str): The path of the program.
+        top (int): The number of allocation sites kept.
+
+    returns:
+        retained (int): The bytes still allocated by the program's lines.
+        records (list): The largest allocation sites, with their size and block count.
+    """
+    statistics = snapshot.filter_traces([tracemalloc.Filter(True, program)]).statistics("lineno")
+    records = [
+        {
+            "location": f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}",
+            "bytes": statistic.size,
+            "blocks": statistic.count,
+        }
+        for statistic in statistics[:top]
+    ]
+    return sum(statistic.size for statistic in statistics), records
+
+def main():
+    report_path, max_frames, top, program = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+
+    # Run the program as "python3 program.py" would
+    sys.argv = [program]
+    sys.path[0] = os.path.dirname(program)
+
+    exit_code, exception = 0, None
+    tracemalloc.start(max_frames)
+    try:
+        runpy.run_path(program, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            exit_code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        exception = exception_record(e, program, max_frames)
+        traceback.print_exc()
+        exit_code = 1
+    # runpy has released the program's globals; collect cycles so only memory still reachable remains
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    retained, allocations = allocation_records(tracemalloc.take_snapshot(), program, top)
+    tracemalloc.stop()
+
+    report = {
+        "exit_code": exit_code,
+        "exception": exception,
+        "peak_memory": peak,
+        "allocation_growth": current,
+        "retained_memory": retained,
+        "top_allocations": allocations,
+    }
+    with open(report_path, "w") as f:
+        json.dump(report, f)
+    try:
+        sys.stdout.flush()
+    except (OSError, ValueError):
+        pass
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
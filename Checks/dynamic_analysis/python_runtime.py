@@ -0,0 +1,160 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/python_runtime.py                                                                        #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the native dynamic analysis of Python submissions. Instead of running the interpreter #
+# under Valgrind, which is many times slower and mostly reports CPython's own allocator, the program runs at native speed  #
+# in a resource-limited child with tracemalloc and faulthandler, and its peak memory, retained allocations, uncaught        #
+# exception or fatal error are reported in the memory_issues/error_count shape of the Valgrind results.                     #
+#############################################################################################################################
+
+import os
+import sys
+import json
+import signal
+import tempfile
+import subprocess
+from logs import setup_logger
+from Checks.dynamic_analysis.deadline import (
+    TOOL_DEADLINES, Deadline, spawn_limited, kill_process_group, feed_stdin, cpu_limit_exceeded
+)
+
+# Set up logger
+logger = setup_logger()
+
+PYTHON_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_runner.py")
+PYTHON_TRACE_FRAMES = 5                 # Traceback frames kept per allocation and per exception
+PYTHON_TOP_ALLOCATIONS = 10             # Allocation sites of the program reported
+PYTHON_RETAINED_LIMIT = 1024**2         # Bytes the program's lines still hold after its globals are released
+PYTHON_MAX_STDERR = 64 * 1024           # Trailing bytes of stderr kept for fatal error reports
+
+PYTHON_ISSUE_CATEGORIES = ["uncaught_exceptions", "fatal_errors", "retained_memory"]
+
+# Message of the EOFError input() raises once stdin is exhausted: the program wanted more input than it was given,
+# which is not a crash of the program, as under Valgrind where the interpreter's exit status is not scored
+INPUT_EOF_MESSAGE = "EOF when reading a line"
+
+def fatal_error_record(return_code, stderr):
+    """
+    Describe a run killed by a signal, from faulthandler's report on stderr.
+
+    params:
+        return_code (int): The negative return code of the killed process.
+        stderr (str): The tail of the program's stderr.
+
+    returns:
+        record (dict): The signal name, the fatal error message and the traceback lines faulthandler printed.
+    """
+    try:
+        name = signal.Signals(-return_code).name
+    except ValueError:
+        name = f"signal {-return_code}"
+    lines = stderr.splitlines()
+    message = next((line for line in lines if line.startswith("Fatal Python error")), f"Killed by {name}")
+    traceback = [line.strip() for line in lines if line.startswith("  File ") and "<frozen runpy>" not in line]
+    return {"type": name, "message": message, "traceback": traceback[:PYTHON_TRACE_FRAMES]}
+
+def python_runtime_result(report, return_code, timed_out, stderr):
+    """
+    Turn the runner's report into the results of the check.
+
+    params:
+        report (dict): The JSON report of the runner, or None if the run ended before writing it.
+        return_code (int): The return code of the child.
+        timed_out (bool): Whether a deadline stopped the child.
+        stderr (str): The tail of the program's stderr.
+
+    returns:
+        output (dict): "status" ("success", "failure" or "timeout"), "exit_code", "crash", "needs_input",
+                       "peak_memory", "allocation_growth", "top_allocations", and "memory_issues" and "error_count"
+                       per category. A run that ends when input() reads past the end of stdin needs input and
+                       did not crash.
+    """
+    report = report or {}
+    memory_issues = {category: [] for category in PYTHON_ISSUE_CATEGORIES}
+    crash = report.get("exception")
+    needs_input = crash is not None and crash["type"] == "EOFError" and crash["message"] == INPUT_EOF_MESSAGE
+    if needs_input:
+        crash = None
+    elif crash is not None:
+        memory_issues["uncaught_exceptions"].append(crash)
+    elif return_code < 0 and not timed_out:
+        crash = fatal_error_record(return_code, stderr)
+        memory_issues["fatal_errors"].append(crash)
+    if report.get("retained_memory", 0) >= PYTHON_RETAINED_LIMIT:
+        memory_issues["retained_memory"] = report["top_allocations"]
+
+    if timed_out:
+        status = "timeout"
+    elif crash is not None or return_code != 0 and not needs_input:
+        status = "failure"
+    else:
+        status = "success"
+    return {
+        "status": status,
+        "exit_code": return_code,
+        "crash": crash,
+        "needs_input": needs_input,
+        "peak_memory": report.get("peak_memory"),
+        "allocation_growth": report.get("allocation_growth"),
+        "top_allocations": report.get("top_allocations", []),
+        "memory_issues": memory_issues,
+        "error_count": {category: len(records) for category, records in memory_issues.items()},
+    }
+
+def run_python_runtime_check(file_path, stdin_data=None):
+    """
+    Run a Python program natively under tracemalloc and faulthandler, bounded by the "python" limits of
+    TOOL_DEADLINES. The program's stdout is discarded; a timed out run keeps what is known about it.
+
+    params:
+        file_path (str): The path to the Python program.
+        stdin_data (str): The program's input, or None for an empty input; stdin is closed after it.
+
+    returns:
+        output (dict): The results, as python_runtime_result returns them, or a failure with an "error"
+                       if the program could not be started.
+    """
+    file_path = os.path.abspath(file_path)
+    limits = TOOL_DEADLINES["python"]
+    with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryFile() as stderr_file:
+        report_path = os.path.join(work_dir, "report.json")
+        command = [
+            sys.executable, "-X", "faulthandler", PYTHON_RUNNER,
+            report_path, str(PYTHON_TRACE_FRAMES), str(PYTHON_TOP_ALLOCATIONS), file_path
+        ]
+        try:
+            process = spawn_limited(
+                command,
+                cpu = limits.get("cpu"),
+                memory = limits.get("memory"),
+                cwd = os.path.dirname(file_path),
+                stdin = subprocess.PIPE,
+                stdout = subprocess.DEVNULL,
+                stderr = stderr_file
+            )
+        except OSError as e:
+            logger.error(f"Python runtime analysis failed: {e}")
+            return {"status": "failure", "error": "Python runtime analysis failed!"}
+
+        feed_stdin(process, stdin_data)
+        with Deadline(process, limits.get("wall")) as deadline:
+            return_code = process.wait()
+        kill_process_group(process)             # Processes the program left running
+        timed_out = deadline.expired or cpu_limit_exceeded(return_code)
+
+        stderr_file.seek(max(0, stderr_file.seek(0, os.SEEK_END) - PYTHON_MAX_STDERR))
+        stderr = stderr_file.read().decode("utf-8", errors="replace")
+        try:
+            with open(report_path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = None                       # Killed before the report was written
+
+    if timed_out:
+        logger.info(f"{file_path} hit its Python runtime deadline.")
+    output = python_runtime_result(report, return_code, timed_out, stderr)
+    logger.info("Python runtime analysis completed.")
+    return output
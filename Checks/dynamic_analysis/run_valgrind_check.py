@@ -15,16 +15,23 @@ import json
 import re
 from datetime import datetime
 from logs import setup_logger
+from Checks.dynamic_analysis.compile_cache import compile_cache_key, fetch_cached_binary, store_cached_binary
+from Checks.dynamic_analysis.pch_cache import precompiled_header_flags
+from Checks.dynamic_analysis.valgrind_xml import run_valgrind_xml
+from Checks.dynamic_analysis.deadline import run_with_deadline
 
 # Set up logger
 logger = setup_logger()
 
-def run_valgrind_check(file_path):
+COMPILED_EXTENSIONS = ['.c', '.cpp', '.f', '.ada', '.asm']              # Extensions that need a compile step before Valgrind
+
+def run_valgrind_check(file_path, stdin_data=None):
     """
     Run Valgrind on the given file.
 
     params:
         file_path (str): The path to the file to run Valgrind on.
+        stdin_data (str): The program's input, or None for an empty input.
 
     returns:
         output_json (dict): A dictionary containing the Valgrind output.
@@ -35,89 +42,137 @@ def run_valgrind_check(file_path):
     """
     _, ext = os.path.splitext(file_path)
     
-    if ext in ['.c', '.cpp', '.f', '.ada', '.asm']:                     # C, C++, Fortran, Ada, Assembly
-        return run_valgrind_for_compiled(file_path)
+    if ext in COMPILED_EXTENSIONS:                                      # C, C++, Fortran, Ada, Assembly
+        return run_valgrind_for_compiled(file_path, stdin_data=stdin_data)
     elif ext == '.java':                                                # Java
-        return run_valgrind_for_java(file_path)
+        return run_valgrind_for_java(file_path, stdin_data=stdin_data)
     elif ext == '.py':                                                  # Python
-        return run_valgrind_for_interpreter(file_path, 'python3')
+        return run_valgrind_for_interpreter(file_path, 'python3', stdin_data)
     elif ext == '.pl':                                                  # Perl
-        return run_valgrind_for_interpreter(file_path, 'perl')
+        return run_valgrind_for_interpreter(file_path, 'perl', stdin_data)
     else:   
         raise ValueError(f"Unsupported file extension: {ext}")
 
-def run_valgrind_for_compiled(file_path):
+def needs_compilation(file_path):
+    """
+    Check whether a file has to be compiled before it can run under Valgrind.
+
+    params:
+        file_path (str): The path to the source file.
+
+    returns:
+        needs_compilation (bool): True if the file is a compiled-language source file.
+    """
+    return os.path.splitext(file_path)[1] in COMPILED_EXTENSIONS
+
+def run_valgrind_for_compiled(file_path, compiled_program=None, stdin_data=None):
     """
     Run Valgrind on a compiled program.
 
     params:
         file_path (str): The path to the compiled program to run Valgrind on.
+        compiled_program (str): The already compiled program; if None, file_path is compiled first.
+        stdin_data (str): The program's input, or None for an empty input.
 
     returns:
-        output_json (dict): A dictionary containing the Valgrind output.
+        output_json (dict): A dictionary containing the Valgrind output; its status is "timeout"
+                            with the findings so far if the program hit its deadline.
 
     exceptions:
         subprocess.CalledProcessError: If the compilation or Valgrind command fails.
     
     """
-    try:
-        compiled_program = compile_program(file_path)
-    except subprocess.CalledProcessError as e:
-        return {
-            "status": "failure",
-            "error": "Compilation failed!"
-        }
-
-    command = ['valgrind', '--leak-check=full', './' + compiled_program]
+    if compiled_program is None:
+        try:
+            compiled_program = compile_program(file_path)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            return {
+                "status": "failure",
+                "error": "Compilation failed!"
+            }
 
     try:
-        result = subprocess.run(command, capture_output = True, text = True, check = True)
-        output_json = process_valgrind_output(result)
-        logger.info("Valgrind analysis completed successfully.")
+        output_json = run_valgrind_xml([os.path.abspath(compiled_program)], stdin_data=stdin_data)
+    except OSError as e:
+        logger.error(f"Valgrind execution failed: {e}")
+        return {"status": "failure", "error": "Valgrind failed!"}
+
+    if output_json["timed_out"]:
+        output_json["status"] = "timeout"
         return output_json
-    except subprocess.CalledProcessError as e:
-        return {
-            "status": "failure",
-            "error": "Valgrind failed!"
-        }
+    if output_json["return_code"] != 0:
+        # Valgrind exits with the program's exit code
+        return {"status": "failure", "error": "Valgrind failed!", **output_json}
+    output_json["status"] = "success"
+    logger.info("Valgrind analysis completed successfully.")
+    return output_json
     
-def compile_program(file_path):
+def compile_program(file_path, flags=None, use_cache=True, use_pch=True):
     """
-    Compile a program.
+    Compile a program. The binary is written next to the source file, so concurrent requests 
+    working in separate workspaces never overwrite each other's binaries. Binaries of byte-identical 
+    sources compiled with the same compiler and flags are reused from the compile cache.
 
     params:
         file_path (str): The path to the program to compile.
+        flags (list): Extra compiler flags.
+        use_cache (bool): Whether to reuse and store binaries in the compile cache.
+        use_pch (bool): Whether C/C++ sources may use a precompiled standard header set.
 
     returns:
-        output_file (str): The name of the compiled program.
+        output_file (str): The path to the compiled program.
 
     raises:
         ValueError: If the file extension is not supported.
     
     """
-    output_file = 'a.out' if platform.system() != 'Windows' else 'a.exe'
+    output_file = os.path.splitext(file_path)[0] + ('.out' if platform.system() != 'Windows' else '.exe')
+    flags = list(flags or [])
     if file_path.endswith('.cpp'):
-        compile_cmd = ['g++', file_path, '-o', output_file]
+        compiler = 'g++'
+        if use_pch:
+            flags += precompiled_header_flags(compiler, 'gcc', [file_path], flags)
+        compile_cmd = [compiler, file_path, *flags, '-o', output_file]
     elif file_path.endswith('.c'):
-        compile_cmd = ['gcc', file_path, '-o', output_file]
+        compiler = 'gcc'
+        if use_pch:
+            flags += precompiled_header_flags(compiler, 'gcc', [file_path], flags)
+        compile_cmd = [compiler, file_path, *flags, '-o', output_file]
     elif file_path.endswith('.f'):
-        compile_cmd = ['gfortran', file_path, '-o', output_file]
+        compiler = 'gfortran'
+        compile_cmd = [compiler, file_path, *flags, '-o', output_file]
     elif file_path.endswith('.ada'):
-        compile_cmd = ['gnatmake', file_path]
-        output_file = file_path.replace('.ada', '')
+        compiler = 'gnatmake'
+        compile_cmd = [compiler, file_path, *flags, '-D', os.path.dirname(os.path.abspath(file_path)), '-o', output_file]
     else:
         raise ValueError(f"Unsupported language for compilation: {file_path}")
+
+    if use_cache:
+        cache_key = compile_cache_key(file_path, compiler, flags)
+        if fetch_cached_binary(cache_key, output_file):
+            return output_file
     
-    subprocess.run(compile_cmd, check = True, capture_output = True, text = True)
+    try:
+        run_with_deadline(compile_cmd, 'compile', check = True)
+    except subprocess.CalledProcessError:
+        if '-include' not in flags:
+            raise
+        # Retry without the precompiled header, so it can never be the reason a submission fails to compile
+        logger.info(f"Compiling {file_path} with a precompiled header failed; retrying without it.")
+        return compile_program(file_path, flags[:flags.index('-include')], use_cache, use_pch=False)
+
+    if use_cache:
+        store_cached_binary(cache_key, output_file)
     return output_file
 
-def run_valgrind_for_java(file_path, lib_paths=None):
+def run_valgrind_for_java(file_path, lib_paths=None, stdin_data=None):
     """
     Run Valgrind on a Java program.
 
     params:
         file_path (str): The path to the Java program to run Valgrind on.
         lib_paths (list): A list of library paths to include in the classpath.
+        stdin_data (str): The program's input, or None for an empty input.
 
     returns:
         output_json (dict): A dictionary containing the Valgrind output.
@@ -154,50 +209,49 @@ def run_valgrind_for_java(file_path, lib_paths=None):
             if os.name == 'nt':
                 classpath = ';'.join(lib_paths)
             command = ['javac', '-cp', classpath, file_path]
-        subprocess.run(command, check = True)
-    except subprocess.CalledProcessError as e:
+        run_with_deadline(command, 'javac', check = True)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
         logger.error(f"Compilation failed: {e}")
         return None
     
-    # Run Valgrind on the Java class
-    class_file = file_path.replace('.java', '')
-    command = ['valgrind', '--leak-check=full', 'java', class_file]
+    # Run Valgrind on the Java class from its own directory
+    class_dir = os.path.dirname(os.path.abspath(file_path))
+    class_name = os.path.splitext(os.path.basename(file_path))[0]
     try:
-        result = subprocess.run(command, capture_output = True, text = True)
-    except subprocess.CalledProcessError as e:
+        output_json = run_valgrind_xml(['java', '-cp', class_dir, class_name], stdin_data=stdin_data)
+    except OSError as e:
         logger.error(f"Valgrind execution failed: {e}")
         return None
-    
-    output_json = process_valgrind_output(result)
+    output_json["status"] = "timeout" if output_json["timed_out"] else "success"
     
     logger.info("Valgrind analysis completed successfully.")
     return output_json
 
-def run_valgrind_for_interpreter(file_path, interpreter):
+def run_valgrind_for_interpreter(file_path, interpreter, stdin_data=None):
     """
     Run Valgrind on a Python or Perl program.
 
     params:
         file_path (str): The path to the Python or Perl program to run Valgrind on.
         interpreter (str): The interpreter to use (e.g., 'python3', 'perl').
+        stdin_data (str): The program's input, or None for an empty input.
 
     returns:
         output_json (dict): A dictionary containing the Valgrind output.
     """
-    command = ['valgrind', '--leak-check=full', interpreter, file_path]
-
     try:
-        result = subprocess.run(command, capture_output = True, text = True)
-    except subprocess.CalledProcessError as e:
+        output_json = run_valgrind_xml([interpreter, file_path], stdin_data=stdin_data)
+    except OSError as e:
         logger.error(f"Valgrind execution failed: {e}")
         return {"status": "failure", "error": "Valgrind failed!"}
-    output_json = process_valgrind_output(result)
+    output_json["status"] = "timeout" if output_json["timed_out"] else "success"
     logger.info("Valgrind analysis completed successfully.")
     return output_json
 
 def process_valgrind_output(result):
     """
-    Process the Valgrind output and return a dictionary of memory issues.
+    Process the text Valgrind output of a finished run and return a dictionary of memory issues.
+    The checks parse Valgrind's XML output with run_valgrind_xml instead; this keeps only summary lines.
 
     params:
         result (subprocess.CompletedProcess): The result of the Valgrind command.
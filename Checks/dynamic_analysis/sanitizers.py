@@ -0,0 +1,210 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/sanitizers.py                                                                            #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the sanitizer-based dynamic analysis of C and C++ code. The program is compiled with  #
+# AddressSanitizer, UndefinedBehaviorSanitizer and LeakSanitizer and runs at about twice its native cost instead of under   #
+# Valgrind's emulation. The sanitizer reports are parsed into the memory_issues/error_count records of the Valgrind results.#
+#############################################################################################################################
+
+import os
+import re
+import subprocess
+from logs import setup_logger
+from Checks.dynamic_analysis.run_valgrind_check import compile_program
+from Checks.dynamic_analysis.valgrind_xml import MemoryIssueRecords
+from Checks.dynamic_analysis.deadline import (
+    TOOL_DEADLINES, Deadline, spawn_limited, kill_process_group, feed_stdin, cpu_limit_exceeded
+)
+
+# Set up logger
+logger = setup_logger()
+
+SANITIZER_FLAGS = ["-fsanitize=address,undefined", "-fno-omit-frame-pointer", "-g"]
+SANITIZER_EXIT_CODE = 99                        # Exit code of a program stopped by a sanitizer report
+SANITIZER_MAX_REPORT_BYTES = 16 * 1024**2       # Bytes of stderr parsed; the rest is drained unparsed
+SANITIZER_READ_SIZE = 64 * 1024                 # Bytes read from stderr at a time
+SANITIZER_OPTIONS = {
+    "ASAN_OPTIONS": f"exitcode={SANITIZER_EXIT_CODE}:detect_leaks=1:abort_on_error=0",
+    "LSAN_OPTIONS": f"exitcode={SANITIZER_EXIT_CODE}",
+    "UBSAN_OPTIONS": "print_stacktrace=1:halt_on_error=0",
+}
+
+ASAN_ERROR_PATTERN = re.compile(r"^==\d+==ERROR: AddressSanitizer: (?:attempting )?(.+?) on (.*?)(?: at pc | \(pc |$)")
+ACCESS_PATTERN = re.compile(r"^(READ|WRITE) of size (\d+)")
+LEAK_PATTERN = re.compile(r"^(Direct|Indirect) leak of (\d+) byte\(s\) in (\d+) object\(s\)")
+UBSAN_PATTERN = re.compile(r"^(.+?):(\d+):(?:\d+:)? runtime error: (.*)$")
+FRAME_PATTERN = re.compile(r"^\s+#\d+ 0x[0-9a-f]+\s+(?:in (\S+) )?\(?([^()\s]+?)(?::(\d+))?(?::\d+)?\)?$")
+
+def sanitizer_frame(function, location, line):
+    """
+    Render one stack frame of a sanitizer report like a Valgrind frame.
+
+    params:
+        function (str): The function name, or None if the report has none.
+        location (str): The source file, or the object and offset.
+        line (str): The source line, or None.
+
+    returns:
+        frame (str): "function (file:line)", or the function or object alone.
+    """
+    if line is None:
+        return function or os.path.basename(location)
+    return f"{function or '???'} ({os.path.basename(location)}:{line})"
+
+def parse_sanitizer_reports(lines, records):
+    """
+    Parse sanitizer reports into memory issue records. Each error keeps the first stack of its report,
+    the access or allocation site, without the frames of the sanitizer runtime.
+
+    params:
+        lines (iterable): The lines of the reports.
+        records (MemoryIssueRecords): The records to add the errors to.
+    """
+    current = None                  # The error whose first stack is being read
+
+    def finish():
+        frames = current["frames"] or current["fallback"]
+        records.add_record(
+            current["kind"], current["message"], frames, current["bytes"], current["blocks"], current["category"]
+        )
+
+    for line in lines:
+        line = line.rstrip("\n")
+        frame = FRAME_PATTERN.match(line)
+        if frame is not None:
+            if current is not None:
+                current["in_stack"] = True
+                if "libsanitizer" not in frame.group(2):
+                    current["frames"].append(sanitizer_frame(*frame.groups()))
+            continue
+        if current is not None and current["in_stack"]:
+            finish()
+            current = None
+
+        error = ASAN_ERROR_PATTERN.match(line)
+        leak = LEAK_PATTERN.match(line)
+        undefined = UBSAN_PATTERN.match(line)
+        if error is not None:
+            kind, target = error.groups()
+            current = {"kind": kind, "message": f"{kind} on {target}".rstrip(":"), "category": "other_errors"}
+        elif leak is not None:
+            current = {
+                "kind": f"{leak.group(1).lower()}-leak",
+                "message": line.rstrip(":"),
+                "category": "definitely_lost" if leak.group(1) == "Direct" else "indirectly_lost",
+                "bytes": int(leak.group(2)),
+                "blocks": int(leak.group(3)),
+            }
+        elif undefined is not None:
+            path, source_line, message = undefined.groups()
+            current = {
+                "kind": "undefined-behavior",
+                "message": message,
+                "category": "other_errors",
+                "fallback": [sanitizer_frame(None, path, source_line)],
+            }
+        elif current is not None:
+            access = ACCESS_PATTERN.match(line)
+            if access is not None:
+                current["category"] = "invalid_read_errors" if access.group(1) == "READ" else "invalid_write_errors"
+                current["bytes"] = int(access.group(2))
+            continue
+        else:
+            continue
+        current.setdefault("bytes", 0)
+        current.setdefault("blocks", 0)
+        current.setdefault("fallback", [])
+        current.update(frames=[], in_stack=False)
+    if current is not None:
+        finish()
+
+def run_sanitized_program(program, cwd=None, stdin_data=None):
+    """
+    Run a sanitized program, bounded by the "sanitizers" limits of TOOL_DEADLINES, and collect its reports.
+    The sanitizers report on stderr; the program's stdout is discarded.
+
+    params:
+        program (str): The path to the sanitized program.
+        cwd (str): The working directory of the program.
+        stdin_data (str): The program's input, or None for an empty input; stdin is closed after it.
+
+    returns:
+        report (str): The first SANITIZER_MAX_REPORT_BYTES of stderr.
+        truncated (bool): Whether stderr was longer.
+        return_code (int): The return code of the program.
+        timed_out (bool): Whether a deadline stopped the program.
+    """
+    env = dict(os.environ, **SANITIZER_OPTIONS)
+    limits = TOOL_DEADLINES["sanitizers"]
+    # No address space limit: AddressSanitizer reserves terabytes of shadow memory up front
+    process = spawn_limited(
+        [program],
+        cpu = limits.get("cpu"),
+        cwd = cwd,
+        env = env,
+        stdin = subprocess.PIPE,
+        stdout = subprocess.DEVNULL,
+        stderr = subprocess.PIPE
+    )
+    feed_stdin(process, stdin_data)
+    chunks, size = [], 0
+    with Deadline(process, limits.get("wall")) as deadline:
+        while True:
+            chunk = process.stderr.read1(SANITIZER_READ_SIZE)
+            if not chunk:
+                break
+            if size < SANITIZER_MAX_REPORT_BYTES:
+                chunks.append(chunk[:SANITIZER_MAX_REPORT_BYTES - size])
+            size += len(chunk)                  # Keep draining, so the program never blocks on a full pipe
+        return_code = process.wait()
+    process.stderr.close()
+    kill_process_group(process)                 # Processes the program left running
+    report = b"".join(chunks).decode("utf-8", errors="replace")
+    timed_out = deadline.expired or cpu_limit_exceeded(return_code)
+    return report, size > SANITIZER_MAX_REPORT_BYTES, return_code, timed_out
+
+def run_sanitizer_check(file_path, compiled_program=None, stdin_data=None):
+    """
+    Run a C or C++ program compiled with AddressSanitizer, UndefinedBehaviorSanitizer and LeakSanitizer.
+
+    params:
+        file_path (str): The path to the C or C++ source file.
+        compiled_program (str): The program already compiled with SANITIZER_FLAGS; if None, file_path is compiled first.
+        stdin_data (str): The program's input, or None for an empty input.
+
+    returns:
+        output_json (dict): The results in the shape of the Valgrind results, with the "return_code" of the
+                            program and "timed_out"; its status is "timeout" with the findings so far if the
+                            program hit its deadline.
+    """
+    if compiled_program is None:
+        try:
+            compiled_program = compile_program(file_path, SANITIZER_FLAGS)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return {"status": "failure", "error": "Compilation failed!"}
+
+    try:
+        report, truncated, return_code, timed_out = run_sanitized_program(
+            os.path.abspath(compiled_program), os.path.dirname(os.path.abspath(file_path)), stdin_data
+        )
+    except OSError as e:
+        logger.error(f"Sanitized program execution failed: {e}")
+        return {"status": "failure", "error": "Sanitizers failed!"}
+    records = MemoryIssueRecords()
+    parse_sanitizer_reports(report.splitlines(), records)
+
+    output_json = records.results(truncated or timed_out)
+    output_json["return_code"] = return_code
+    output_json["timed_out"] = timed_out
+    if timed_out:
+        output_json["status"] = "timeout"
+        return output_json
+    if return_code not in (0, SANITIZER_EXIT_CODE):
+        # A program that fails on its own fails the check, as under Valgrind
+        return {"status": "failure", "error": "Sanitizers failed!", **output_json}
+    output_json["status"] = "success"
+    logger.info("Sanitizer analysis completed successfully.")
+    return output_json
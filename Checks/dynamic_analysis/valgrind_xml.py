@@ -0,0 +1,267 @@
+#############################################################################################################################
+# Program: Checks/dynamic_analysis/valgrind_xml.py                                                                          #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the incremental parser of Valgrind's XML output. Valgrind writes XML to a dedicated   #
+# file descriptor, and the parser turns each <error> into a compact record (kind, bytes, top stack frames) as soon as it     #
+# is complete. Records are deduplicated and capped, so memory and parse time stay flat however noisy the program is.       #
+#############################################################################################################################
+
+import os
+import re
+import subprocess
+import xml.etree.ElementTree as ET
+from logs import setup_logger
+from Checks.dynamic_analysis.deadline import TOOL_DEADLINES, Deadline, spawn_limited, feed_stdin, cpu_limit_exceeded
+
+# Set up logger
+logger = setup_logger()
+
+VALGRIND_MAX_ERRORS = 100               # Distinct error records kept; further distinct errors are only counted
+VALGRIND_MAX_FRAMES = 5                 # Stack frames kept per record
+VALGRIND_MAX_XML_BYTES = 64 * 1024**2   # XML bytes parsed; the rest is drained unparsed
+VALGRIND_READ_SIZE = 64 * 1024          # Bytes read from the XML pipe at a time
+
+# Memcheck error kinds grouped into the memory issue categories of the results
+ERROR_CATEGORIES = {
+    "UninitCondition": "uninitialized_value_errors",
+    "UninitValue": "uninitialized_value_errors",
+    "InvalidRead": "invalid_read_errors",
+    "InvalidWrite": "invalid_write_errors",
+    "Leak_DefinitelyLost": "definitely_lost",
+    "Leak_IndirectlyLost": "indirectly_lost",
+    "Leak_PossiblyLost": "possibly_lost",
+    "Leak_StillReachable": "still_reachable",
+}
+MEMORY_ISSUE_CATEGORIES = [
+    "uninitialized_value_errors", "invalid_read_errors", "invalid_write_errors",
+    "definitely_lost", "indirectly_lost", "possibly_lost", "still_reachable", "other_errors",
+]
+SIZE_PATTERN = re.compile(r"of size (\d+)")
+
+class MemoryIssueRecords:
+    """
+    Deduplicated, capped records of memory errors, grouped into the memory issue categories of the results.
+    Shared by the Valgrind XML parser and the sanitizer report parser.
+
+    params:
+        max_errors (int): The number of distinct error records kept.
+        max_frames (int): The number of stack frames kept per record.
+    """
+    def __init__(self, max_errors=VALGRIND_MAX_ERRORS, max_frames=VALGRIND_MAX_FRAMES):
+        self.max_errors = max_errors
+        self.max_frames = max_frames
+        self.records = {}                   # (kind, frames) -> record, in first-seen order
+        self.dropped = 0                    # Errors not kept because the cap was reached
+        self._categories = {}               # Record key -> memory issue category
+
+    def add_record(self, kind, message, frames, size=0, blocks=0, category=None):
+        """
+        Count one occurrence of an error.
+
+        params:
+            kind (str): The error kind reported by the tool.
+            message (str): The error message.
+            frames (list): The stack frames, innermost first; only the first max_frames are kept.
+            size (int): The bytes accessed or leaked.
+            blocks (int): The blocks leaked.
+            category (str): The memory issue category; defaults to the category of a Valgrind kind.
+
+        returns:
+            key (tuple): The key of the record, or None if the record was dropped by the cap.
+        """
+        frames = list(frames)[:self.max_frames]
+        key = (kind, tuple(frames))
+        record = self.records.get(key)
+        if record is None:
+            if len(self.records) >= self.max_errors:
+                self.dropped += 1
+                return None
+            record = self.records[key] = {
+                "kind": kind, "message": message, "bytes": 0, "blocks": 0, "frames": frames, "count": 0
+            }
+            self._categories[key] = category or ERROR_CATEGORIES.get(kind, "other_errors")
+        record["bytes"] += size
+        record["blocks"] += blocks
+        record["count"] += 1
+        return key
+
+    def results(self, truncated=False):
+        """
+        Build the results.
+
+        params:
+            truncated (bool): Whether the tool's output stopped early.
+
+        returns:
+            output (dict): "memory_issues" and "error_count" per category, and "dropped_errors"
+                           and "truncated" to tell whether the records are complete.
+        """
+        memory_issues = {category: [] for category in MEMORY_ISSUE_CATEGORIES}
+        for key, record in self.records.items():
+            memory_issues[self._categories[key]].append(record)
+        return {
+            "memory_issues": memory_issues,
+            "error_count": {category: len(records) for category, records in memory_issues.items()},
+            "dropped_errors": self.dropped,
+            "truncated": truncated,
+        }
+
+class ValgrindXmlParser(MemoryIssueRecords):
+    """
+    An incremental parser of Valgrind's --xml=yes output. Feed it the XML as it arrives and close it at the end.
+
+    params:
+        max_errors (int): The number of distinct error records kept.
+        max_frames (int): The number of stack frames kept per record.
+    """
+    def __init__(self, max_errors=VALGRIND_MAX_ERRORS, max_frames=VALGRIND_MAX_FRAMES):
+        super().__init__(max_errors, max_frames)
+        self._by_unique = {}                # Valgrind's unique error id -> record key
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+
+    def feed(self, data):
+        """
+        Parse the next chunk of XML.
+
+        params:
+            data (bytes): The chunk.
+        """
+        self._parser.feed(data)
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if self._depth != 1:
+                continue
+            # A complete top-level element: use it, then drop it from the tree
+            if element.tag == "error":
+                self._add_error(element)
+            elif element.tag == "errorcounts":
+                self._add_counts(element)
+            self._root.remove(element)
+
+    def _frames(self, error):
+        frames = []
+        stack = error.find("stack")
+        for frame in (stack.findall("frame") if stack is not None else [])[:self.max_frames]:
+            function = frame.findtext("fn") or frame.findtext("obj") or frame.findtext("ip") or "???"
+            if frame.findtext("file"):
+                function += f" ({frame.findtext('file')}:{frame.findtext('line')})"
+            frames.append(function)
+        return frames
+
+    def _add_error(self, error):
+        kind = error.findtext("kind") or "Unknown"
+        xwhat = error.find("xwhat")
+        message = error.findtext("what") or (xwhat.findtext("text") if xwhat is not None else "") or ""
+        if xwhat is not None and xwhat.findtext("leakedbytes"):
+            size, blocks = int(xwhat.findtext("leakedbytes")), int(xwhat.findtext("leakedblocks") or 0)
+        else:
+            match = SIZE_PATTERN.search(message)
+            size, blocks = (int(match.group(1)) if match else 0), 0
+
+        key = self.add_record(kind, message, self._frames(error), size, blocks)
+        unique = error.findtext("unique")
+        if key is not None and unique is not None and not kind.startswith("Leak_"):
+            self._by_unique[unique] = key
+
+    def _add_counts(self, errorcounts):
+        # Valgrind reports a repeated error once, and how often it occurred at the end
+        for pair in errorcounts.findall("pair"):
+            key = self._by_unique.get(pair.findtext("unique"))
+            if key is not None:
+                self.records[key]["count"] += int(pair.findtext("count") or 1) - 1
+
+    def close(self, truncated=False):
+        """
+        Finish parsing and build the results.
+
+        params:
+            truncated (bool): Whether the XML stopped early, e.g. because the size cap was reached.
+
+        returns:
+            output (dict): The results, as MemoryIssueRecords.results returns them.
+        """
+        if not truncated:
+            try:
+                self._parser.close()
+            except ET.ParseError as e:
+                logger.error(f"Incomplete Valgrind XML output: {e}")
+                truncated = True
+        return self.results(truncated)
+
+def run_valgrind_xml(target, cwd=None, valgrind_options=None, max_xml_bytes=None, stdin_data=None):
+    """
+    Run a program under Valgrind with XML output on a dedicated pipe, parsing it while the program runs.
+    The program's own output is discarded. The run is bounded by the "valgrind" limits of TOOL_DEADLINES;
+    when a limit is hit the whole process group is killed and the findings parsed so far are returned.
+
+    params:
+        target (list): The program and its arguments.
+        cwd (str): The working directory of the program.
+        valgrind_options (list): Extra Valgrind options.
+        max_xml_bytes (int): The XML bytes parsed; defaults to VALGRIND_MAX_XML_BYTES.
+        stdin_data (str): The program's input, or None for an empty input; stdin is closed after it.
+
+    returns:
+        output (dict): The parsed results, as ValgrindXmlParser.close returns, with the "return_code" of Valgrind
+                       and "timed_out" if a deadline stopped the program.
+    """
+    max_xml_bytes = VALGRIND_MAX_XML_BYTES if max_xml_bytes is None else max_xml_bytes
+    read_fd, write_fd = os.pipe()
+    command = [
+        "valgrind", "--leak-check=full", "--show-leak-kinds=all",
+        "--xml=yes", f"--xml-fd={write_fd}", *(valgrind_options or []), *target
+    ]
+    limits = TOOL_DEADLINES["valgrind"]
+    try:
+        process = spawn_limited(
+            command,
+            cpu = limits.get("cpu"),
+            cwd = cwd,
+            stdin = subprocess.PIPE,
+            stdout = subprocess.DEVNULL,
+            stderr = subprocess.DEVNULL,
+            pass_fds = (write_fd,)
+        )
+    except OSError:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+
+    feed_stdin(process, stdin_data)
+    parser = ValgrindXmlParser()
+    parsed = 0
+    truncated = False
+    with Deadline(process, limits.get("wall")) as deadline, os.fdopen(read_fd, "rb", buffering=0) as xml_pipe:
+        while True:
+            chunk = xml_pipe.read(VALGRIND_READ_SIZE)
+            if not chunk:
+                break
+            if truncated:
+                continue                    # Keep draining, so Valgrind never blocks on a full pipe
+            try:
+                parser.feed(chunk[:max_xml_bytes - parsed])
+            except ET.ParseError as e:
+                logger.error(f"Malformed Valgrind XML output: {e}")
+                truncated = True
+            parsed += len(chunk)
+            truncated = truncated or parsed > max_xml_bytes
+        return_code = process.wait()
+
+    timed_out = deadline.expired or cpu_limit_exceeded(return_code)
+    if timed_out:
+        logger.info(f"{target[0]} hit its Valgrind deadline; keeping the findings parsed so far.")
+    output = parser.close(truncated=truncated or timed_out)
+    output["return_code"] = return_code
+    output["timed_out"] = timed_out
+    return output
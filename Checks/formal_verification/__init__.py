@@ -7,17 +7,15 @@
 # Description: This program contains the initialization code for the Dafny Checker package.                                 #                                                                                                 
 #############################################################################################################################
 
-from logs import setup_logger
-from Checks.formal_verification.run_dafny_check import run_dafny_code
+from Checks.lazy_exports import lazy_exports
 
-# Set up app_logger
-app_logger = setup_logger()
-
-# Expose the primary function for external usage
-__all__ = [
-    "run_dafny_code",
-]
-
-# Log package initialization using app_logger
-app_logger.info("Dafny Checker package initialized.")
+# Names re-exported per module; a module is imported when one of its names is first used
+_EXPORTS = {
+    "Checks.formal_verification.run_dafny_check": ["run_dafny_code"],
+    "Checks.formal_verification.dafny_server": ["DafnyServer", "DafnyServerError", "get_dafny_server"],
+    "Checks.formal_verification.dafny_incremental": ["MemberCache", "get_member_cache", "verify_incrementally"],
+}
 
+# Expose the primary functions for external usage
+__all__ = [name for names in _EXPORTS.values() for name in names]
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
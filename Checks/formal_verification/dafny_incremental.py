@@ -0,0 +1,378 @@
+#############################################################################################################################
+# Program: Checks/formal_verification/dafny_incremental.py                                                                  #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the per-member incremental Dafny verification cache. A file is split into its         #
+# top-level members, and each method, lemma, function or predicate is keyed by its text together with the text of the      #
+# declarations it depends on. Members whose key was verified before are marked {:verify false}, so the verifier only        #
+# checks the members that changed, and their cached errors are merged back into the report.                                #
+#############################################################################################################################
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+DAFNY_MEMBER_CACHE_ENTRIES = 4096           # Maximum number of cached member outcomes
+
+# Words that start a top-level declaration; modifiers may precede a declaration keyword
+DECLARATION_KEYWORDS = {
+    "method", "lemma", "function", "predicate", "constructor", "datatype", "codatatype", "class", "trait",
+    "module", "import", "include", "const", "type", "newtype", "iterator", "export",
+}
+DECLARATION_MODIFIERS = {"ghost", "static", "opaque", "abstract", "least", "greatest", "twostate", "inductive", "copredicate", "colemma"}
+# Declarations that can be skipped with {:verify false}; every other declaration is re-verified each time
+VERIFIABLE_KEYWORDS = {"method", "lemma", "function", "predicate", "constructor"}
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_?][A-Za-z0-9_?']*")
+DAFNY_MESSAGE_PATTERN = re.compile(r"^(?P<path>.+?)\((?P<line>\d+),(?P<column>\d+)\): (?P<rest>.*)$")
+DAFNY_SUMMARY_PATTERN = re.compile(r"Dafny program verifier finished with (?P<verified>\d+) verified, (?P<errors>\d+) errors?")
+
+_member_cache = None
+_member_cache_lock = threading.Lock()
+
+class DafnyMember:
+    """
+    One top-level declaration of a Dafny file.
+
+    params:
+        start (int): The offset of the declaration's first character.
+        end (int): The offset just past its last character.
+        keyword (str): The declaration keyword, e.g. "lemma".
+        keyword_end (int): The offset just past the declaration keyword, where attributes can be inserted.
+        name (str): The declared name, or None.
+        identifiers (set): The identifiers used in the declaration.
+        code (str): The declaration's text without comments, which is what its key covers.
+    """
+    def __init__(self, start, end, keyword, keyword_end, name, identifiers, code):
+        self.start = start
+        self.end = end
+        self.keyword = keyword
+        self.keyword_end = keyword_end
+        self.name = name
+        self.identifiers = identifiers
+        self.code = code
+
+    @property
+    def verifiable(self):
+        return self.keyword in VERIFIABLE_KEYWORDS
+
+def _scan(source):
+    """
+    Scan Dafny source for identifiers outside comments, strings and character literals.
+
+    params:
+        source (str): The Dafny source code.
+
+    returns:
+        words (list): (word, start offset, end offset, brace depth) tuples, in source order.
+        comments (list): (start offset, end offset) of every comment, in source order.
+    """
+    words = []
+    comments = []
+    depth = 0
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if source.startswith("//", i):
+            newline = source.find("\n", i)
+            comments.append((i, n if newline == -1 else newline))
+            i = comments[-1][1]
+        elif source.startswith("/*", i):
+            # Block comments nest in Dafny
+            comment_start, nesting, i = i, 1, i + 2
+            while i < n and nesting:
+                if source.startswith("/*", i):
+                    nesting, i = nesting + 1, i + 2
+                elif source.startswith("*/", i):
+                    nesting, i = nesting - 1, i + 2
+                else:
+                    i += 1
+            comments.append((comment_start, i))
+        elif c == '"' or source.startswith('@"', i):
+            verbatim = c == "@"
+            i += 2 if verbatim else 1
+            while i < n:
+                if verbatim and source.startswith('""', i):
+                    i += 2
+                elif not verbatim and source[i] == "\\":
+                    i += 2
+                elif source[i] == '"':
+                    i += 1
+                    break
+                else:
+                    i += 1
+        elif c == "'" and re.match(r"'(?:\\.|[^'\\])'", source[i:i + 4]):
+            # A character literal; a quote inside an identifier (x') is consumed with the identifier
+            i = source.index("'", i + 2 if source[i + 1] == "\\" else i + 1) + 1
+        elif c == "{":
+            depth, i = depth + 1, i + 1
+        elif c == "}":
+            depth, i = max(0, depth - 1), i + 1
+        else:
+            match = IDENTIFIER_PATTERN.match(source, i) if (c.isalpha() or c in "_?") else None
+            if match:
+                words.append((match.group(), match.start(), match.end(), depth))
+                i = match.end()
+            else:
+                i += 1
+    return words, comments
+
+def split_dafny_members(source):
+    """
+    Split Dafny source into its top-level declarations. Text before the first declaration belongs to it,
+    and each declaration runs until the next one starts.
+
+    params:
+        source (str): The Dafny source code.
+
+    returns:
+        members (list): The DafnyMember objects, in source order.
+    """
+    words, comments = _scan(source)
+    starts = []                                  # (start offset, index of the keyword word)
+    in_prefix = False
+    previous = None
+    for index, (word, start, _, depth) in enumerate(words):
+        if depth != 0:
+            continue
+        if word in DECLARATION_MODIFIERS or word in DECLARATION_KEYWORDS:
+            continuing = in_prefix or (previous == "function" and word == "method")
+            if not continuing:
+                starts.append([start, None])
+            if word in DECLARATION_KEYWORDS and starts and starts[-1][1] is None:
+                starts[-1][1] = index
+            in_prefix = word in DECLARATION_MODIFIERS
+        else:
+            in_prefix = False
+        previous = word
+    if not starts:
+        return []
+    starts[0][0] = 0
+
+    members = []
+    for position, (start, keyword_index) in enumerate(starts):
+        end = starts[position + 1][0] if position + 1 < len(starts) else len(source)
+        span = [word for word in words if start <= word[1] < end]
+        keyword, keyword_end, name = None, start, None
+        if keyword_index is not None:
+            keyword, _, keyword_end, _ = words[keyword_index]
+            following = [word for word, word_start, _, depth in span if word_start >= keyword_end and depth == 0]
+            name = following[1] if following[:1] == ["method"] and keyword == "function" else next(iter(following), None)
+        code, position = [], start
+        for comment_start, comment_end in comments:
+            if start <= comment_start < end:
+                code.append(source[position:comment_start])
+                position = min(comment_end, end)
+        code.append(source[position:end])
+        members.append(DafnyMember(
+            start, end, keyword, keyword_end, name, {word for word, _, _, _ in span}, "".join(code).strip()
+        ))
+    return members
+
+@lru_cache(maxsize=None)
+def dafny_identity(dafny_path):
+    """
+    Identify a Dafny installation by its resolved path and modification time, so upgrading Dafny
+    invalidates the cached outcomes.
+
+    params:
+        dafny_path (str): The path to the Dafny executable.
+
+    returns:
+        identity (str): A string identifying the installation.
+    """
+    path = os.path.realpath(dafny_path)
+    try:
+        return f"{path}|{os.stat(path).st_mtime_ns}"
+    except OSError:
+        return path
+
+def member_keys(members, identity=""):
+    """
+    Key every member by its text and the text of the declarations it depends on, transitively.
+    Callables depend on the callables they mention by name; declarations that are not callables
+    (datatypes, classes, constants, imports, ...) are dependencies of every member.
+
+    params:
+        members (list): The members returned by split_dafny_members.
+        identity (str): The identity of the Dafny installation.
+
+    returns:
+        keys (list): The hex SHA-256 key of each member.
+    """
+    by_name = {member.name: index for index, member in enumerate(members) if member.verifiable and member.name}
+    shared = [index for index, member in enumerate(members) if not member.verifiable]
+
+    keys = []
+    for index, member in enumerate(members):
+        dependencies, pending = set(shared), [index]
+        while pending:
+            current = pending.pop()
+            if current in dependencies and current != index:
+                continue
+            dependencies.add(current)
+            pending.extend(
+                by_name[word] for word in members[current].identifiers
+                if word in by_name and by_name[word] not in dependencies
+            )
+        digest = hashlib.sha256(identity.encode("utf-8"))
+        for dependency in sorted(dependencies):
+            # Mark the member's own text, so members with the same dependency closure never share a key
+            prefix = b"self\0" if dependency == index else b"dep\0"
+            digest.update(prefix + members[dependency].code.encode("utf-8") + b"\0")
+        keys.append(digest.hexdigest())
+    return keys
+
+class MemberCache:
+    """
+    An in-memory LRU cache of per-member verification outcomes.
+
+    params:
+        max_entries (int): The maximum number of cached outcomes.
+    """
+    def __init__(self, max_entries=DAFNY_MEMBER_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            outcome = self._entries.get(key)
+            if outcome is not None:
+                self._entries.move_to_end(key)
+            return outcome
+
+    def put(self, key, outcome):
+        with self._lock:
+            self._entries[key] = outcome
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def get_member_cache():
+    """
+    Get the process-wide member outcome cache.
+
+    returns:
+        cache (MemberCache): The shared cache.
+    """
+    global _member_cache
+    with _member_cache_lock:
+        if _member_cache is None:
+            _member_cache = MemberCache()
+        return _member_cache
+
+def _line_of(source, offset):
+    return source.count("\n", 0, offset) + 1
+
+def _parse_messages(stdout):
+    """
+    Group verifier output into messages: a located first line plus the lines that follow it (related locations, snippets).
+
+    returns:
+        messages (list): (line, column, text after the location, continuation lines) tuples.
+    """
+    messages = []
+    for line in stdout.splitlines():
+        match = DAFNY_MESSAGE_PATTERN.match(line)
+        if match and not match.group("rest").startswith("Related location"):
+            messages.append((int(match.group("line")), int(match.group("column")), match.group("rest"), []))
+        elif messages and line.strip() and not DAFNY_SUMMARY_PATTERN.search(line):
+            messages[-1][3].append(line)
+    return messages
+
+def verify_incrementally(file_path, verify, identity="", cache=None):
+    """
+    Verify a Dafny file, reusing the cached outcomes of members that did not change.
+
+    params:
+        file_path (str): The path to the Dafny file.
+        verify (callable): Verifies a file path and returns a report with "stdout", "stderr" and "verification_status".
+        identity (str): The identity of the Dafny installation, part of every member key.
+        cache (MemberCache): The outcome cache; defaults to the shared cache.
+
+    returns:
+        report (dict): A report in the same shape verify returns. When members were reused, the error messages
+                       of all members are merged and the summary line notes how many members were reused.
+    """
+    cache = cache or get_member_cache()
+    with open(file_path, "r") as f:
+        source = f.read()
+    members = split_dafny_members(source)
+    keys = member_keys(members, identity)
+    reused = {
+        index: outcome for index, (member, key) in enumerate(zip(members, keys))
+        if member.verifiable and (outcome := cache.get(key)) is not None
+    }
+
+    verified_path = file_path
+    if reused:
+        # Skip unchanged members; the attribute goes on the declaration's own line, so line numbers do not move
+        pieces, position = [], 0
+        for index in sorted(reused):
+            pieces.append(source[position:members[index].keyword_end])
+            pieces.append(" {:verify false}")
+            position = members[index].keyword_end
+        pieces.append(source[position:])
+        stem, ext = os.path.splitext(file_path)
+        verified_path = f"{stem}_incremental{ext}"
+        with open(verified_path, "w") as f:
+            f.write("".join(pieces))
+        logger.info(f"Reusing {len(reused)} of {len(members)} Dafny members; verifying the rest.")
+
+    try:
+        report = verify(verified_path)
+    finally:
+        if verified_path != file_path:
+            os.remove(verified_path)
+    if verified_path != file_path:
+        report = {**report, "stdout": report.get("stdout", "").replace(verified_path, file_path)}
+    summary = DAFNY_SUMMARY_PATTERN.search(report.get("stdout", ""))
+    if summary is None:
+        # Parse or resolution errors concern the whole file, so nothing is cached or merged
+        return report
+
+    # Attribute each message to the member containing its line
+    bounds = [(_line_of(source, member.start), _line_of(source, member.end)) for member in members]
+    fresh = {index: [] for index in range(len(members)) if index not in reused}
+    for line, column, rest, continuation in _parse_messages(report["stdout"]):
+        index = next((i for i, (first, last) in enumerate(bounds) if first <= line <= last and i in fresh), None)
+        if index is not None:
+            fresh[index].append([line - bounds[index][0], column, rest, continuation])
+    for index, messages in fresh.items():
+        if members[index].verifiable and not any("timed out" in rest for _, _, rest, _ in messages):
+            cache.put(keys[index], {"messages": messages})
+
+    if not reused:
+        return report
+
+    located = []
+    for index, messages in list(fresh.items()) + [(index, outcome["messages"]) for index, outcome in reused.items()]:
+        for offset, column, rest, continuation in messages:
+            located.append((bounds[index][0] + offset, column, rest, continuation))
+    lines = []
+    errors = 0
+    for line, column, rest, continuation in sorted(located, key=lambda message: message[:2]):
+        errors += rest.startswith("Error")
+        lines.append(f"{file_path}({line},{column}): {rest}")
+        lines.extend(continuation)
+    lines.append("")
+    lines.append(
+        f"Dafny program verifier finished with {summary.group('verified')} verified, {errors} error{'s' if errors != 1 else ''}"
+        f" ({len(reused)} unchanged members reused from cache)"
+    )
+    stdout = "\n".join(lines).strip()
+    return {
+        "stdout": stdout,
+        "stderr": report.get("stderr", ""),
+        "verification_status": "success" if "Dafny program verifier finished with" in stdout else "failure"
+    }
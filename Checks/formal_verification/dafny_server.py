@@ -0,0 +1,308 @@
+#############################################################################################################################
+# Program: Checks/formal_verification/dafny_server.py                                                                       #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the client of a long-running Dafny language server ("dafny server"). Documents are     #
+# opened over the language server protocol (JSON-RPC on stdin/stdout) and verified by the resident process, so a check      #
+# does not pay .NET startup, Boogie initialization and Z3 spawning. Results have the same shape as "dafny verify" runs.     #
+#############################################################################################################################
+
+import os
+import json
+import threading
+import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+DAFNY_SERVER_TIMEOUT = 120              # Seconds a document may take to verify
+DAFNY_SERVER_START_TIMEOUT = 60         # Seconds the server may take to answer the initialize request
+DAFNY_SERVER_MAX_DOCUMENTS = 500        # Documents verified before the server is restarted to bound its memory
+DAFNY_DIAGNOSTICS_SETTLE = 0.1          # Seconds to wait for late diagnostics once every symbol has a final status
+
+# Verification statuses of the dafny/textDocument/symbolStatus notification
+SYMBOL_ERROR = 4
+SYMBOL_CORRECT = 5
+FAILED_COMPILATION_STATUSES = {"ParsingFailed": "parse", "ResolutionFailed": "resolution/type"}
+DIAGNOSTIC_SEVERITIES = {1: "Error", 2: "Warning", 3: "Info", 4: "Hint"}
+
+_dafny_servers = {}
+_dafny_servers_lock = threading.Lock()
+
+class DafnyServerError(Exception):
+    """
+    Raised when the language server cannot verify a document, so the caller can fall back to a cold run.
+    """
+
+class _Document:
+    """
+    The verification state of one open document, updated by the server's notifications.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.diagnostics = []
+        self.symbols = None                 # Statuses of the document's verifiable symbols, once resolved
+        self.failed_stage = None            # "parse" or "resolution/type" if the document never reached verification
+        self.changed = threading.Condition()
+
+    def finished(self):
+        if self.failed_stage is not None:
+            return True
+        return self.symbols is not None and all(status in (SYMBOL_ERROR, SYMBOL_CORRECT) for status in self.symbols)
+
+class DafnyServer:
+    """
+    A resident "dafny server" process. Several documents may be verified at once; each is opened,
+    awaited and closed independently.
+
+    params:
+        dafny_path (str): The path to the Dafny executable.
+        timeout (float): Seconds a document may take to verify.
+        max_documents (int): Documents verified before the process is restarted.
+    """
+    def __init__(self, dafny_path, timeout=DAFNY_SERVER_TIMEOUT, max_documents=DAFNY_SERVER_MAX_DOCUMENTS):
+        self.dafny_path = dafny_path
+        self.timeout = timeout
+        self.max_documents = max_documents
+        self.process = None
+        self._start_lock = threading.Lock()     # Guards starting and stopping the process
+        self._lock = threading.Lock()           # Guards the request and document tables
+        self._write_lock = threading.Lock()
+        self._next_id = 0
+        self._pending = {}                      # Request id -> Future of its response
+        self._documents = {}                    # URI -> _Document
+        self._served = 0
+
+    def _send(self, message):
+        payload = json.dumps(message).encode("utf-8")
+        process = self.process
+        if process is None:
+            raise DafnyServerError("Dafny server is not running")
+        with self._write_lock:
+            process.stdin.write(f"Content-Length: {len(payload)}\r\n\r\n".encode("ascii") + payload)
+            process.stdin.flush()
+
+    def _request(self, method, params, timeout):
+        future = Future()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise DafnyServerError(f"Dafny server did not answer {method} within {timeout} seconds")
+
+    def _notify(self, method, params):
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _read_messages(self, process):
+        stdout = process.stdout
+        try:
+            while True:
+                headers = {}
+                line = stdout.readline()
+                while line and line.strip():
+                    name, _, value = line.decode("ascii").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                    line = stdout.readline()
+                if not line:
+                    break
+                self._dispatch(json.loads(stdout.read(int(headers["content-length"]))))
+        except Exception as e:
+            logger.error(f"Dafny server connection failed: {e}")
+        finally:
+            self._on_exit(process)
+
+    def _dispatch(self, message):
+        method = message.get("method")
+        if method is None:
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+            if future is not None:
+                future.set_result(message.get("result"))
+            return
+        if "id" in message:
+            # Requests from the server (e.g. capability registration) need an answer but no action
+            self._send({"jsonrpc": "2.0", "id": message["id"], "result": None})
+            return
+
+        params = message.get("params") or {}
+        with self._lock:
+            document = self._documents.get(params.get("uri") or params.get("textDocument", {}).get("uri"))
+        if document is None:
+            return
+        with document.changed:
+            if method == "textDocument/publishDiagnostics":
+                document.diagnostics = params.get("diagnostics", [])
+            elif method == "dafny/textDocument/symbolStatus":
+                document.symbols = [symbol["status"] for symbol in params.get("namedVerifiables", [])]
+            elif method == "dafny/compilation/status" and params.get("status") in FAILED_COMPILATION_STATUSES:
+                document.failed_stage = FAILED_COMPILATION_STATUSES[params["status"]]
+            document.changed.notify_all()
+
+    def _on_exit(self, process):
+        with self._lock:
+            if self.process is not None and self.process is not process:
+                return                              # An old process that was already replaced
+            self.process = None
+            pending, self._pending = self._pending, {}
+            documents = list(self._documents.values())
+        for future in pending.values():
+            future.set_exception(DafnyServerError("Dafny server exited"))
+        for document in documents:
+            with document.changed:
+                document.changed.notify_all()
+
+    def _start(self):
+        logger.info("Starting Dafny language server.")
+        process = subprocess.Popen(
+            [self.dafny_path, "server"],
+            stdin = subprocess.PIPE,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.DEVNULL
+        )
+        self.process = process
+        self._served = 0
+        threading.Thread(target=self._read_messages, args=(process,), name="dafny-server-reader", daemon=True).start()
+        self._request("initialize", {"processId": os.getpid(), "rootUri": None, "capabilities": {}}, DAFNY_SERVER_START_TIMEOUT)
+        self._notify("initialized", {})
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self.process is not None and self.process.poll() is None:
+                with self._lock:
+                    recycle = self._served >= self.max_documents and not self._documents
+                if not recycle:
+                    return
+                logger.info(f"Recycling Dafny server after {self._served} documents.")
+                self._kill()
+            try:
+                self._start()
+            except Exception:
+                self._kill()
+                raise
+
+    def _kill(self):
+        process, self.process = self.process, None
+        if process is not None:
+            process.kill()
+            process.wait()
+
+    def start(self):
+        """
+        Start the server process ahead of the first document, if it is not running.
+        """
+        self._ensure_started()
+
+    def stop(self):
+        """
+        Stop the server process.
+        """
+        with self._start_lock:
+            self._kill()
+
+    def verify(self, file_path):
+        """
+        Verify a Dafny file on the resident server.
+
+        params:
+            file_path (str): The path to the Dafny file.
+
+        returns:
+            report (dict): A dictionary with "stdout", "stderr" and "verification_status", as run_dafny_code returns.
+
+        exceptions:
+            DafnyServerError: If the server cannot be started or stops answering.
+        """
+        with open(file_path, "r") as f:
+            text = f.read()
+        uri = "file://" + os.path.abspath(file_path)
+        document = _Document(file_path)
+
+        self._ensure_started()
+        with self._lock:
+            if uri in self._documents:
+                raise DafnyServerError(f"{file_path} is already being verified")
+            self._documents[uri] = document
+            self._served += 1
+            process = self.process
+        try:
+            try:
+                self._notify("textDocument/didOpen", {
+                    "textDocument": {"uri": uri, "languageId": "dafny", "version": 1, "text": text}
+                })
+            except (OSError, ValueError) as e:
+                raise DafnyServerError(f"Failed to send {file_path} to the Dafny server: {e}")
+            with document.changed:
+                if not document.changed.wait_for(lambda: document.finished() or self.process is not process, self.timeout):
+                    logger.error(f"Dafny server did not verify {file_path} within {self.timeout} seconds; restarting it.")
+                    self.stop()
+                    return {"stdout": "", "stderr": f"Verification timed out after {self.timeout} seconds", "verification_status": "failure"}
+                if self.process is not process:
+                    raise DafnyServerError("Dafny server exited during verification")
+                # Diagnostics and symbol statuses are separate notifications; give the last diagnostics a moment to arrive
+                document.changed.wait(DAFNY_DIAGNOSTICS_SETTLE)
+        finally:
+            with self._lock:
+                del self._documents[uri]
+            try:
+                if self.process is process:
+                    self._notify("textDocument/didClose", {"textDocument": {"uri": uri}})
+            except (OSError, ValueError):
+                pass
+
+        return format_report(document)
+
+def format_report(document):
+    """
+    Render the state of a verified document the way "dafny verify" prints its results.
+
+    params:
+        document (_Document): The verified document.
+
+    returns:
+        report (dict): A dictionary with "stdout", "stderr" and "verification_status".
+    """
+    lines = []
+    errors = 0
+    for diagnostic in document.diagnostics:
+        start = diagnostic["range"]["start"]
+        severity = DIAGNOSTIC_SEVERITIES.get(diagnostic.get("severity", 1), "Error")
+        errors += severity == "Error"
+        lines.append(f"{document.path}({start['line'] + 1},{start['character'] + 1}): {severity}: {diagnostic['message']}")
+
+    name = os.path.basename(document.path)
+    if document.failed_stage is not None:
+        lines.append(f"{errors} {document.failed_stage} errors detected in {name}")
+    else:
+        verified = sum(1 for status in document.symbols if status == SYMBOL_CORRECT)
+        lines.append("")
+        lines.append(f"Dafny program verifier finished with {verified} verified, {errors} error{'s' if errors != 1 else ''}")
+    stdout = "\n".join(lines).strip()
+
+    return {
+        "stdout": stdout,
+        "stderr": "",
+        "verification_status": "success" if "Dafny program verifier finished with" in stdout else "failure"
+    }
+
+def get_dafny_server(dafny_path):
+    """
+    Get the process-wide language server of a Dafny executable.
+
+    params:
+        dafny_path (str): The path to the Dafny executable.
+
+    returns:
+        server (DafnyServer): The shared server; its process starts on first use.
+    """
+    with _dafny_servers_lock:
+        if dafny_path not in _dafny_servers:
+            _dafny_servers[dafny_path] = DafnyServer(dafny_path)
+        return _dafny_servers[dafny_path]
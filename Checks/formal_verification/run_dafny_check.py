@@ -9,25 +9,51 @@
 
 import subprocess
 from logs import setup_logger
+from Checks.formal_verification.dafny_server import get_dafny_server
+from Checks.formal_verification.dafny_incremental import dafny_identity, verify_incrementally
 
 # Set up logger
 logger = setup_logger()
 
-def run_dafny_code(file_path):
+DAFNY_PATH = "path to dafny"                    # Path to the Dafny executable; replace with your path
+DAFNY_SERVER = True                             # Verify on a resident Dafny language server instead of a cold process
+DAFNY_INCREMENTAL = True                        # Reuse cached outcomes of unchanged members and verify only the changed ones
+
+def run_dafny_code(file_path, use_server=None, incremental=None):
     """
     Run Dafny code from a file, check for verification, and save output to JSON file.
 
     params:
         file_path (str): The path to the Dafny code file to run Dafny on.
+        use_server (bool): Whether to verify on the resident language server; defaults to DAFNY_SERVER.
+                           A cold "dafny verify" run is used if the server is unavailable.
+        incremental (bool): Whether to reuse the cached outcomes of unchanged members; defaults to DAFNY_INCREMENTAL.
 
     returns:
         report (dict): A dictionary containing the Dafny verification report.
     """
     if not file_path:
         return {"error": "No file path provided for Dafny code analysis"}
+
+    if DAFNY_INCREMENTAL if incremental is None else incremental:
+        return verify_incrementally(
+            file_path,
+            lambda path: _verify_file(path, use_server),
+            identity = dafny_identity(DAFNY_PATH)
+        )
+    return _verify_file(file_path, use_server)
+
+def _verify_file(file_path, use_server):
+    if DAFNY_SERVER if use_server is None else use_server:
+        try:
+            report = get_dafny_server(DAFNY_PATH).verify(file_path)
+            logger.info("Dafny verification completed on the language server.")
+            return report
+        except Exception as e:
+            logger.error(f"Dafny language server unavailable, falling back to a cold run: {e}")
     
     result = subprocess.run(
-        ["path to dafny", "verify", file_path],
+        [DAFNY_PATH, "verify", file_path],
         capture_output = True,
         text = True
     )
@@ -0,0 +1,38 @@
+#############################################################################################################################
+# Program: Checks/lazy_exports.py                                                                                           #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the lazy exports of the checker packages. A package lists the names it re-exports      #
+# per module, and each module is imported on the first access to one of its names, so importing a package, or one of its    #
+# modules, does not import its heavy siblings and their dependencies.                                                       #
+#############################################################################################################################
+
+import importlib
+
+def lazy_exports(package, exports):
+    """
+    Build the module-level __getattr__ and __dir__ of a package whose re-exports are imported on first access.
+
+    params:
+        package (str): The name of the package, i.e. its __name__.
+        exports (dict): Module name -> names the package re-exports from it.
+
+    returns:
+        __getattr__ (function): Imports the module of an exported name and caches the name in the package.
+        __dir__ (function): Lists the package's attributes with the exported names.
+    """
+    modules = {name: module for module, names in exports.items() for name in names}
+
+    def __getattr__(name):
+        if name not in modules:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(modules[name]), name)
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(importlib.import_module(package))) | set(modules))
+
+    return __getattr__, __dir__
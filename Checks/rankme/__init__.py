@@ -7,29 +7,32 @@
 # Description: This program contains the initialization code for the RankMe package.                                        #                                                                                                 
 #############################################################################################################################
 
-from logs import setup_logger
-from Checks.rankme.rankme import (
-    preprocess_text,
-    filter_tokens,
-    compute_entropy,
-    compute_text_entropy,
-    compute_svd_complexity,
-    compute_rankme_score,
-)
+from Checks.lazy_exports import lazy_exports
 
-# Set up app_logger
-app_logger = setup_logger()
+# Names re-exported per module; a module is imported when one of its names is first used
+_EXPORTS = {
+    "Checks.rankme.rankme": [
+        "preprocess_text",
+        "filter_tokens",
+        "compute_entropy",
+        "compute_text_entropy",
+        "compute_svd_complexity",
+        "compute_rankme_score",
+        "compute_rankme_scores",
+        "compute_rankme_score_streaming",
+    ],
+    "Checks.rankme.engine": [
+        "tokenize_segments",
+        "count_matrix",
+        "segment_entropies",
+        "top_singular_value",
+        "rankme_statistics",
+        "rankme_score",
+        "rankme_scores",
+    ],
+    "Checks.rankme.streaming": ["iter_segments", "GramSketch", "StreamingRankMe", "streaming_rankme_score"],
+}
 
 # Expose the primary functions for external usage
-__all__ = [
-    "preprocess_text",
-    "filter_tokens",
-    "compute_entropy",
-    "compute_text_entropy",
-    "compute_svd_complexity",
-    "compute_rankme_score",
-]
-
-# Log package initialization using app_logger
-app_logger.info("RankMe package initialized.")
-
+__all__ = [name for names in _EXPORTS.values() for name in names]
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,241 @@
+#############################################################################################################################
+# Program: Checks/rankme/engine.py                                                                                          #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the RankMe engine. One pass over the segments builds the sparse segment-token count    #
+# matrix and the token ids of the entropy, the leading singular value comes from power iteration on the sparse matrix, and  #
+# all segment entropies are computed at once with NumPy. Scores match the scikit-learn implementation in rankme.py within   #
+# RANKME_SCORE_TOLERANCE (relative), the accuracy of its randomized TruncatedSVD. Batches of candidates share one           #
+# vocabulary and are tokenized block by block into one count matrix, whose row ranges are scored per candidate.             #
+#############################################################################################################################
+
+import re
+from itertools import chain
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import svds
+
+RANKME_TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")     # CountVectorizer's default tokens, after lowercasing
+RANKME_TOLERANCE = 1e-12                                # Relative eigenvalue change at which power iteration stops
+RANKME_MAX_ITERATIONS = 500                             # Power iterations before falling back to Lanczos (ARPACK)
+RANKME_DENSE_LIMIT = 256                                # Largest Gram matrix side solved exactly with a dense eigensolver
+RANKME_SCORE_TOLERANCE = 1e-6                           # Relative score difference to the scikit-learn implementation
+RANKME_BLOCK_SEGMENTS = 65536                           # Segments tokenized and held in memory at once when batching
+RANKME_DENSE_CELLS = 1 << 20                            # Largest batched candidate matrix scored as a dense array
+
+def _token_ids(token_lists, vocabulary):
+    # Rows and vocabulary ids of the tokens of all segments; only unique tokens are visited in Python
+    tokens = list(chain.from_iterable(token_lists))
+    for token in dict.fromkeys(tokens):
+        if token not in vocabulary:
+            vocabulary[token] = len(vocabulary)
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+    return rows, np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+
+def tokenize_segments(texts, svd_vocabulary=None, entropy_vocabulary=None):
+    """
+    Tokenize the segments in one pass, both for the count matrix and for the entropy.
+
+    params:
+        texts (list): The segments.
+        svd_vocabulary (dict): Token -> column of the count matrix; extended with new tokens. Defaults to a new dict.
+        entropy_vocabulary (dict): Token -> id of the entropy tokens; extended with new tokens. Defaults to a new dict.
+
+    returns:
+        svd_rows (np.ndarray): The segment of every count matrix token.
+        svd_columns (np.ndarray): The column of every count matrix token.
+        entropy_rows (np.ndarray): The segment of every entropy token.
+        entropy_tokens (np.ndarray): The id of every entropy token.
+    """
+    svd_vocabulary = {} if svd_vocabulary is None else svd_vocabulary
+    entropy_vocabulary = {} if entropy_vocabulary is None else entropy_vocabulary
+    svd_tokens, entropy_tokens = [], []
+    for text in texts:
+        # The count matrix uses CountVectorizer's tokens, the entropy the alphanumeric words of filter_tokens
+        svd_tokens.append(RANKME_TOKEN_PATTERN.findall(text.lower()))
+        entropy_tokens.append([token for token in text.split() if token.isalnum() and len(token) > 1])
+    return (*_token_ids(svd_tokens, svd_vocabulary), *_token_ids(entropy_tokens, entropy_vocabulary))
+
+def count_matrix(rows, columns, shape):
+    """
+    Build the sparse segment-token count matrix.
+
+    params:
+        rows (np.ndarray): The segment of every token.
+        columns (np.ndarray): The column of every token.
+        shape (tuple): The number of segments and of columns.
+
+    returns:
+        matrix (scipy.sparse.csr_matrix): The counts; repeated tokens are summed.
+    """
+    return sp.csr_matrix((np.ones(len(rows), dtype=np.float64), (rows, columns)), shape=shape)
+
+def segment_entropies(rows, tokens, n_segments):
+    """
+    Compute the token entropy of every segment at once.
+
+    params:
+        rows (np.ndarray): The segment of every token.
+        tokens (np.ndarray): The id of every token.
+        n_segments (int): The number of segments.
+
+    returns:
+        entropies (np.ndarray): The entropy of every segment.
+        has_tokens (np.ndarray): Whether each segment has any token; segments without tokens have no entropy.
+    """
+    if len(tokens) == 0:
+        return np.zeros(n_segments), np.zeros(n_segments, dtype=bool)
+    width = int(tokens.max()) + 1
+    pairs, counts = np.unique(rows * width + tokens, return_counts=True)
+    pair_rows = pairs // width
+    totals = np.bincount(pair_rows, weights=counts, minlength=n_segments)
+    probabilities = counts / totals[pair_rows]
+    entropies = -np.bincount(pair_rows, weights=probabilities * np.log(probabilities), minlength=n_segments)
+    return entropies, totals > 0
+
+def top_singular_value(matrix, tolerance=RANKME_TOLERANCE, max_iterations=RANKME_MAX_ITERATIONS):
+    """
+    Compute the leading singular value of a sparse non-negative matrix from its smaller Gram matrix G, whose
+    largest eigenvalue is its square. A small G is solved exactly; a larger one by power iteration, which
+    converges from the all-ones start vector because a non-negative matrix has a non-negative leading singular
+    vector. If the two leading singular values are too close to converge, Lanczos iteration (ARPACK) takes over.
+
+    params:
+        matrix (scipy.sparse.spmatrix): The matrix.
+        tolerance (float): The relative change of the eigenvalue estimate at which power iteration stops.
+        max_iterations (int): The power iterations before falling back to Lanczos iteration.
+
+    returns:
+        singular_value (float): The leading singular value.
+    """
+    if matrix.nnz == 0:
+        return 0.0
+    if matrix.shape[0] > matrix.shape[1]:
+        matrix = matrix.T
+    matrix = sp.csr_matrix(matrix)
+    gram = matrix @ matrix.T
+    if gram.shape[0] <= RANKME_DENSE_LIMIT:
+        return float(np.sqrt(max(np.linalg.eigvalsh(gram.toarray())[-1], 0.0)))
+
+    vector = np.full(gram.shape[0], 1 / np.sqrt(gram.shape[0]))
+    eigenvalue = 0.0
+    for _ in range(max_iterations):
+        product = gram @ vector
+        estimate = float(vector @ product)              # Rayleigh quotient
+        vector = product / np.linalg.norm(product)
+        if abs(estimate - eigenvalue) <= tolerance * estimate:
+            return float(np.sqrt(estimate))
+        eigenvalue = estimate
+    return float(svds(matrix, k=1, return_singular_vectors=False, v0=vector)[0])
+
+def rankme_statistics(texts):
+    """
+    Compute the average segment entropy and the leading singular value of the segment-token count matrix.
+
+    params:
+        texts (list): The segments.
+
+    returns:
+        avg_entropy (float): The average entropy of the segments with tokens, or 0 if there are none.
+        complexity (float): The leading singular value of the count matrix.
+
+    exceptions:
+        ValueError: If the segments contain no tokens of two or more characters.
+    """
+    svd_vocabulary = {}
+    svd_rows, svd_columns, entropy_rows, entropy_tokens = tokenize_segments(texts, svd_vocabulary)
+    if not svd_vocabulary:
+        raise ValueError("Input matrix for SVD is empty.")
+    matrix = count_matrix(svd_rows, svd_columns, (len(texts), len(svd_vocabulary)))
+    entropies, has_tokens = segment_entropies(entropy_rows, entropy_tokens, len(texts))
+    avg_entropy = float(entropies[has_tokens].mean()) if has_tokens.any() else 0.0
+    return avg_entropy, top_singular_value(matrix)
+
+def rankme_score(texts):
+    """
+    Compute the RankMe score, exp(average segment entropy) times the leading singular value.
+
+    params:
+        texts (list): The segments.
+
+    returns:
+        rankme_score (float): The RankMe score, or 0 for no segments.
+
+    exceptions:
+        ValueError: If the segments contain no tokens of two or more characters.
+    """
+    if texts is None or len(texts) == 0:
+        return 0
+    avg_entropy, complexity = rankme_statistics(texts)
+    return float(np.exp(avg_entropy) * complexity)
+
+def _candidate_blocks(candidates, block_segments):
+    # Consecutive candidates with at most block_segments segments together; a larger candidate is a block of its own
+    block, size = [], 0
+    for candidate in candidates:
+        if block and size + len(candidate) > block_segments:
+            yield block
+            block, size = [], 0
+        block.append(candidate)
+        size += len(candidate)
+    if block:
+        yield block
+
+def _candidate_singular_value(matrix, first, last):
+    # Leading singular value of rows first..last of the block matrix, on the candidate's own columns only;
+    # small candidates skip the sparse matrix machinery, whose overhead would dominate their cost
+    start, end = matrix.indptr[first], matrix.indptr[last]
+    columns, local_columns = np.unique(matrix.indices[start:end], return_inverse=True)
+    n_rows = last - first
+    if n_rows * len(columns) > RANKME_DENSE_CELLS or min(n_rows, len(columns)) > RANKME_DENSE_LIMIT:
+        return top_singular_value(matrix[first:last, columns])
+    dense = np.zeros((n_rows, len(columns)))
+    local_rows = np.repeat(np.arange(n_rows), np.diff(matrix.indptr[first:last + 1]))
+    dense[local_rows, local_columns] = matrix.data[start:end]
+    gram = dense @ dense.T if n_rows <= len(columns) else dense.T @ dense
+    return float(np.sqrt(max(np.linalg.eigvalsh(gram)[-1], 0.0)))
+
+def rankme_scores(candidates, block_segments=RANKME_BLOCK_SEGMENTS):
+    """
+    Compute the RankMe scores of many candidates. All candidates share one vocabulary, and each block of
+    candidates is tokenized in one pass into one count matrix whose row ranges are the candidates' matrices,
+    so memory is bounded by the block size however many candidates there are.
+
+    params:
+        candidates (iterable): The candidates, each a list of segments as preprocess_text returns it.
+        block_segments (int): The segments processed at once.
+
+    returns:
+        scores (list): The RankMe score of every candidate, in order; 0 for a candidate without segments and
+                       None for one whose segments contain no tokens of two or more characters.
+    """
+    svd_vocabulary, entropy_vocabulary = {}, {}
+    scores = []
+    for block in _candidate_blocks(candidates, block_segments):
+        texts = list(chain.from_iterable(block))
+        sizes = np.array([len(candidate) for candidate in block], dtype=np.int64)
+        svd_rows, svd_columns, entropy_rows, entropy_tokens = tokenize_segments(texts, svd_vocabulary, entropy_vocabulary)
+        matrix = count_matrix(svd_rows, svd_columns, (len(texts), len(svd_vocabulary)))
+
+        # Average the entropies of the segments with tokens per candidate
+        entropies, has_tokens = segment_entropies(entropy_rows, entropy_tokens, len(texts))
+        owners = np.repeat(np.arange(len(block)), sizes)
+        entropy_sums = np.bincount(owners, weights=np.where(has_tokens, entropies, 0.0), minlength=len(block))
+        entropy_counts = np.bincount(owners, weights=has_tokens, minlength=len(block))
+        averages = np.divide(entropy_sums, entropy_counts, out=np.zeros(len(block)), where=entropy_counts > 0)
+
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        for i in range(len(block)):
+            if sizes[i] == 0:
+                scores.append(0)
+                continue
+            if matrix.indptr[bounds[i]] == matrix.indptr[bounds[i + 1]]:
+                scores.append(None)
+                continue
+            complexity = _candidate_singular_value(matrix, bounds[i], bounds[i + 1])
+            scores.append(float(np.exp(averages[i]) * complexity))
+    return scores
+
@@ -7,12 +7,13 @@
 # Description: This program contains the RankMe code for computing the RankMe score. The ideas is taken from the SSL.       #                                                                                                 
 #############################################################################################################################
 
-from collections import Counter
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.decomposition import TruncatedSVD
 import numpy as np
 import re
 from logs import setup_logger
+from Checks.rankme.engine import (
+    tokenize_segments, count_matrix, segment_entropies, top_singular_value, rankme_score, rankme_scores
+)
+from Checks.rankme.streaming import streaming_rankme_score
 
 # Set up app_logger
 app_logger = setup_logger()
@@ -51,11 +52,12 @@ def compute_entropy(token_counts):
     returns:
         entropy (float): The entropy of the text.
     """
-    total_tokens = sum(token_counts.values())
-    if total_tokens == 0:
+    counts = np.fromiter(token_counts.values(), dtype=np.float64, count=len(token_counts))
+    counts = counts[counts > 0]
+    if counts.size == 0:
         return 0
-    probabilities = [count / total_tokens for count in token_counts.values()]
-    return -sum(p * np.log(p) for p in probabilities if p > 0)
+    probabilities = counts / counts.sum()
+    return -np.sum(probabilities * np.log(probabilities))
 
 def compute_text_entropy(texts):
     """
@@ -67,21 +69,15 @@ def compute_text_entropy(texts):
     returns:
         avg_entropy (float): The average entropy of the texts.
     """
-    entropies = []
-    for text in texts:
-        tokens = filter_tokens(text.split())
-        token_counts = Counter(tokens)
-        if not token_counts:
-            continue
-        entropy = compute_entropy(token_counts)
-        entropies.append(entropy)
-    if not entropies:
+    _, _, rows, tokens = tokenize_segments(texts)
+    entropies, has_tokens = segment_entropies(rows, tokens, len(texts))
+    if not has_tokens.any():
         return 0
-    return np.mean(entropies)
+    return np.mean(entropies[has_tokens])
 
 def compute_svd_complexity(texts):
     """
-    Computes the complexity of the texts using SVD.
+    Computes the complexity of the texts, the leading singular value of their segment-token count matrix.
 
     params:
         texts (list): A list of texts to compute complexity for.
@@ -91,17 +87,15 @@ def compute_svd_complexity(texts):
     """
     if not texts or all(len(t.strip()) == 0 for t in texts):
         raise ValueError("Input texts are empty or invalid.")
-    vectorizer = CountVectorizer(stop_words=None)
-    X = vectorizer.fit_transform(texts)
-    if X.shape[0] == 0 or X.shape[1] == 0:
+    vocabulary = {}
+    rows, columns, _, _ = tokenize_segments(texts, vocabulary)
+    if not vocabulary:
         raise ValueError("Input matrix for SVD is empty.")
-    svd = TruncatedSVD(n_components=1)
-    svd.fit(X)
-    return svd.singular_values_[0]
+    return top_singular_value(count_matrix(rows, columns, (len(texts), len(vocabulary))))
 
 def compute_rankme_score(texts):
     """
-    Computes the RankMe score based on entropy and complexity.  
+    Computes the RankMe score based on entropy and complexity, tokenizing the texts once for both.  
 
     params:
         texts (list): A list of texts to compute RankMe score for.
@@ -109,8 +103,32 @@ def compute_rankme_score(texts):
     returns:
         rankme_score (float): The RankMe score.  
     """
-    if texts is None or len(texts) == 0:
-        return 0
-    avg_entropy = compute_text_entropy(texts)
-    complexity = compute_svd_complexity(texts)
-    return np.exp(avg_entropy) * complexity
\ No newline at end of file
+    if texts is not None and len(texts) > 0 and all(len(t.strip()) == 0 for t in texts):
+        raise ValueError("Input texts are empty or invalid.")
+    return rankme_score(texts)
+
+def compute_rankme_scores(candidates):
+    """
+    Computes the RankMe scores of many candidates at once, sharing one vocabulary and one tokenization pass
+    per block of candidates.
+
+    params:
+        candidates (list): The candidates, each a list of texts as preprocess_text returns it.
+
+    returns:
+        rankme_scores (list): The RankMe score of every candidate, or None for a candidate without tokens.
+    """
+    return rankme_scores(candidates)
+
+def compute_rankme_score_streaming(source):
+    """
+    Computes the RankMe score of a very large text in constant memory, walking its segments lazily with
+    hashed tokens and a sketch of the leading singular value.
+
+    params:
+        source (str | file): The text, or a text file object to read it from.
+
+    returns:
+        rankme_score (float): The approximate RankMe score.
+    """
+    return streaming_rankme_score(source)
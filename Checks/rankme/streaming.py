@@ -0,0 +1,211 @@
+#############################################################################################################################
+# Program: Checks/rankme/streaming.py                                                                                       #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the streaming RankMe mode for very large submissions. Segments are read lazily from    #
+# the text, a file or chunks of text, and processed a bounded block at a time: segment entropies are kept as a running      #
+# sum, and tokens are hashed with random signs into a fixed number of columns whose Gram matrix is accumulated, a sketch    #
+# that keeps the leading singular value. Memory stays constant however large the input is, apart from the longest segment.  #
+#############################################################################################################################
+
+import re
+import zlib
+from itertools import islice
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh
+from Checks.rankme.engine import tokenize_segments, segment_entropies, RANKME_DENSE_LIMIT
+
+RANKME_HASH_FEATURES = 1 << 10          # Signed hash columns; their Gram matrix takes 8 MiB
+RANKME_STREAM_BLOCK = 512               # Segments tokenized and added to the sketch at a time
+RANKME_STREAM_CHUNK = 64 * 1024         # Characters read from a file at a time
+RANKME_STREAMING_CHARS = 1024**2        # Submissions longer than this are scored in streaming mode
+
+SEGMENT_SEPARATOR = re.compile(r"[;\n]")
+SEGMENT_PATTERN = re.compile(r"[^;\n]+")
+
+def iter_segments(source, chunk_size=RANKME_STREAM_CHUNK):
+    """
+    Yield the segments of a text one at a time, as preprocess_text splits them, without building their list.
+
+    params:
+        source (str | file | iterable): The text, a text file object, or an iterable of text chunks.
+        chunk_size (int): The characters read from a file object at a time.
+
+    returns:
+        segments (generator): The stripped, non-empty segments.
+    """
+    if isinstance(source, str):
+        for match in SEGMENT_PATTERN.finditer(source):
+            segment = match.group().strip()
+            if segment:
+                yield segment
+        return
+
+    chunks = iter(lambda: source.read(chunk_size), "") if hasattr(source, "read") else source
+    pending = []                        # Pieces of the segment that continues into the next chunk
+    for chunk in chunks:
+        parts = SEGMENT_SEPARATOR.split(chunk)
+        if len(parts) == 1:
+            pending.append(chunk)
+            continue
+        parts[0] = "".join(pending) + parts[0]
+        pending = [parts.pop()]
+        for part in parts:
+            segment = part.strip()
+            if segment:
+                yield segment
+    segment = "".join(pending).strip()
+    if segment:
+        yield segment
+
+def hashed_columns(tokens, width=RANKME_HASH_FEATURES):
+    """
+    Hash tokens into signed columns, the CountSketch of the token columns. CRC32 is used instead of hash(),
+    which changes between processes; its low bits pick the column and its top bit the sign.
+
+    params:
+        tokens (iterable): The tokens.
+        width (int): The number of columns.
+
+    returns:
+        columns (np.ndarray): The column of every token.
+        signs (np.ndarray): The sign, 1.0 or -1.0, of every token.
+    """
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.int64)
+    return hashes % width, np.where(hashes >> 31, -1.0, 1.0)
+
+class GramSketch:
+    """
+    Gram matrix of the signed hashed segment-token count matrix, accumulated a block of rows at a time.
+    Collisions of tokens with opposite signs cancel in expectation, so the leading singular value of the
+    hashed matrix estimates the exact one; its memory is width * width floats however many rows are added.
+    """
+
+    def __init__(self, width=RANKME_HASH_FEATURES):
+        """
+        Start an empty sketch.
+
+        params:
+            width (int): The number of hashed columns.
+        """
+        self.gram = np.zeros((width, width))
+
+    def update(self, block):
+        """
+        Add a block of rows.
+
+        params:
+            block (scipy.sparse.csr_matrix): The rows, width columns wide.
+        """
+        product = (block.T @ block).tocoo()            # Sparse: only pairs of tokens that share a segment
+        self.gram[product.row, product.col] += product.data
+
+    def singular_value(self):
+        """
+        returns:
+            singular_value (float): The leading singular value of the hashed matrix.
+        """
+        used = np.flatnonzero(np.diagonal(self.gram))
+        if len(used) == 0:
+            return 0.0
+        gram = self.gram if len(used) == len(self.gram) else self.gram[np.ix_(used, used)]
+        if len(used) <= RANKME_DENSE_LIMIT:
+            eigenvalue = np.linalg.eigvalsh(gram)[-1]
+        else:
+            eigenvalue = eigsh(gram, k=1, return_eigenvectors=False, v0=np.ones(len(used)))[0]
+        return float(np.sqrt(max(eigenvalue, 0.0)))
+
+class StreamingRankMe:
+    """
+    Running RankMe statistics of a stream of segments: the entropy sum and count of the segments with
+    tokens, and the Gram sketch of the hashed segment-token count matrix.
+    """
+
+    def __init__(self, width=RANKME_HASH_FEATURES, block_segments=RANKME_STREAM_BLOCK):
+        """
+        Start empty statistics.
+
+        params:
+            width (int): The columns the tokens are hashed into.
+            block_segments (int): The segments processed at a time.
+        """
+        self.width = width
+        self.block_segments = block_segments
+        self.sketch = GramSketch(width)
+        self.segments = 0
+        self.entropy_sum = 0.0
+        self.entropy_count = 0
+        self.has_tokens = False
+
+    def add_block(self, texts):
+        """
+        Add a block of segments. Its vocabularies are discarded afterwards, so memory does not grow.
+
+        params:
+            texts (list): The segments.
+        """
+        svd_vocabulary = {}
+        svd_rows, svd_columns, entropy_rows, entropy_tokens = tokenize_segments(texts, svd_vocabulary)
+        entropies, has_tokens = segment_entropies(entropy_rows, entropy_tokens, len(texts))
+        self.segments += len(texts)
+        self.entropy_sum += float(entropies[has_tokens].sum())
+        self.entropy_count += int(has_tokens.sum())
+        if svd_vocabulary:
+            self.has_tokens = True
+            columns, signs = hashed_columns(svd_vocabulary, self.width)
+            block = sp.csr_matrix(
+                (signs[svd_columns], (svd_rows, columns[svd_columns])), shape=(len(texts), self.width)
+            )
+            self.sketch.update(block)
+
+    def add_segments(self, segments):
+        """
+        Add segments from an iterable, a block at a time.
+
+        params:
+            segments (iterable): The segments.
+        """
+        segments = iter(segments)
+        while True:
+            block = list(islice(segments, self.block_segments))
+            if not block:
+                return
+            self.add_block(block)
+
+    def score(self):
+        """
+        Compute the RankMe score of the segments added so far.
+
+        returns:
+            rankme_score (float): exp(average segment entropy) times the sketched leading singular value, or 0
+                                  for no segments.
+
+        exceptions:
+            ValueError: If the segments contain no tokens of two or more characters.
+        """
+        if self.segments == 0:
+            return 0
+        if not self.has_tokens:
+            raise ValueError("Input matrix for SVD is empty.")
+        avg_entropy = self.entropy_sum / self.entropy_count if self.entropy_count else 0.0
+        return float(np.exp(avg_entropy) * self.sketch.singular_value())
+
+def streaming_rankme_score(source):
+    """
+    Compute the RankMe score of a text in constant memory.
+
+    params:
+        source (str | file | iterable): The text, a text file object, or an iterable of text chunks.
+
+    returns:
+        rankme_score (float): The approximate RankMe score, or 0 for no segments.
+
+    exceptions:
+        ValueError: If the segments contain no tokens of two or more characters.
+    """
+    statistics = StreamingRankMe()
+    statistics.add_segments(iter_segments(source))
+    return statistics.score()
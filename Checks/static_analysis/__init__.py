@@ -7,34 +7,36 @@
 # Description: This program contains the initialization code for the Static Analysis package.                               #                                                                                                 
 #############################################################################################################################
 
-from logs import setup_logger
-from Checks.static_analysis.run_clangtidy_check import run_clang_tidy
-from Checks.static_analysis.run_py_check import (
-    run_mypy,
-    run_pylint,
-    run_bandit,
-    run_pystatic_analysis,
-    save_analysis_results,
-)
-from Checks.static_analysis.run_sonarqube_check import (
-    run_sonar_scanner,
-    fetch_detailed_report,
-    save_report,
-)
+from Checks.lazy_exports import lazy_exports
 
-# Expose the primary functions for external usage
-__all__ = [
-    "run_clang_tidy",
-    "run_mypy",
-    "run_pylint",
-    "run_bandit",
-    "run_pystatic_analysis",
-    "save_analysis_results",
-    "run_sonar_scanner",
-    "fetch_detailed_report",
-    "save_report",
-]
+# Names re-exported per module; a module is imported when one of its names is first used
+_EXPORTS = {
+    "Checks.static_analysis.run_clangtidy_check": ["run_clang_tidy", "run_clang_tidy_batch"],
+    "Checks.static_analysis.run_py_check": [
+        "run_mypy",
+        "run_pylint",
+        "run_bandit",
+        "run_pystatic_analysis",
+        "run_mypy_batch",
+        "run_pylint_batch",
+        "run_bandit_batch",
+        "run_pystatic_analysis_batch",
+        "save_analysis_results",
+    ],
+    "Checks.static_analysis.py_workers": ["PyCheckWorkerPool", "get_py_worker_pool"],
+    "Checks.static_analysis.mypy_daemon": ["MypyDaemon", "get_mypy_daemon"],
+    "Checks.static_analysis.run_sonarqube_check": [
+        "SonarQubeClient",
+        "get_sonar_client",
+        "read_report_task",
+        "run_sonar_scanner",
+        "run_sonarqube_analysis",
+        "sonar_project_slot",
+        "fetch_detailed_report",
+        "save_report",
+    ],
+}
 
-# Initialize logging if needed
-app_logger = setup_logger()
-app_logger.info("Static analysis package initialized.")
\ No newline at end of file
+# Expose the primary functions for external usage
+__all__ = [name for names in _EXPORTS.values() for name in names]
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,173 @@
+#############################################################################################################################
+# Program: Checks/static_analysis/mypy_daemon.py                                                                            #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the resident mypy daemon (dmypy). The daemon keeps typeshed and the standard library   #
+# type-checked in memory, so a check only pays for the submitted file. Cold runs share a SQLite-backed cache directory.     #
+# A daemon that crashes or stops responding is killed and restarted.                                                        #
+#############################################################################################################################
+
+import os
+import ast
+import fcntl
+import threading
+import subprocess
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+MYPY_CACHE_DIR = "temp/cache/mypy"                              # Shared cache of the daemon and cold mypy runs
+MYPY_DAEMON_STATUS_FILE = "temp/cache/mypy/dmypy.json"          # Status file locating the daemon
+MYPY_DAEMON_TIMEOUT = 60                                        # Seconds a check may take before the daemon is killed
+MYPY_DAEMON_IDLE_TIMEOUT = 3600                                 # Seconds the daemon stays up without requests
+MYPY_DAEMON_MAX_MODULES = 4096                                  # Module names remembered before the daemon is restarted
+MYPY_OPTIONS = ["--ignore-missing-imports", "--output", "json"]
+
+_mypy_daemon = None
+_mypy_daemon_lock = threading.Lock()
+
+def mypy_cache_options(cache_dir=None):
+    """
+    Get the mypy options selecting the shared SQLite-backed cache.
+
+    params:
+        cache_dir (str): The cache directory; defaults to MYPY_CACHE_DIR.
+
+    returns:
+        options (list): The cache options.
+    """
+    return ["--sqlite-cache", "--cache-dir", cache_dir or MYPY_CACHE_DIR]
+
+class MypyDaemon:
+    """
+    A resident dmypy daemon. The daemon serves one check at a time, so checks are serialized
+    with a thread lock and, across server processes, a lock file next to the status file.
+
+    params:
+        status_file (str): The dmypy status file.
+        cache_dir (str): The mypy cache directory.
+        timeout (float): Seconds a single check may take before the daemon is killed.
+    """
+    def __init__(self, status_file=MYPY_DAEMON_STATUS_FILE, cache_dir=MYPY_CACHE_DIR, timeout=MYPY_DAEMON_TIMEOUT):
+        self.status_file = status_file
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._modules = {}                      # Module name -> last path checked under that name
+
+    def _dmypy(self, *args, timeout=None):
+        return subprocess.run(
+            ["dmypy", "--status-file", self.status_file, *args],
+            capture_output = True,
+            text = True,
+            timeout = timeout
+        )
+
+    def _run(self, file_path):
+        return self._dmypy(
+            "run", "--timeout", str(MYPY_DAEMON_IDLE_TIMEOUT), "--",
+            *MYPY_OPTIONS, *mypy_cache_options(self.cache_dir), file_path,
+            timeout=self.timeout
+        )
+
+    def is_alive(self):
+        """
+        Check that the daemon is up and answering.
+
+        returns:
+            alive (bool): True if the daemon answered a status request.
+        """
+        try:
+            return self._dmypy("status", timeout=10).returncode == 0
+        except Exception:
+            return False
+
+    def kill(self):
+        """
+        Kill the daemon, whatever state it is in.
+        """
+        try:
+            self._dmypy("kill", timeout=30)
+        except Exception as e:
+            logger.error(f"Failed to kill the mypy daemon: {e}")
+        try:
+            os.remove(self.status_file)
+        except OSError:
+            pass
+        self._modules.clear()
+
+    def stop(self):
+        """
+        Stop the daemon gracefully.
+        """
+        with self._lock:
+            try:
+                self._dmypy("stop", timeout=30)
+            except Exception:
+                self.kill()
+            self._modules.clear()
+
+    def check(self, file_path):
+        """
+        Type-check a file on the daemon, starting or restarting it as needed.
+
+        params:
+            file_path (str): The path to the Python file.
+
+        returns:
+            output (str): The mypy output, or None if the daemon cannot check the file and a cold run is needed.
+        """
+        # Files that do not parse make the daemon rebuild from scratch, and mypy stops at the syntax error anyway
+        try:
+            with open(file_path, "r") as f:
+                ast.parse(f.read())
+        except (SyntaxError, ValueError, OSError):
+            return None
+
+        # The daemon identifies files by module name; a name reused from another directory would be checked
+        # against stale state, so such files are left to a cold run
+        module = os.path.splitext(os.path.basename(file_path))[0]
+        path = os.path.abspath(file_path)
+
+        os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+        with self._lock, open(f"{self.status_file}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._modules.get(module, path) != path:
+                return None
+            if len(self._modules) >= MYPY_DAEMON_MAX_MODULES:
+                logger.info("Restarting the mypy daemon to forget old modules.")
+                self.kill()
+
+            for attempt in range(2):
+                try:
+                    result = self._run(file_path)
+                except subprocess.TimeoutExpired:
+                    logger.error(f"mypy daemon did not answer within {self.timeout} seconds; restarting it.")
+                    self.kill()
+                    continue
+                # Exit status 0 and 1 mean "no errors" and "type errors"; anything else is a daemon failure
+                if result.returncode in (0, 1):
+                    self._modules[module] = path
+                    return "".join(
+                        line for line in result.stdout.splitlines(keepends=True)
+                        if line.rstrip() not in ("Daemon started", "Restarting: configuration changed")
+                    )
+                logger.error(f"mypy daemon failed (attempt {attempt + 1}): {(result.stderr or result.stdout).strip()[-500:]}")
+                self.kill()
+            return None
+
+def get_mypy_daemon():
+    """
+    Get the process-wide mypy daemon client.
+
+    returns:
+        daemon (MypyDaemon): The shared daemon client.
+    """
+    global _mypy_daemon
+    with _mypy_daemon_lock:
+        if _mypy_daemon is None:
+            _mypy_daemon = MypyDaemon()
+        return _mypy_daemon
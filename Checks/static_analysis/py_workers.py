@@ -0,0 +1,186 @@
+#############################################################################################################################
+# Program: Checks/static_analysis/py_workers.py                                                                             #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the pool of warm pylint/bandit worker processes. Each worker imports pylint and        #
+# bandit once and then lints files sent over a pipe, so a check only pays for the lint itself instead of interpreter        #
+# startup and plugin imports. Workers are recycled after a fixed number of jobs to bound memory growth.                     #
+#############################################################################################################################
+
+import io
+import os
+import queue
+import tempfile
+import threading
+import multiprocessing
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+PY_WORKERS = 2                      # Number of warm worker processes
+PY_WORKER_MAX_JOBS = 200            # Jobs a worker serves before it is replaced
+PY_WORKER_JOB_TIMEOUT = 120         # Seconds a single lint may take before the worker is killed
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def _run_pylint_in_process(file_path):
+    from pylint.lint import Run
+    from pylint.reporters.json_reporter import JSON2Reporter
+
+    output = io.StringIO()
+    Run([file_path], reporter=JSON2Reporter(output), exit=False)
+    return output.getvalue()
+
+def _run_bandit_in_process(file_path):
+    from bandit.core import config as b_config
+    from bandit.core import constants
+    from bandit.core import manager as b_manager
+
+    # Same defaults as the bandit command line: all severities and confidences, 3 context lines
+    b_mgr = b_manager.BanditManager(b_config.BanditConfig(), "file")
+    b_mgr.discover_files([file_path], True)
+    b_mgr.run_tests()
+    output = io.StringIO()
+    output.name = "<worker>"                        # The formatter logs the name of its output file
+    output.close = lambda: None                     # and closes it when done
+    b_mgr.output_results(3, constants.RANKING[0], constants.RANKING[0], output, "json")
+    return output.getvalue()
+
+def _worker_main(conn):
+    """
+    Serve lint jobs from a pipe until told to stop.
+
+    params:
+        conn (multiprocessing.connection.Connection): The worker's end of the pipe.
+    """
+    runners = {"pylint": _run_pylint_in_process, "bandit": _run_bandit_in_process}
+
+    # Import the tools and their plugin trees once, up front, by linting an empty file
+    with tempfile.TemporaryDirectory() as directory:
+        warm_up_file = os.path.join(directory, "warm_up.py")
+        open(warm_up_file, "w").close()
+        for runner in runners.values():
+            try:
+                runner(warm_up_file)
+            except Exception as e:
+                logger.error(f"Warm-up of lint worker failed: {e}")
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        tool, file_path = job
+        try:
+            conn.send({"tool": tool, "output": runners[tool](file_path)})
+        except Exception as e:
+            conn.send({"tool": tool, "output": f"{tool} failed: {e}"})
+
+class PyCheckWorker:
+    """
+    One warm worker process and the parent's end of its pipe.
+    """
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def run(self, tool, file_path, timeout):
+        self.jobs += 1
+        self.conn.send((tool, file_path))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"{tool} did not finish within {timeout} seconds")
+        return self.conn.recv()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class PyCheckWorkerPool:
+    """
+    A bounded pool of warm pylint/bandit worker processes.
+
+    params:
+        size (int): The maximum number of worker processes.
+        max_jobs (int): The number of jobs a worker serves before it is recycled.
+        timeout (float): Seconds a single job may take before its worker is killed.
+    """
+    def __init__(self, size=PY_WORKERS, max_jobs=PY_WORKER_MAX_JOBS, timeout=PY_WORKER_JOB_TIMEOUT):
+        # Spawned rather than forked: the server process is multi-threaded
+        self._context = multiprocessing.get_context("spawn")
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def run(self, tool, file_path):
+        """
+        Lint a file on a warm worker.
+
+        params:
+            tool (str): "pylint" or "bandit".
+            file_path (str): The path to the Python file.
+
+        returns:
+            output_json (dict): A dictionary containing the tool name and its raw JSON output.
+        """
+        with self._slots:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = PyCheckWorker(self._context)
+
+            try:
+                result = worker.run(tool, file_path, self.timeout)
+            except (TimeoutError, EOFError, OSError) as e:
+                logger.error(f"Warm {tool} worker failed: {e}; replacing it.")
+                worker.kill()
+                return {"tool": tool, "output": f"{tool} failed: {e}"}
+
+            if worker.jobs >= self.max_jobs:
+                logger.info(f"Recycling warm lint worker after {worker.jobs} jobs.")
+                worker.stop()
+            else:
+                self._idle.put(worker)
+            return result
+
+    def close(self):
+        """
+        Stop all idle workers.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+def get_py_worker_pool():
+    """
+    Get the process-wide warm worker pool.
+
+    returns:
+        pool (PyCheckWorkerPool): The shared worker pool.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = PyCheckWorkerPool()
+        return _worker_pool
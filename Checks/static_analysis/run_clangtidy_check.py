@@ -10,17 +10,254 @@
 import subprocess
 import os
 import re
+import glob
+import json
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
 from logs import setup_logger
+from Checks.dynamic_analysis.pch_cache import precompiled_header_flags
 
 # Set up logger
 logger = setup_logger()
 
-def run_clang_tidy(file_path):
+CLANG_TIDY_PATH = "clang-tidy"                  # Path to the clang-tidy executable
+CHECK_PROFILING = False                         # Run with clang-tidy's check profiling and aggregate per-check timings
+
+# Named check profiles; every profile ignores warnings that are only compiler diagnostics
+CHECK_PROFILES = {
+    # Cheap AST-matcher checks relevant to single-file programs; no static analyzer
+    "fast": "-*,bugprone-*,cert-*,misc-*,performance-*,portability-*,readability-*,-clang-diagnostic*-warning",
+    # Every check except the modules written for specific code bases or platforms
+    "thorough": (
+        "*,-abseil-*,-altera-*,-android-*,-boost-*,-darwin-*,-fuchsia-*,-linuxkernel-*,-llvm-*,-llvmlibc-*,"
+        "-mpi-*,-objc-*,-openmp-*,-zircon-*,-clang-diagnostic*-warning"
+    ),
+}
+DEFAULT_CHECK_PROFILE = "thorough"
+MODE_CHECK_PROFILES = {"mode_1": "fast", "mode_2": "thorough"}
+DIAGNOSTIC_LEVELS = {"Error": "error", "Warning": "warning", "Remark": "remark"}
+PCH_ERROR_PATTERN = re.compile(r"precompiled header|PCH file|AST file", re.IGNORECASE)
+CLANG_VERSION_PATTERN = re.compile(r"version (\d+)\.")
+CHECK_PROFILE_PATTERN = re.compile(r"^time\.clang-tidy\.(?P<check>.+)\.(?P<kind>wall|user|sys)$")
+
+_check_timings = {}                             # Check name -> aggregated timings across runs
+_check_timings_lock = threading.Lock()
+
+def check_profile_for_mode(mode):
+    """
+    Get the check profile used in an application mode.
+
+    params:
+        mode (str): The mode of the application.
+
+    returns:
+        profile (str): The name of the check profile.
+    """
+    return MODE_CHECK_PROFILES.get(mode, DEFAULT_CHECK_PROFILE)
+
+@lru_cache(maxsize=None)
+def clang_for_tidy():
+    """
+    Find the clang compiler of the same major version as clang-tidy, which is the only one whose
+    precompiled headers clang-tidy can read.
+
+    returns:
+        clang (str): The clang executable, or None if there is none.
+    """
+    try:
+        banner = subprocess.run([CLANG_TIDY_PATH, "--version"], capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = CLANG_VERSION_PATTERN.search(banner)
+    if match is None:
+        return None
+    for clang in (f"clang-{match.group(1)}", "clang"):
+        if shutil.which(clang) is None:
+            continue
+        try:
+            version = subprocess.run([clang, "--version"], capture_output=True, text=True, timeout=30).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if f"version {match.group(1)}." in version:
+            return clang
+    return None
+
+def clang_tidy_pch_targets():
+    """
+    Get the precompiled header targets clang-tidy can use, to build them at startup.
+
+    returns:
+        targets (list): (compiler, kind, language, flags) tuples, empty if no matching clang is installed.
+    """
+    clang = clang_for_tidy()
+    return [(clang, "clang", "c++", []), (clang, "clang", "c", [])] if clang else []
+
+def clang_tidy_command(file_paths, profile=None, profile_dir=None, export_fixes=None, compile_flags=None):
+    """
+    Build a clang-tidy command line.
+
+    params:
+        file_paths (list): The paths to the C/C++ programs to check.
+        profile (str): The name of the check profile; defaults to DEFAULT_CHECK_PROFILE.
+        profile_dir (str): A directory to store per-check timings in, or None to run without profiling.
+        export_fixes (str): A YAML file to export the diagnostics to, or None.
+        compile_flags (list): Extra compiler flags, e.g. to use a precompiled header.
+
+    returns:
+        command (list): The command line.
+
+    exceptions:
+        ValueError: If the check profile is unknown.
+    """
+    profile = profile or DEFAULT_CHECK_PROFILE
+    if profile not in CHECK_PROFILES:
+        raise ValueError(f"Unknown clang-tidy check profile: {profile}")
+    command = [CLANG_TIDY_PATH, *file_paths, f"--checks={CHECK_PROFILES[profile]}"]
+    if export_fixes is not None:
+        command.append(f"--export-fixes={export_fixes}")
+    if profile_dir is not None:
+        command += ["--enable-check-profile", f"--store-check-profile={profile_dir}"]
+    return command + ["--", "-Werror", *(compile_flags or [])]
+
+def record_check_profile(profile_dir):
+    """
+    Add the per-check timings clang-tidy stored in a directory to the process-wide totals.
+
+    params:
+        profile_dir (str): The directory passed to --store-check-profile.
+    """
+    runs = {}
+    for path in glob.glob(os.path.join(profile_dir, "*.json")):
+        try:
+            with open(path, "r") as f:
+                profile = json.load(f).get("profile", {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable clang-tidy check profile {path}: {e}")
+            continue
+        for name, seconds in profile.items():
+            match = CHECK_PROFILE_PATTERN.match(name)
+            if match:
+                timing = runs.setdefault(match.group("check"), {"wall": 0.0, "user": 0.0, "sys": 0.0})
+                timing[match.group("kind")] += seconds
+
+    with _check_timings_lock:
+        for check, timing in runs.items():
+            total = _check_timings.setdefault(check, {"runs": 0, "wall": 0.0, "user": 0.0, "sys": 0.0})
+            total["runs"] += 1
+            for kind, seconds in timing.items():
+                total[kind] += seconds
+
+def check_profile_summary(limit=None):
+    """
+    Summarize the aggregated per-check timings, slowest first.
+
+    params:
+        limit (int): The maximum number of checks to return, or None for all.
+
+    returns:
+        summary (list): Dictionaries with "check", "runs", "wall", "user" and "sys" (seconds).
+    """
+    with _check_timings_lock:
+        summary = [{"check": check, **timing} for check, timing in _check_timings.items()]
+    summary.sort(key=lambda entry: entry["wall"], reverse=True)
+    return summary[:limit] if limit is not None else summary
+
+def reset_check_profile():
+    """
+    Clear the aggregated per-check timings.
+    """
+    with _check_timings_lock:
+        _check_timings.clear()
+
+def parse_clang_tidy_fixes(fixes_path):
+    """
+    Parse the diagnostics clang-tidy exported with --export-fixes into compact records.
+
+    params:
+        fixes_path (str): The path to the exported YAML file.
+
+    returns:
+        diagnostics (list): One dictionary per diagnostic with "severity", "check", "file", "line", "column"
+                            and "message"; empty if clang-tidy exported nothing.
+    """
+    if not os.path.isfile(fixes_path):
+        return []
+    import yaml                                 # Loaded on the first parse, not at server startup
+    with open(fixes_path, "r") as f:
+        document = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+
+    sources = {}                                # File path -> its bytes, to turn offsets into lines and columns
+    diagnostics = []
+    for diagnostic in document.get("Diagnostics") or []:
+        message = diagnostic.get("DiagnosticMessage") or {}
+        path = message.get("FilePath") or ""
+        offset = message.get("FileOffset") or 0
+        if path and path not in sources:
+            try:
+                with open(path, "rb") as f:
+                    sources[path] = f.read()
+            except OSError:
+                sources[path] = b""
+        source = sources.get(path, b"")
+        line_start = source.rfind(b"\n", 0, offset) + 1
+        diagnostics.append({
+            "severity": DIAGNOSTIC_LEVELS.get(diagnostic.get("Level"), "warning"),
+            "check": diagnostic.get("DiagnosticName", ""),
+            "file": path,
+            "line": source.count(b"\n", 0, offset) + 1 if path else 0,
+            "column": offset - line_start + 1 if path else 0,
+            "message": message.get("Message", ""),
+        })
+    return diagnostics
+
+def _diagnostic_fields(diagnostics):
+    """
+    Split diagnostic records into the "errors", "warnings" and "counts" fields of a Clangtidy output.
+    """
+    errors = [diagnostic for diagnostic in diagnostics if diagnostic["severity"] == "error"]
+    warnings = [diagnostic for diagnostic in diagnostics if diagnostic["severity"] != "error"]
+    return {"errors": errors, "warnings": warnings, "counts": {"error": len(errors), "warning": len(warnings)}}
+
+def _run_command(file_paths, profile, profiling, use_pch=True):
+    """
+    Run clang-tidy with its diagnostics exported to YAML, recording per-check timings if profiling is enabled.
+    A precompiled standard header set is used when the files include one; if clang rejects it, the run is repeated
+    without it.
+
+    returns:
+        command (list): The command line that ran.
+        result (subprocess.CompletedProcess): The finished process.
+        diagnostics (list): The parsed diagnostic records.
+    """
+    profiling = CHECK_PROFILING if profiling is None else profiling
+    work_dir = tempfile.mkdtemp(prefix="clang_tidy_")
+    profile_dir = os.path.join(work_dir, "profile") if profiling else None
+    clang = clang_for_tidy() if use_pch else None
+    pch_flags = precompiled_header_flags(clang, "clang", file_paths) if clang else []
+    command = clang_tidy_command(file_paths, profile, profile_dir, os.path.join(work_dir, "fixes.yaml"), pch_flags)
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        diagnostics = parse_clang_tidy_fixes(os.path.join(work_dir, "fixes.yaml"))
+        if pch_flags and any(PCH_ERROR_PATTERN.search(diagnostic["message"]) for diagnostic in diagnostics):
+            logger.info("clang-tidy rejected the precompiled header; retrying without it.")
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return _run_command(file_paths, profile, profiling, use_pch=False)
+        if profile_dir is not None:
+            record_check_profile(profile_dir)
+        return command, result, diagnostics
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def run_clang_tidy(file_path, profile=None, profiling=None):
     """
     Run Clangtidy on a C/C++ program.
 
     params:
         file_path (str): The path to the C/C++ program to run Clangtidy on.
+        profile (str): The name of the check profile; defaults to DEFAULT_CHECK_PROFILE.
+        profiling (bool): Whether to aggregate per-check timings; defaults to CHECK_PROFILING.
 
     returns:
         output_json (dict): A dictionary containing the Clangtidy output.
@@ -32,37 +269,67 @@ def run_clang_tidy(file_path):
         logger.error(f"Error: The file {file_path} does not exist.")
         return
 
-    command = [
-        "clang-tidy",
-        file_path,
-        "--checks=*,-clang-diagnostic*-warning",  # Ignore all warning checks
-        "--",
-        "-Werror"
-    ]
-
     try:
-        result = subprocess.run(command, capture_output=True, text=True)
+        command, result, diagnostics = _run_command([file_path], profile, profiling)
 
         output = {
             "file": file_path,
             "status": "success" if result.returncode == 0 else "failure",
             "command": " ".join(command),
-            "errors": [],
-            "warnings": [], 
+            "profile": profile or DEFAULT_CHECK_PROFILE,
+            **_diagnostic_fields(diagnostics),
             "return_code": result.returncode
         }
-
-        pattern = re.compile(r"error: (.*) \[.*\]")  # Only capturing errors
-
-        for line in result.stderr.splitlines():
-            match = pattern.search(line)
-            if match:
-                message = match.group(1)  
-                output["errors"].append(message)
                 
         logger.info("Clangtidy analysis completed successfully.")
 
         return output
 
     except Exception as e:
-        logger.error(f"An error occurred while running clang-tidy: {e}")
\ No newline at end of file
+        logger.error(f"An error occurred while running clang-tidy: {e}")
+
+def run_clang_tidy_batch(file_paths, profile=None, profiling=None):
+    """
+    Run Clangtidy once over several C/C++ programs and split the diagnostics per file.
+
+    params:
+        file_paths (list): The paths to the C/C++ programs to run Clangtidy on.
+        profile (str): The name of the check profile; defaults to DEFAULT_CHECK_PROFILE.
+        profiling (bool): Whether to aggregate per-check timings; defaults to CHECK_PROFILING.
+
+    returns:
+        outputs (dict): A dictionary mapping each file path to its Clangtidy output dictionary,
+                        in the same shape run_clang_tidy returns.
+    """
+    file_paths = [path for path in file_paths if os.path.isfile(path)]
+    if not file_paths:
+        return {}
+
+    try:
+        command, result, diagnostics = _run_command(file_paths, profile, profiling)
+    except Exception as e:
+        logger.error(f"An error occurred while running clang-tidy: {e}")
+        return {}
+
+    by_abs_path = {os.path.abspath(path): path for path in file_paths}
+    per_file = {path: [] for path in file_paths}
+    for diagnostic in diagnostics:
+        path = by_abs_path.get(os.path.abspath(diagnostic["file"])) if diagnostic["file"] else None
+        if path is not None:
+            per_file[path].append(diagnostic)
+
+    outputs = {}
+    for path, file_diagnostics in per_file.items():
+        fields = _diagnostic_fields(file_diagnostics)
+        failed = fields["counts"]["error"] > 0
+        outputs[path] = {
+            "file": path,
+            "status": "failure" if failed else "success",
+            "command": " ".join(command),
+            "profile": profile or DEFAULT_CHECK_PROFILE,
+            **fields,
+            "return_code": result.returncode if failed else 0
+        }
+
+    logger.info(f"Clangtidy analysis completed for a batch of {len(file_paths)} files.")
+    return outputs
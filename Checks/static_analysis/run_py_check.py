@@ -9,89 +9,277 @@
 
 import subprocess
 import os
+import re
+import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from logs import setup_logger
+from Checks.static_analysis.py_workers import get_py_worker_pool
+from Checks.static_analysis.mypy_daemon import MYPY_OPTIONS, get_mypy_daemon, mypy_cache_options
 
 # Set up logger
 logger = setup_logger()
 
+# Run pylint and bandit on warm worker processes instead of a fresh subprocess per file
+WARM_PY_WORKERS = True
+# Run mypy on a resident daemon instead of a cold process per file
+MYPY_DAEMON = True
+
+PYLINT_OPTIONS = ["--output-format=json2"]
+BANDIT_OPTIONS = ["-f", "json", "-q"]
+
+# One pylint process over several files whose json2 report also holds each file's score: pylint's evaluation of the
+# file's own statistics, rounded as the json2 score, so it is the score a single-file run reports
+PYLINT_BATCH_SCRIPT = """
+import sys
+from pylint.lint import Run
+from pylint.reporters.json_reporter import JSON2Reporter
+
+class FileScoreReporter(JSON2Reporter):
+    def __init__(self):
+        super().__init__()
+        self.file_paths = {}
+
+    def on_set_current_module(self, module, filepath):
+        super().on_set_current_module(module, filepath)
+        self.file_paths[module] = filepath
+
+    def serialize_stats(self):
+        statistics = super().serialize_stats()
+        statistics["fileScores"] = {}
+        for module, filepath in self.file_paths.items():
+            stats = dict(self.linter.stats.by_module[module])
+            stats["statement"] = stats["statement"] or 1
+            statistics["fileScores"][filepath] = round(eval(self.linter.config.evaluation, {}, stats), 2)
+        return statistics
+
+Run(sys.argv[1:], reporter=FileScoreReporter(), exit=False)
+"""
+
+# Blocking mypy errors (e.g. invalid syntax) are printed as text even in JSON output mode
+MYPY_TEXT_PATTERN = re.compile(r"^(?P<path>.+?):(?P<line>\d+)(?::(?P<column>\d+))?: (?P<severity>error|note|warning): (?P<message>.*?)(?:  \[(?P<code>[\w-]+)\])?$")
+MYPY_SUMMARY_PATTERN = re.compile(r"^(?:Success: no issues found|Found \d+ errors? in \d+ files?) ")
+MYPY_SEVERITIES = ["error", "note"]
+PYLINT_MESSAGE_TYPES = ["fatal", "error", "warning", "refactor", "convention", "info"]
+BANDIT_SEVERITIES = ["low", "medium", "high"]
+
+def _count_messages(messages, field, keys):
+    # Count messages by the value of one of their fields, always reporting the given keys
+    counts = dict.fromkeys(keys, 0)
+    for message in messages:
+        counts[message[field]] = counts.get(message[field], 0) + 1
+    return counts
+
+def parse_mypy_output(output):
+    """
+    Parses the JSON output of mypy into a compact result record.
+
+    params:
+        output (str): The mypy stdout, one JSON object per message.
+
+    returns:
+        record (dict): A dictionary containing the tool name, the messages by file, and the count of each severity.
+
+    exceptions:
+        ValueError: If a line is neither a JSON message, a blocking error, nor a summary line.
+    """
+    messages = []
+    for line in output.splitlines():
+        if not line.strip() or MYPY_SUMMARY_PATTERN.match(line):
+            continue
+        if line.startswith("{"):
+            message = json.loads(line)
+        else:
+            match = MYPY_TEXT_PATTERN.match(line)
+            if not match:
+                raise ValueError(f"Unrecognized mypy output line: {line!r}")
+            message = match.groupdict()
+            message["file"] = message.pop("path")
+        messages.append({
+            "file": message["file"],
+            "line": int(message["line"]),
+            "column": int(message["column"] or 0),
+            "severity": message["severity"],
+            "code": message.get("code"),
+            "message": message["message"],
+        })
+    return {"tool": "mypy", "counts": _count_messages(messages, "severity", MYPY_SEVERITIES), "messages": messages}
+
+def parse_pylint_output(output):
+    """
+    Parses the json2 output of pylint into a compact result record.
+
+    params:
+        output (str): The pylint stdout.
+
+    returns:
+        record (dict): A dictionary containing the tool name, the score, the messages, and the count of each message type.
+
+    exceptions:
+        ValueError: If the output is not a json2 report.
+    """
+    report = json.loads(output)
+    statistics = report["statistics"]
+    return {
+        "tool": "pylint",
+        "score": float(statistics["score"]),
+        "counts": {message_type: statistics["messageTypeCount"].get(message_type, 0) for message_type in PYLINT_MESSAGE_TYPES},
+        "messages": [
+            {
+                "file": message["path"],
+                "line": message["line"],
+                "column": message["column"],
+                "message_id": message["messageId"],
+                "symbol": message["symbol"],
+                "message": message["message"],
+            }
+            for message in report["messages"]
+        ],
+    }
+
+def parse_bandit_report(report):
+    """
+    Converts a decoded bandit JSON report into a compact result record.
+
+    params:
+        report (dict): The bandit JSON report.
+
+    returns:
+        record (dict): A dictionary containing the tool name, the issues, and the count of each severity.
+    """
+    messages = [
+        {
+            "file": issue["filename"],
+            "line": issue["line_number"],
+            "column": issue.get("col_offset", 0),
+            "test_id": issue["test_id"],
+            "severity": issue["issue_severity"].lower(),
+            "confidence": issue["issue_confidence"].lower(),
+            "message": issue["issue_text"],
+        }
+        for issue in report["results"]
+    ]
+    return {"tool": "bandit", "counts": _count_messages(messages, "severity", BANDIT_SEVERITIES), "messages": messages}
+
+def parse_bandit_output(output):
+    """
+    Parses the JSON output of bandit into a compact result record.
+
+    params:
+        output (str): The bandit stdout.
+
+    returns:
+        record (dict): A dictionary containing the tool name, the issues, and the count of each severity.
+
+    exceptions:
+        ValueError: If the output is not a bandit JSON report.
+    """
+    return parse_bandit_report(json.loads(output))
+
+def _parse_tool_output(tool, output, parser):
+    # A tool that crashed or printed something unexpected yields an error record rather than a misparsed result
+    try:
+        return parser(output)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Failed to parse {tool} output: {e}")
+        return {"tool": tool, "error": output.strip()[-500:] or f"{tool} produced no output."}
+
 def run_mypy(file_path):
     """
-    Runs mypy analysis on a Python file and returns the output.
+    Runs mypy analysis on a Python file and returns the parsed result.
     
     params:
         file_path (str): The path to the Python file to run mypy on.
     
     returns:
-        output_json (dict): A dictionary containing the mypy output.
+        record (dict): A dictionary containing the mypy messages and counts, or an "error" entry if mypy failed.
     
     exceptions:
         filenotfounderror: If the mypy command fails.
         exception: If the mypy command fails.
     """
+    if MYPY_DAEMON:
+        try:
+            output = get_mypy_daemon().check(file_path)
+            if output is not None:
+                return _parse_tool_output("mypy", output, parse_mypy_output)
+        except Exception as e:
+            logger.error(f"mypy daemon unavailable, falling back to a cold run: {e}")
     try:
         result = subprocess.run(
-            ["mypy", "--ignore-missing-imports", file_path],
+            ["mypy", *MYPY_OPTIONS, *mypy_cache_options(), file_path],
             capture_output = True,
             text = True
         )
-        return {"tool": "mypy", "output": result.stdout}
+        return _parse_tool_output("mypy", result.stdout, parse_mypy_output)
     except FileNotFoundError:
-        return {"tool": "mypy", "output": "mypy not found."}
+        return {"tool": "mypy", "error": "mypy not found."}
     except Exception as e:
-        return {"tool": "mypy", "output": f"mypy failed: {e}"}
+        return {"tool": "mypy", "error": f"mypy failed: {e}"}
 
 def run_pylint(file_path):
     """
-    Runs pylint analysis on a Python file and returns the output.
+    Runs pylint analysis on a Python file and returns the parsed result.
     
     params:
         file_path (str): The path to the Python file to run pylint on.
     
     returns:
-        output_json (dict): A dictionary containing the pylint output.
+        record (dict): A dictionary containing the pylint score, messages and counts, or an "error" entry if pylint failed.
     
     exceptions:
         filenotfounderror: If the pylint command fails.
         exception: If the pylint command fails.
     """
+    if WARM_PY_WORKERS:
+        try:
+            output = get_py_worker_pool().run("pylint", file_path)["output"]
+            return _parse_tool_output("pylint", output, parse_pylint_output)
+        except Exception as e:
+            logger.error(f"Warm pylint worker unavailable, falling back to a subprocess: {e}")
     try:
         result = subprocess.run(
-            ["pylint", file_path],
+            ["pylint", *PYLINT_OPTIONS, file_path],
             capture_output = True,
             text = True
         )
-        return {"tool": "pylint", "output": result.stdout}
+        return _parse_tool_output("pylint", result.stdout, parse_pylint_output)
     except FileNotFoundError:
-        return {"tool": "pylint", "output": "pylint not found."}
+        return {"tool": "pylint", "error": "pylint not found."}
     except Exception as e:
-        return {"tool": "pylint", "output": f"pylint failed: {e}"}
+        return {"tool": "pylint", "error": f"pylint failed: {e}"}
 
 def run_bandit(file_path):
     """
-    Runs bandit analysis on a Python file and returns the output.
+    Runs bandit analysis on a Python file and returns the parsed result.
     
     params:
         file_path (str): The path to the Python file to run bandit on.
     
     returns:
-        output_json (dict): A dictionary containing the bandit output.
+        record (dict): A dictionary containing the bandit issues and counts, or an "error" entry if bandit failed.
     
     exceptions:
         filenotfounderror: If the bandit command fails.
         exception: If the bandit command fails.
     """
+    if WARM_PY_WORKERS:
+        try:
+            output = get_py_worker_pool().run("bandit", file_path)["output"]
+            return _parse_tool_output("bandit", output, parse_bandit_output)
+        except Exception as e:
+            logger.error(f"Warm bandit worker unavailable, falling back to a subprocess: {e}")
     try:
         result = subprocess.run(
-            ["bandit", "-r", file_path],
+            ["bandit", *BANDIT_OPTIONS, "-r", file_path],
             capture_output = True,
             text = True
         )
-        return {"tool": "bandit", "output": result.stdout}
+        return _parse_tool_output("bandit", result.stdout, parse_bandit_output)
     except FileNotFoundError:
-        return {"tool": "bandit", "output": "bandit not found."}
+        return {"tool": "bandit", "error": "bandit not found."}
     except Exception as e:
-        return {"tool": "bandit", "output": f"bandit failed: {e}"}
+        return {"tool": "bandit", "error": f"bandit failed: {e}"}
 
 def save_analysis_results(results, analysis_output_path):
     """
@@ -120,22 +308,168 @@ def save_analysis_results(results, analysis_output_path):
 def run_pystatic_analysis(file_path):
     """
     Runs static analysis using mypy, pylint, and bandit on the specified file.
+    The three tools are independent subprocesses, so they run concurrently.
     
     params:
         file_path (str): The path to the Python file to run static analysis on.
     
     returns:
-        results (list): A list of analysis results.
+        results (list): A list of analysis results, in the order mypy, pylint, bandit.
     """
-    results = []
-
     if not os.path.isfile(file_path):
         logger.error(f"File '{file_path}' does not exist.")
         return
     
-    results.append(run_mypy(file_path))
-    results.append(run_pylint(file_path))
-    results.append(run_bandit(file_path))
+    tools = [run_mypy, run_pylint, run_bandit]
+    with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+        results = list(executor.map(lambda tool: tool(file_path), tools))
 
     logger.info("Python static analysis completed.")
-    return results
\ No newline at end of file
+    return results
+
+def _group_messages_by_file(messages, file_paths):
+    """
+    Group the messages of a multi-file tool run by the file they refer to.
+
+    params:
+        messages (list): The messages of a result record, each with a "file" entry.
+        file_paths (list): The files passed to the tool.
+
+    returns:
+        grouped (dict): A dictionary mapping each file path to its list of messages.
+    """
+    by_norm_path = {os.path.normpath(path): path for path in file_paths}
+    grouped = {path: [] for path in file_paths}
+    for message in messages:
+        path = by_norm_path.get(os.path.normpath(message["file"]))
+        if path is not None:
+            grouped[path].append(message)
+    return grouped
+
+def run_mypy_batch(file_paths):
+    """
+    Runs a single mypy invocation over several Python files and splits the result per file.
+    Falls back to one run per file if a blocking error stops mypy before it checks every file.
+    
+    params:
+        file_paths (list): The paths to the Python files to run mypy on.
+    
+    returns:
+        results (dict): A dictionary mapping each file path to its mypy result record.
+    """
+    try:
+        result = subprocess.run(
+            ["mypy", *MYPY_OPTIONS, *mypy_cache_options(), *file_paths],
+            capture_output = True,
+            text = True
+        )
+    except FileNotFoundError:
+        return {path: {"tool": "mypy", "error": "mypy not found."} for path in file_paths}
+    except Exception as e:
+        return {path: {"tool": "mypy", "error": f"mypy failed: {e}"} for path in file_paths}
+
+    if result.returncode not in (0, 1) or "errors prevented further checking" in result.stdout:
+        logger.info("mypy batch run hit a blocking error; checking files one at a time.")
+        return {path: run_mypy(path) for path in file_paths}
+
+    record = _parse_tool_output("mypy", result.stdout, parse_mypy_output)
+    if "error" in record:
+        return {path: dict(record) for path in file_paths}
+
+    results = {}
+    for path, messages in _group_messages_by_file(record["messages"], file_paths).items():
+        results[path] = {"tool": "mypy", "counts": _count_messages(messages, "severity", MYPY_SEVERITIES), "messages": messages}
+    return results
+
+def run_pylint_batch(file_paths):
+    """
+    Runs a single pylint invocation over several Python files and splits the result per file.
+    Each file gets the score pylint computes from that file's own statistics.
+    
+    params:
+        file_paths (list): The paths to the Python files to run pylint on.
+    
+    returns:
+        results (dict): A dictionary mapping each file path to its pylint result record.
+    """
+    try:
+        # Cross-file checks would make a file's score depend on the rest of the batch
+        result = subprocess.run(
+            [sys.executable, "-c", PYLINT_BATCH_SCRIPT, "--persistent=n", "--disable=duplicate-code,cyclic-import", *file_paths],
+            capture_output = True,
+            text = True
+        )
+    except FileNotFoundError:
+        return {path: {"tool": "pylint", "error": "pylint not found."} for path in file_paths}
+    except Exception as e:
+        return {path: {"tool": "pylint", "error": f"pylint failed: {e}"} for path in file_paths}
+
+    record = _parse_tool_output("pylint", result.stdout, parse_pylint_output)
+    if "error" in record:
+        return {path: dict(record) for path in file_paths}
+
+    file_scores = json.loads(result.stdout)["statistics"]["fileScores"]
+    scores = {os.path.normpath(path): score for path, score in file_scores.items()}
+
+    # Message ids start with the first letter of their type, e.g. C0114 is a convention
+    types_by_letter = {message_type[0].upper(): message_type for message_type in PYLINT_MESSAGE_TYPES}
+    results = {}
+    for path, messages in _group_messages_by_file(record["messages"], file_paths).items():
+        counts = dict.fromkeys(PYLINT_MESSAGE_TYPES, 0)
+        for message in messages:
+            counts[types_by_letter[message["message_id"][0]]] += 1
+        score = float(scores.get(os.path.normpath(path), 0.0))
+        results[path] = {"tool": "pylint", "score": score, "counts": counts, "messages": messages}
+    return results
+
+def run_bandit_batch(file_paths):
+    """
+    Runs a single bandit invocation over several Python files and splits the issues per file.
+    
+    params:
+        file_paths (list): The paths to the Python files to run bandit on.
+    
+    returns:
+        results (dict): A dictionary mapping each file path to its bandit result record.
+    """
+    try:
+        result = subprocess.run(
+            ["bandit", *BANDIT_OPTIONS, *file_paths],
+            capture_output = True,
+            text = True
+        )
+    except FileNotFoundError:
+        return {path: {"tool": "bandit", "error": "bandit not found."} for path in file_paths}
+    except Exception as e:
+        return {path: {"tool": "bandit", "error": f"bandit failed: {e}"} for path in file_paths}
+
+    record = _parse_tool_output("bandit", result.stdout, parse_bandit_output)
+    if "error" in record:
+        return {path: dict(record) for path in file_paths}
+
+    results = {}
+    for path, messages in _group_messages_by_file(record["messages"], file_paths).items():
+        results[path] = {"tool": "bandit", "counts": _count_messages(messages, "severity", BANDIT_SEVERITIES), "messages": messages}
+    return results
+
+def run_pystatic_analysis_batch(file_paths):
+    """
+    Runs static analysis using mypy, pylint, and bandit on several files, with one invocation per tool.
+    
+    params:
+        file_paths (list): The paths to the Python files to run static analysis on.
+    
+    returns:
+        results (dict): A dictionary mapping each file path to its list of analysis results, 
+                        in the same shape run_pystatic_analysis returns.
+    """
+    file_paths = [path for path in file_paths if os.path.isfile(path)]
+    if not file_paths:
+        return {}
+
+    tools = [run_mypy_batch, run_pylint_batch, run_bandit_batch]
+    with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+        mypy, pylint, bandit = executor.map(lambda tool: tool(file_paths), tools)
+
+    logger.info(f"Python static analysis completed for a batch of {len(file_paths)} files.")
+    return {path: [mypy[path], pylint[path], bandit[path]] for path in file_paths}
@@ -11,10 +11,12 @@
 import platform
 import sys
 import subprocess
-import requests
 import json
 import os
-from requests.auth import HTTPBasicAuth
+import time
+import queue
+import threading
+from contextlib import contextmanager
 from logs import setup_logger
 
 # Set up logger
@@ -24,13 +26,231 @@ SONARQUBE_URL = 'http://localhost:9000'
 SONAR_PROJECT_KEY = ''
 USERNAME = ''
 PASSWORD = ''
+SONAR_TOKEN = ''                        # Token the scanner authenticates with, passed in its environment, never in argv
 
-def run_sonar_scanner():
+# Path configurations; replace with your paths
+SONAR_SCANNER_PATH = 'path to sonar-scanner'
+SONAR_PROJECT_DIR = 'path to temp/code_files'
+
+# Client configurations
+SONAR_REQUEST_TIMEOUT = (5, 30)         # Connect and read timeouts of one request, in seconds
+SONAR_RETRIES = 3                       # Retries of a request failing to connect or answered with a transient status
+SONAR_RETRY_BACKOFF = 0.5               # Backoff factor between retries, in seconds
+SONAR_POOL_SIZE = 10                    # Connections kept open to the server
+SONAR_TASK_POLL_INTERVAL = 1.0          # Seconds between polls of a compute engine task
+SONAR_TASK_TIMEOUT = 300                # Seconds to wait for a compute engine task to finish
+SONAR_SCAN_SLOTS = 4                    # Scans running at once, each under its own project key
+
+SONAR_METRICS = (
+    "alert_status,bugs,vulnerabilities,code_smells,coverage,ncloc,complexity,"
+    "duplicated_lines_density,duplicated_blocks,security_rating,reliability_rating,"
+    "comment_lines_density,line_coverage,branch_coverage,complexity_in_classes,"
+    "complexity_in_functions,functions,files,classes,statements,comment_lines,"
+    "public_documented_api_density,public_undocumented_api"
+)
+
+_sonar_clients = {}
+_sonar_clients_lock = threading.Lock()
+_free_slots = queue.Queue()
+for _slot in range(SONAR_SCAN_SLOTS):
+    _free_slots.put(_slot)
+
+class SonarQubeClient:
+    """
+    A SonarQube web API client with a pooled session, per-request timeouts and bounded retries.
+
+    params:
+        base_url (str): The URL of the SonarQube server.
+        username (str): The username for authentication.
+        password (str): The password for authentication.
+        timeout (tuple): The connect and read timeouts of one request, in seconds.
+        retries (int): The number of retries of a failing request.
+        backoff (float): The backoff factor between retries, in seconds.
+        pool_size (int): The number of connections kept open to the server.
+    """
+    def __init__(self, base_url=SONARQUBE_URL, username=USERNAME, password=PASSWORD, timeout=SONAR_REQUEST_TIMEOUT,
+                 retries=SONAR_RETRIES, backoff=SONAR_RETRY_BACKOFF, pool_size=SONAR_POOL_SIZE):
+        # requests is only loaded once a SonarQube server is used
+        import requests
+        from requests.adapters import HTTPAdapter
+        from requests.auth import HTTPBasicAuth
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(username, password)
+
+        # Only idempotent GETs are retried, on connection errors and on statuses a busy server answers with
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, path, params=None):
+        """
+        Send a GET request to the web API and decode its JSON response.
+
+        params:
+            path (str): The API path, e.g. "/api/ce/task".
+            params (dict): The query parameters.
+
+        returns:
+            response (dict): The decoded JSON response.
+
+        exceptions:
+            requests.exceptions.RequestException: If the request fails after its retries.
+            json.JSONDecodeError: If the response is not valid JSON.
+        """
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def wait_for_task(self, task_id, poll_interval=SONAR_TASK_POLL_INTERVAL, timeout=SONAR_TASK_TIMEOUT):
+        """
+        Poll a compute engine task until the server has finished processing the scanner's upload.
+
+        params:
+            task_id (str): The ceTaskId from the scanner's report-task file.
+            poll_interval (float): Seconds between polls.
+            timeout (float): Seconds to wait before giving up.
+
+        returns:
+            task (dict): The finished task; its "status" is SUCCESS, FAILED or CANCELED.
+
+        exceptions:
+            TimeoutError: If the task is still pending or in progress after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            task = self.get_json("/api/ce/task", {"id": task_id})["task"]
+            if task["status"] in ("SUCCESS", "FAILED", "CANCELED"):
+                return task
+            if time.monotonic() + poll_interval > deadline:
+                raise TimeoutError(f"SonarQube task {task_id} still {task['status']} after {timeout} seconds")
+            time.sleep(poll_interval)
+
+    def fetch_report(self, project_key):
+        """
+        Fetch the component and measures of a project.
+
+        params:
+            project_key (str): The project key to fetch the report for.
+
+        returns:
+            report (dict): A dictionary with the "components" and "measures" of the project, or None if either is empty.
+        """
+        components = self.get_json(
+            "/api/components/search", {"qualifiers": "TRK", "componentKeys": project_key}
+        ).get('components', [])
+        if not components:
+            logger.error(f"No components found for project key '{project_key}'")
+            return None
+
+        measures = self.get_json(
+            "/api/measures/component", {"component": project_key, "metricKeys": SONAR_METRICS}
+        ).get('component', {}).get('measures', [])
+        if not measures:
+            logger.error(f"No measures found for project key '{project_key}'")
+            return None
+
+        return {
+            'components': components,
+            'measures': measures
+        }
+
+def get_sonar_client(username=USERNAME, password=PASSWORD, base_url=None):
+    """
+    Get the process-wide client of a SonarQube server and account, so that connections are reused across requests.
+
+    params:
+        username (str): The username for authentication.
+        password (str): The password for authentication.
+        base_url (str): The URL of the SonarQube server; defaults to SONARQUBE_URL.
+
+    returns:
+        client (SonarQubeClient): The shared client.
+    """
+    key = (base_url or SONARQUBE_URL, username, password)
+    with _sonar_clients_lock:
+        if key not in _sonar_clients:
+            _sonar_clients[key] = SonarQubeClient(key[0], username, password)
+        return _sonar_clients[key]
+
+def read_report_task(report_task_path):
+    """
+    Read the report-task file the scanner writes after uploading an analysis.
+
+    params:
+        report_task_path (str): The path to report-task.txt.
+
+    returns:
+        report_task (dict): The key=value pairs of the file, e.g. projectKey and ceTaskId, or an empty dict if it is missing.
+    """
+    report_task = {}
+    try:
+        with open(report_task_path, "r") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep:
+                    report_task[key] = value
+    except OSError as e:
+        logger.error(f"Failed to read SonarQube report task '{report_task_path}': {e}")
+    return report_task
+
+def sonar_scanner_command(project_dir, sources, project_key):
+    """
+    Build the scanner command for one scan. Every location is passed explicitly, so the scan does not
+    depend on the server's working directory or on a sonar-project.properties file.
+
+    params:
+        project_dir (str): The directory to scan.
+        sources (str): The sources to analyze, relative to project_dir.
+        project_key (str): The project key the analysis is uploaded under.
+
+    returns:
+        command (list): The scanner command.
+    """
+    project_dir = os.path.abspath(project_dir)
+    command = [
+        SONAR_SCANNER_PATH,
+        f"-Dsonar.projectKey={project_key}",
+        f"-Dsonar.projectBaseDir={project_dir}",
+        f"-Dsonar.sources={sources}",
+        f"-Dsonar.working.directory={os.path.join(project_dir, '.scannerwork')}",
+        f"-Dsonar.host.url={SONARQUBE_URL}",
+    ]
+    return command
+
+def sonar_scanner_env():
+    """
+    Build the scanner's environment. The token goes in SONAR_TOKEN, which the scanner reads, because the
+    command line of a process can be read by any local user.
+
+    returns:
+        env (dict): The server's environment with SONAR_TOKEN set, or None to inherit it if no token is configured.
+    """
+    if not SONAR_TOKEN:
+        return None
+    return dict(os.environ, SONAR_TOKEN=SONAR_TOKEN)
+
+def run_sonar_scanner(file_path=None, project_key=None):
     """
-    Runs the SonarQube scanner and handles errors and outputs.
+    Runs the SonarQube scanner and handles errors and outputs. The scanner runs with its working directory
+    set explicitly, so concurrent scans neither change nor depend on the server's working directory.
     
+    params:
+        file_path (str): The file to scan, alone, from its own directory; defaults to all of SONAR_PROJECT_DIR.
+        project_key (str): The project key the analysis is uploaded under; defaults to SONAR_PROJECT_KEY.
+
     Returns:
-        bool: True if the analysis was successful, False otherwise.
+        report_task (dict): The scanner's report-task entries if the analysis was successful, False otherwise.
 
     Exceptions:
         subprocess.CalledProcessError: If the SonarQube scanner fails.
@@ -42,9 +262,11 @@ def run_sonar_scanner():
         logger.error("This script is intended to run on Linux.")
         sys.exit(1)
 
-    # Path configurations; replace with your paths
-    sonar_scanner_path = 'path to sonar-scanner'
-    project_dir = 'path to temp/code_files'
+    sonar_scanner_path = SONAR_SCANNER_PATH
+    if file_path is None:
+        project_dir, sources = SONAR_PROJECT_DIR, "."
+    else:
+        project_dir, sources = os.path.dirname(file_path) or ".", os.path.basename(file_path)
 
     # Check if paths are correct
     if not os.path.isfile(sonar_scanner_path):
@@ -53,35 +275,67 @@ def run_sonar_scanner():
     if not os.path.isdir(project_dir):
         logger.error(f"Project directory '{project_dir}' is invalid.")
         return False
-    
-    original_dir = os.getcwd()
-
-    os.chdir(project_dir)
 
+    command = sonar_scanner_command(project_dir, sources, project_key or SONAR_PROJECT_KEY)
     try:
-        subprocess.run([sonar_scanner_path], check=True, text=True, capture_output=True)
+        subprocess.run(command, cwd=project_dir, env=sonar_scanner_env(), check=True, text=True, capture_output=True)
         logger.info("SonarQube analysis completed successfully.")
-        return True
+        return read_report_task(os.path.join(project_dir, ".scannerwork", "report-task.txt"))
     except subprocess.CalledProcessError as e:
         logger.error("An error occurred while running SonarQube analysis.")
-        logger.error("Error output:\n", e.stderr)
+        logger.error(f"Error output:\n{e.stderr}")
     except FileNotFoundError:
         logger.error(f"Sonar scanner not found at path '{sonar_scanner_path}'")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-    finally:
-        os.chdir(original_dir)
 
     return False
 
-def fetch_detailed_report(project_key, username, password):
+@contextmanager
+def sonar_project_slot():
+    """
+    Reserve one of the SONAR_SCAN_SLOTS project keys for the duration of a with-block. The server processes
+    the analyses of a project one after another, so a key is never shared by two scans in flight, and the
+    measures fetched after a scan belong to that scan.
+
+    returns:
+        project_key (str): The reserved project key.
+    """
+    slot = _free_slots.get()
+    try:
+        yield f"{SONAR_PROJECT_KEY or 'cdp'}_slot{slot}"
+    finally:
+        _free_slots.put(slot)
+
+def run_sonarqube_analysis(file_path, username=USERNAME, password=PASSWORD):
     """
-    Fetches the SonarQube analysis report for the given project key.
+    Scans a single file under a reserved project key and fetches its report once the server has processed it.
+
+    params:
+        file_path (str): The file to scan, usually in the request's workspace.
+        username (str): The username for authentication.
+        password (str): The password for authentication.
+
+    returns:
+        report (dict): A dictionary containing the SonarQube analysis report, or None if the scan or fetch failed.
+    """
+    with sonar_project_slot() as project_key:
+        report_task = run_sonar_scanner(file_path, project_key)
+        if report_task is False:
+            logger.info("SonarQube scanner execution failed.")
+            return None
+        return fetch_detailed_report(project_key, username, password, report_task)
+
+def fetch_detailed_report(project_key, username, password, report_task=None):
+    """
+    Fetches the SonarQube analysis report for the given project key. If the scanner's report task is given,
+    waits for the server's compute engine to finish processing the upload first, so the measures are not stale.
     
     params:
         project_key (str): The project key to fetch the report for.
         username (str): The username for authentication.
         password (str): The password for authentication.
+        report_task (dict): The report-task entries returned by run_sonar_scanner.
     
     returns:
         report (dict): A dictionary containing the SonarQube analysis report.
@@ -92,41 +346,21 @@ def fetch_detailed_report(project_key, username, password):
         requests.exceptions.Timeout: If the request to the SonarQube server times out.
         requests.exceptions.RequestException: If the request to the SonarQube server fails.
         json.JSONDecodeError: If the response from the SonarQube server is not valid JSON.
+        TimeoutError: If the compute engine task does not finish in time.
     """
-    
-    metrics = (
-        "alert_status,bugs,vulnerabilities,code_smells,coverage,ncloc,complexity,"
-        "duplicated_lines_density,duplicated_blocks,security_rating,reliability_rating,"
-        "comment_lines_density,line_coverage,branch_coverage,complexity_in_classes,"
-        "complexity_in_functions,functions,files,classes,statements,comment_lines,"
-        "public_documented_api_density,public_undocumented_api"
-    )
-
-    components_url = f"{SONARQUBE_URL}/api/components/search?qualifiers=TRK&componentKeys={project_key}"
-    measures_url = f"{SONARQUBE_URL}/api/measures/component?component={project_key}&metricKeys={metrics}"
-
+    import requests
+    client = get_sonar_client(username, password)
     try:
-        # Fetch components
-        response = requests.get(components_url, auth=HTTPBasicAuth(username, password))
-        response.raise_for_status()
-        components = response.json().get('components', [])
-        if not components:
-            logger.error(f"No components found for project key '{project_key}'")
-            return None
-
-        # Fetch measures
-        response = requests.get(measures_url, auth=HTTPBasicAuth(username, password))
-        response.raise_for_status()
-        measures = response.json().get('component', {}).get('measures', [])
-        if not measures:
-            logger.error(f"No measures found for project key '{project_key}'")
-            return None
+        task_id = (report_task or {}).get("ceTaskId")
+        if task_id:
+            task = client.wait_for_task(task_id)
+            if task["status"] != "SUCCESS":
+                logger.error(f"SonarQube task {task_id} ended with status {task['status']}: {task.get('errorMessage', '')}")
+                return None
+        elif report_task is not None:
+            logger.error("No compute engine task in the scanner's report; measures may be stale.")
 
-        report = {
-            'components': components,
-            'measures': measures
-        }
-        return report
+        return client.fetch_report(project_key)
 
     except requests.exceptions.HTTPError as http_err:
         logger.error(f"HTTP error occurred while fetching SonarQube report: {http_err}")
@@ -138,6 +372,8 @@ def fetch_detailed_report(project_key, username, password):
         logger.error(f"An error occurred while fetching SonarQube report: {req_err}")
     except json.JSONDecodeError:
         logger.error("Failed to parse the JSON response from SonarQube.")
+    except TimeoutError as e:
+        logger.error(str(e))
 
     return None
 
@@ -0,0 +1,227 @@
+#############################################################################################################################
+# Program: app/cache.py                                                                                                     #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the content-addressed cache for check results. Results are keyed by a hash of the      #
+# normalized code, language, tool name, tool version and tool options, and are kept in an in-memory LRU tier backed by a    #
+# size-bounded on-disk tier that survives restarts.                                                                         #
+#############################################################################################################################
+
+import os
+import json
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from functools import lru_cache
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+CACHE_DIR = "temp/cache/results"                # Directory of the on-disk tier
+MEMORY_CACHE_ENTRIES = 1024                     # Maximum number of results in the in-memory tier
+DISK_CACHE_BYTES = 256 * 1024 * 1024            # Maximum total size of the on-disk tier
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def normalize_code(code):
+    """
+    Normalize code before hashing, so that equivalent submissions share cache entries.
+    Only line endings are normalized; anything else may change what the tools report.
+
+    params:
+        code (str): The code to normalize.
+
+    returns:
+        normalized_code (str): The normalized code.
+    """
+    return code.replace("\r\n", "\n").replace("\r", "\n")
+
+@lru_cache(maxsize=None)
+def get_tool_version(command):
+    """
+    Get the version string of a tool, so that upgrading a tool invalidates its cached results.
+
+    params:
+        command (str): The tool executable.
+
+    returns:
+        version (str): The first line printed by "<command> --version", or "unknown".
+    """
+    try:
+        result = subprocess.run([command, "--version"], capture_output=True, text=True, timeout=30)
+        lines = (result.stdout or result.stderr).strip().splitlines()
+        return lines[0] if lines else "unknown"
+    except Exception:
+        return "unknown"
+
+def make_cache_key(code, language, tool, version, options):
+    """
+    Build the content-addressed key of a check result.
+
+    params:
+        code (str): The analyzed code.
+        language (str): The language of the code.
+        tool (str): The name of the check.
+        version (str): The version of the tool(s) behind the check.
+        options (str): The options the tool runs with.
+
+    returns:
+        key (str): The hex SHA-256 digest identifying the result.
+    """
+    payload = json.dumps([normalize_code(code), language, tool, version, options])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    A two-tier cache of JSON-serializable check results.
+
+    params:
+        directory (str): The directory of the on-disk tier, or None to disable it.
+        memory_entries (int): The maximum number of entries in the in-memory tier.
+        disk_bytes (int): The maximum total size of the on-disk tier.
+    """
+    def __init__(self, directory=CACHE_DIR, memory_entries=MEMORY_CACHE_ENTRIES, disk_bytes=DISK_CACHE_BYTES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()            # Key -> serialized result, least recently used first
+        self._disk_index = None                 # Key -> size in bytes, least recently used first; built on first use
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        # Rebuild the LRU order of the disk tier from access times, oldest first
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".json"):
+                        stat = os.stat(os.path.join(root, name))
+                        entries.append((stat.st_atime, name[:-len(".json")], stat.st_size))
+        entries.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_size = sum(self._disk_index.values())
+
+    def get(self, key):
+        """
+        Look a result up, first in memory and then on disk.
+
+        params:
+            key (str): The key built by make_cache_key.
+
+        returns:
+            result (any): A fresh copy of the cached result, or None on a miss.
+        """
+        with self._lock:
+            serialized = self._memory.get(key)
+            if serialized is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return json.loads(serialized)
+
+            if self.directory is not None:
+                if self._disk_index is None:
+                    self._load_disk_index()
+                if key in self._disk_index:
+                    try:
+                        with open(self._path(key), "r") as f:
+                            serialized = f.read()
+                        os.utime(self._path(key))
+                        self._disk_index.move_to_end(key)
+                        self._remember(key, serialized)
+                        self._counters["disk_hits"] += 1
+                        return json.loads(serialized)
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Dropping unreadable cache entry {key}: {e}")
+                        self._disk_size -= self._disk_index.pop(key)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key, result):
+        """
+        Store a result in both tiers.
+
+        params:
+            key (str): The key built by make_cache_key.
+            result (any): The JSON-serializable result.
+        """
+        try:
+            serialized = json.dumps(result)
+        except (TypeError, ValueError):
+            logger.error(f"Result for cache key {key} is not JSON-serializable; not caching it.")
+            return
+
+        with self._lock:
+            self._remember(key, serialized)
+            self._counters["stores"] += 1
+            if self.directory is None:
+                return
+            if self._disk_index is None:
+                self._load_disk_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w") as f:
+                    f.write(serialized)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.error(f"Failed to write cache entry {key}: {e}")
+                return
+            self._disk_size -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(serialized)
+            self._disk_size += len(serialized)
+            self._evict_disk()
+
+    def _remember(self, key, serialized):
+        self._memory[key] = serialized
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        while self._disk_size > self.disk_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_size -= size
+            self._counters["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        returns:
+            stats (dict): Hit, miss, store and eviction counters plus the current tier sizes.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = len(self._disk_index) if self._disk_index is not None else None
+            stats["disk_bytes"] = self._disk_size if self._disk_index is not None else None
+            return stats
+
+def get_result_cache():
+    """
+    Get the process-wide result cache.
+
+    returns:
+        cache (ResultCache): The shared result cache.
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
@@ -0,0 +1,191 @@
+#############################################################################################################################
+# Program: app/check_graph.py                                                                                               #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the dependency-graph executor that runs independent checks concurrently on a bounded   #
+# worker pool and skips checks whose upstream checks failed.                                                                #
+#############################################################################################################################
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+MAX_CHECK_WORKERS = 8                                           # Upper bound on concurrently running checks
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class CheckNode:
+    """
+    A single check in the dependency graph.
+
+    params:
+        name (str): The unique name of the check; also the key of its result.
+        func (callable): The function running the check.
+        args (tuple): Positional arguments passed to func.
+        deps (tuple): Names of the checks that must succeed before this one runs.
+        pass_results (bool): If True, the results of deps are appended to args in deps order.
+        succeeded (callable): Predicate deciding whether a result counts as success.
+        skip_result (dict): The result recorded when the check is skipped.
+    """
+    def __init__(self, name, func, args=(), deps=(), pass_results=False, succeeded=None, skip_result=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = tuple(deps)
+        self.pass_results = pass_results
+        self.succeeded = succeeded or default_succeeded
+        self.skip_result = skip_result
+
+def default_succeeded(result):
+    """
+    Decide whether a check result counts as success.
+
+    params:
+        result (any): The value returned by the check.
+
+    returns:
+        succeeded (bool): False for None, False or a dict whose status is "failure", True otherwise.
+    """
+    if result is None or result is False:
+        return False
+    if isinstance(result, dict) and result.get("status") == "failure":
+        return False
+    return True
+
+def get_check_executor():
+    """
+    Get the process-wide worker pool shared by every check graph.
+
+    returns:
+        executor (ThreadPoolExecutor): The bounded worker pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CHECK_WORKERS, thread_name_prefix="check")
+        return _executor
+
+def _run_node(node, upstream):
+    """
+    Run a single node and time it.
+
+    params:
+        node (CheckNode): The node to run.
+        upstream (list): The results of the node's dependencies, in deps order.
+
+    returns:
+        result (any): The value returned by the node's function.
+    """
+    args = node.args + tuple(upstream) if node.pass_results else node.args
+    start = time.perf_counter()
+    try:
+        return node.func(*args)
+    finally:
+        logger.info(f"Check '{node.name}' finished in {time.perf_counter() - start:.3f}s")
+
+def validate_graph(nodes):
+    """
+    Validate the graph: unique names, known dependencies and no cycles.
+
+    params:
+        nodes (list): A list of CheckNode objects.
+
+    exceptions:
+        ValueError: If the graph is invalid.
+    """
+    names = [node.name for node in nodes]
+    if len(names) != len(set(names)):
+        raise ValueError("Check names must be unique.")
+
+    by_name = {node.name: node for node in nodes}
+    for node in nodes:
+        for dep in node.deps:
+            if dep not in by_name:
+                raise ValueError(f"Check '{node.name}' depends on unknown check '{dep}'.")
+
+    # Kahn's algorithm; anything left over sits on a cycle
+    indegree = {node.name: len(node.deps) for node in nodes}
+    ready = [name for name, degree in indegree.items() if degree == 0]
+    visited = 0
+    while ready:
+        name = ready.pop()
+        visited += 1
+        for node in nodes:
+            if name in node.deps:
+                indegree[node.name] -= 1
+                if indegree[node.name] == 0:
+                    ready.append(node.name)
+    if visited != len(nodes):
+        raise ValueError("Check graph contains a cycle.")
+
+def run_check_graph(nodes, executor=None):
+    """
+    Run the checks of a dependency graph, starting every node as soon as all of its dependencies succeeded.
+
+    params:
+        nodes (list): A list of CheckNode objects.
+        executor (Executor): The worker pool to use; defaults to the shared check pool.
+
+    returns:
+        results (dict): A dictionary mapping each check name to its result.
+        statuses (dict): A dictionary mapping each check name to "success", "failure" or "skipped".
+
+    exceptions:
+        ValueError: If the graph is invalid.
+    """
+    validate_graph(nodes)
+    executor = executor or get_check_executor()
+
+    results = {}
+    statuses = {}
+    pending = {node.name: node for node in nodes}
+    running = {}
+
+    def settle_skipped():
+        # Skip every pending node with a failed or skipped dependency, transitively
+        changed = True
+        while changed:
+            changed = False
+            for name, node in list(pending.items()):
+                failed = [dep for dep in node.deps if statuses.get(dep) in ("failure", "skipped")]
+                if failed:
+                    del pending[name]
+                    statuses[name] = "skipped"
+                    if node.skip_result is not None:
+                        results[name] = node.skip_result
+                    else:
+                        results[name] = {"status": "skipped", "error": f"Upstream check '{failed[0]}' failed"}
+                    logger.info(f"Skipping check '{name}': upstream check '{failed[0]}' failed")
+                    changed = True
+
+    def submit_ready():
+        for name, node in list(pending.items()):
+            if all(statuses.get(dep) == "success" for dep in node.deps):
+                del pending[name]
+                upstream = [results[dep] for dep in node.deps]
+                running[executor.submit(_run_node, node, upstream)] = node
+
+    submit_ready()
+    while running:
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            node = running.pop(future)
+            try:
+                result = future.result()
+                statuses[node.name] = "success" if node.succeeded(result) else "failure"
+            except Exception as e:
+                logger.error(f"Check '{node.name}' raised an exception: {e}")
+                result = {"status": "failure", "error": str(e)}
+                statuses[node.name] = "failure"
+            results[node.name] = result
+        settle_skipped()
+        submit_ready()
+
+    return results, statuses
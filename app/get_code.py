@@ -5,7 +5,8 @@
 # Version: 1.0.1                                                                                                            #
 # License: [MIT License]                                                                                                    #
 # Description: This program extracts the most relevant code block from a text containing multiple code snippets and         #
-# explanations.                                                                                                             #    
+# explanations. One pass over the text records the fenced blocks with their offsets and the first keyword, and the best     #
+# block is selected from these offsets, so the extraction takes linear time on any input.                                   #
 #############################################################################################################################
 
 import re
@@ -26,21 +27,91 @@ keywords = [
     "simplification",
 ]
 
-# Fallback regex to extract plain code snippets
-plain_code_regex = r"""
-    (?:(?:^|\n)[ \t]*)                  # Line start or newline, optionally indented
-    (?:def\s+\w+\s*\([^)]*\):\s*        # Match Python function definition
-    |class\s+\w+\s*                     # Match class definition
-    |for\s+\w+\s+in\s+.*?:\s*           # Match 'for' loops
-    |while\s+.*?:\s*                    # Match 'while' loops
-    |if\s+.*?:\s*                       # Match 'if' statements
-    |try\s*:\s*                         # Match 'try' blocks
-    |except\s+.*?:\s*                   # Match 'except' blocks
-    |finally\s*:\s*                     # Match 'finally' blocks
-    |with\s+.*?:\s*                     # Match 'with' statements
-    |return\s+.*?(?:\n|$))              # Match 'return' statements
-    (?:\s*.*(?:\n|$))*                  # Match the rest of the block
-"""
+FENCE = "```"                                                               # Opening and closing code fence
+KEYWORD_PATTERN = re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+FENCE_LANGUAGE_PATTERN = re.compile(r"[a-zA-Z0-9]*\n")                      # Language tag line after an opening fence
+
+# Fallback for unfenced code: a line whose first statement, after its indentation, is one of these. Statements
+# ending in "...:" also need a colon after their head, and a "def" needs the ":" right after its first ")"
+PLAIN_CODE_HEAD_PATTERN = re.compile(r"""
+    [ \t]*                                                  # Optional indentation
+    (?:(?P<definition>def\s+\w+\s*\()                       # Python function definition, up to its "("
+    |(?P<compound>(?:for\s+\w+\s+in|while|if|except|with)\s)    # Statements ending in a colon
+    |(?P<simple>(?:try|finally)\s*:|class\s+\w|return\s))   # Statements complete as they are
+""", re.VERBOSE)
+
+def scan_code_blocks(text):
+    """
+    Find the fenced code blocks of a text in one pass.
+
+    params:
+        text (str): The input text.
+
+    returns:
+        blocks (list): (offset, code) of every block enclosed by triple backticks, the offset being where its code
+                       starts, after the optional language tag line.
+    """
+    blocks = []
+    opening = text.find(FENCE)
+    while opening != -1:
+        language = FENCE_LANGUAGE_PATTERN.match(text, opening + len(FENCE))
+        start = language.end() if language else opening + len(FENCE)
+        closing = text.find(FENCE, start)
+        if closing == -1:
+            break                                           # An unclosed fence opens no block
+        blocks.append((start, text[start:closing]))
+        opening = text.find(FENCE, closing + len(FENCE))
+    return blocks
+
+def find_plain_code(text):
+    """
+    Find unfenced code: it starts at the first line opening a Python-like statement and runs to the end of the
+    text. The colons and parentheses the statements need are located with a position that only moves forward.
+
+    params:
+        text (str): The input text.
+
+    returns:
+        offset (int): Where the code starts, or -1 if the text has no such line.
+    """
+    last_colon = text.rfind(":")
+    close_paren = -1                                        # The first ")" after the last "def ...(", len(text) if none
+    line_start = 0
+    while True:
+        head = PLAIN_CODE_HEAD_PATTERN.match(text, line_start)
+        if head is not None:
+            if head.group("simple") is not None:
+                return head.start()
+            if head.group("compound") is not None and last_colon >= head.end():
+                return head.start()
+            if head.group("definition") is not None:
+                if close_paren < head.end():
+                    found = text.find(")", head.end())
+                    close_paren = found if found != -1 else len(text)
+                if text.startswith(":", close_paren + 1):
+                    return head.start()
+        newline = text.find("\n", line_start)
+        if newline == -1:
+            return -1
+        line_start = newline + 1
+
+def explanation_end(text):
+    """
+    Find where the first explanation ends: at the first fence after the first keyword, or at the end of the text.
+
+    params:
+        text (str): The input text.
+
+    returns:
+        offset (int): The end of the explanation, or None if the text has no keyword.
+    """
+    keyword = KEYWORD_PATTERN.search(text)
+    if keyword is None:
+        return None
+    fence = text.find(FENCE, keyword.end())
+    if fence != -1:
+        return fence
+    return len(text) - 1 if text.endswith("\n") else len(text)
 
 def extract_and_select_best_code_block(text):
     """
@@ -56,24 +127,17 @@ def extract_and_select_best_code_block(text):
     if not text or not isinstance(text, str):
         return ""
 
-    # Regex for extracting code blocks enclosed by triple backticks
-    code_block_regex = r"```(?:[a-zA-Z0-9]*\n)?([\s\S]*?)```"
-    code_blocks = re.findall(code_block_regex, text, re.VERBOSE)
-
+    code_blocks = scan_code_blocks(text)
     if not code_blocks:
-        code_blocks = re.findall(plain_code_regex, text, re.VERBOSE | re.DOTALL)
-
-    # Match explanations with keywords
-    explanation_regex = rf"({'|'.join(keywords)})[\s\S]*?(?=```|$)"
-    explanations = re.finditer(explanation_regex, text, re.IGNORECASE)
-
-    # Pair explanations with code blocks
-    for explanation in explanations:
-        explanation_end = explanation.end()
-        for code in code_blocks:
-            code_start = text.find(code)
-            if code_start > explanation_end:  # Ensure code appears after the explanation
+        start = find_plain_code(text)
+        code_blocks = [(start, text[start:])] if start != -1 else []
+
+    # The first code block after the first explanation with a keyword; later explanations end later still
+    end = explanation_end(text)
+    if end is not None:
+        for start, code in code_blocks:
+            if start > end:
                 return code.strip()
 
     # If no matches found, return the first valid code block
-    return code_blocks[0].strip()
\ No newline at end of file
+    return code_blocks[0][1].strip()
@@ -0,0 +1,155 @@
+#############################################################################################################################
+# Program: app/jobs.py                                                                                                      #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the asynchronous job manager. Analyses are queued on a bounded in-process queue,       #
+# executed by a pool of worker threads, and their results are kept for a limited time so clients can poll for them.         #
+#############################################################################################################################
+
+import time
+import uuid
+import queue
+import threading
+import traceback
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+JOB_WORKERS = 4                 # Number of analyses running at once
+JOB_QUEUE_SIZE = 64             # Maximum number of queued analyses before submissions are rejected
+JOB_RESULT_TTL = 600            # Seconds a finished job's result is kept
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+class JobManager:
+    """
+    A bounded queue of analysis jobs served by a pool of worker threads.
+
+    params:
+        workers (int): The number of worker threads.
+        queue_size (int): The maximum number of queued jobs.
+        result_ttl (float): Seconds a finished job is kept before it expires.
+    """
+    def __init__(self, workers=JOB_WORKERS, queue_size=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, func, *args):
+        """
+        Queue a job without waiting for it to run.
+
+        params:
+            func (callable): The function to run; it returns a (body, status_code) pair.
+            args (tuple): The arguments passed to func.
+
+        returns:
+            job_id (str): The id used to poll the job.
+
+        exceptions:
+            queue.Full: If the queue is at capacity.
+        """
+        self.purge_expired()
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait((job_id, func, args))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            raise
+        logger.info(f"Queued analysis job {job_id}")
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job.
+
+        params:
+            job_id (str): The id returned by submit.
+
+        returns:
+            job (dict): A copy of the job record, or None if the job is unknown or expired.
+        """
+        self.purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def queue_depth(self):
+        """
+        Get the number of jobs waiting for a worker.
+
+        returns:
+            depth (int): The number of queued jobs.
+        """
+        return self._queue.qsize()
+
+    def purge_expired(self):
+        """
+        Drop finished jobs whose results are older than the TTL.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None and now - job["finished_at"] > self.result_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            logger.info(f"Expired {len(expired)} analysis job(s)")
+
+    def _work(self):
+        while True:
+            job_id, func, args = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["status"] = "running"
+                    job["started_at"] = time.time()
+            try:
+                body, status_code = func(*args)
+                status = "done" if status_code < 400 else "failed"
+            except Exception:
+                logger.error(f"Analysis job {job_id} crashed: {traceback.format_exc()}")
+                body, status_code, status = {"error": "Internal server error"}, 500, "failed"
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["status"] = status
+                    job["status_code"] = status_code
+                    job["result"] = body
+                    job["finished_at"] = time.time()
+            self._queue.task_done()
+
+def get_job_manager():
+    """
+    Get the process-wide job manager, starting its workers on first use.
+
+    returns:
+        job_manager (JobManager): The shared job manager.
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -9,29 +9,51 @@
 #############################################################################################################################
 
 import os
+import sys
 import json
+import queue
+import tempfile
+import functools
 import traceback
 from flask import Blueprint, request, jsonify # type: ignore
+from concurrent.futures import ThreadPoolExecutor
 from app.utils import (
     extract_code_from_input, 
     save_code_to_temp, 
     log_info, 
     log_error, 
-    cleanup_except_selected, 
     calculate_scores
 )
 from Checks.static_analysis.run_sonarqube_check import (
-    run_sonar_scanner, 
-    fetch_detailed_report, 
+    run_sonarqube_analysis, 
     SONAR_PROJECT_KEY, 
+    SONAR_SCANNER_PATH,
+    SONARQUBE_URL,
     USERNAME, 
     PASSWORD
 )
-from Checks.static_analysis.run_clangtidy_check import run_clang_tidy
-from Checks.static_analysis.run_py_check import run_pystatic_analysis
-from Checks.dynamic_analysis.run_valgrind_check import run_valgrind_check
-from Checks.formal_verification.run_dafny_check import run_dafny_code
+from Checks.static_analysis.run_clangtidy_check import (
+    run_clang_tidy,
+    run_clang_tidy_batch,
+    clang_tidy_command,
+    check_profile_for_mode,
+    check_profile_summary,
+)
+from Checks.static_analysis.run_py_check import run_pystatic_analysis, run_pystatic_analysis_batch
+from Checks.dynamic_analysis.run_valgrind_check import (
+    run_valgrind_check,
+    run_valgrind_for_compiled,
+    compile_program,
+    needs_compilation
+)
+from Checks.dynamic_analysis.python_runtime import run_python_runtime_check
+from Checks.dynamic_analysis.sanitizers import run_sanitizer_check, SANITIZER_FLAGS
+from Checks.formal_verification.run_dafny_check import run_dafny_code, DAFNY_PATH
 from app.get_code import extract_and_select_best_code_block
+from app.check_graph import CheckNode, run_check_graph
+from app.jobs import get_job_manager
+from app.cache import get_result_cache, get_tool_version, make_cache_key
+from app.workspace import request_workspace
 
 app_routes = Blueprint('app_routes', __name__)
 
@@ -44,10 +66,455 @@ sonarqube_lang = ["Java", "C#", "JavaScript", "TypeScript", "CloudFormation", "T
 valgrind_lang = ["C", "C++", "Fortran", "Ada", "Assembly", "Java", "Python", "Perl"]
 dafny_lang = ["C#", "Go", "Python", "Java", "JavaScript"]
 
+# Dynamic analyses a request can select with its "dynamic_analysis" field: name -> (check name, supported languages)
+DYNAMIC_ANALYSES = {
+    "valgrind": ("valgrind", valgrind_lang),
+    "native": ("python runtime", ["Python"]),
+    "sanitizers": ("sanitizers", ["C", "C++"]),
+}
+DEFAULT_DYNAMIC_ANALYSIS = {"Python": "native"}                  # Languages not listed default to Valgrind
+LOAD_DYNAMIC_ANALYSIS = "sanitizers"                            # Faster default of the languages it supports under load
+LOAD_QUEUE_DEPTH = 8                                            # Queued jobs from which the server counts as loaded
+
 TEMP_DIR = "temp/code_files"                                    # Directory for temporary code files
 RESULTS_FILE = "Results/combined_results.json"                  # File to store combined results
-os.makedirs(TEMP_DIR, exist_ok=True)                            # Ensure temp directory exists
-os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)       # Ensure results directory exists
+BATCH_WORKERS = 4                                               # Unique code blocks of a batch analyzed at once
+MAX_BATCH_SIZE = 256                                            # Maximum number of payloads per batch request
+
+# Cacheable checks: check name -> (executables whose versions key the cache, options the checks run with)
+CACHED_CHECKS = {
+    "python static analysis": (["mypy", "pylint", "bandit"], "mypy --ignore-missing-imports -O json; pylint -f json2; bandit -r -f json"),
+    "clang_tidy": (["clang-tidy"], None),                       # Options depend on the mode's check profile
+    "sonarqube": ([SONAR_SCANNER_PATH], f"{SONARQUBE_URL} {SONAR_PROJECT_KEY}"),
+    "valgrind": (["valgrind", "gcc", "g++", "gfortran", "javac"], "--leak-check=full --show-leak-kinds=all --xml=yes"),
+    "python runtime": ([sys.executable], "-X faulthandler tracemalloc"),
+    "sanitizers": (["gcc", "g++"], " ".join(SANITIZER_FLAGS)),
+    "dafny": ([DAFNY_PATH], "verify"),
+}
+
+def select_dynamic_analysis(language, requested=None):
+    """
+    Choose the dynamic analysis of a submission. Without a request, languages the faster LOAD_DYNAMIC_ANALYSIS
+    supports use it while the job queue holds LOAD_QUEUE_DEPTH or more jobs, and their default otherwise.
+
+    params:
+        language (str): The language of the code.
+        requested (str): The analysis named by the request, or None for the default.
+
+    returns:
+        analysis (str): The key of the analysis in DYNAMIC_ANALYSES, or None if no analysis supports the language.
+    """
+    if requested is not None and language not in DYNAMIC_ANALYSES.get(requested, ((), ()))[1]:
+        log_error(f"Dynamic analysis {requested} is not available for {language}; using the default.")
+        requested = None
+    if requested is None:
+        requested = DEFAULT_DYNAMIC_ANALYSIS.get(language, "valgrind")
+        loaded = get_job_manager().queue_depth() >= LOAD_QUEUE_DEPTH
+        if loaded and language in DYNAMIC_ANALYSES[LOAD_DYNAMIC_ANALYSIS][1]:
+            requested = LOAD_DYNAMIC_ANALYSIS
+    return requested if language in DYNAMIC_ANALYSES[requested][1] else None
+
+def result_cache_keys(mode, code, dafny_code, language, stdin_data=None, dynamic_analysis=None):
+    """
+    Build the result cache keys of the checks selected for a submission.
+
+    params:
+        mode (str): The mode of the application.
+        code (str): The extracted code.
+        dafny_code (str): The extracted Dafny code, or an empty string.
+        language (str): The language of the code.
+        stdin_data (str): The input the program runs with in the dynamic analysis, or None.
+        dynamic_analysis (str): The dynamic analysis requested, or None for the language's default.
+
+    returns:
+        cache_keys (dict): A dictionary mapping each selected cacheable check name to its cache key.
+    """
+    selected = []
+    if language in python_lang:
+        selected.append(("python static analysis", code, language))
+    if language in clangtidy_lang:
+        selected.append(("clang_tidy", code, language))
+    if language in sonarqube_lang:
+        selected.append(("sonarqube", code, language))
+    if mode == "mode_2":
+        dynamic_analysis = select_dynamic_analysis(language, dynamic_analysis)
+        if dynamic_analysis is not None:
+            selected.append((DYNAMIC_ANALYSES[dynamic_analysis][0], code, language))
+        if language in dafny_lang and dafny_code:
+            selected.append(("dafny", dafny_code, "Dafny"))
+
+    cache_keys = {}
+    for name, checked_code, checked_language in selected:
+        commands, options = CACHED_CHECKS[name]
+        if name == "clang_tidy":
+            # Diagnostics are read from the exported fixes file, so its option is part of the key
+            options = " ".join(clang_tidy_command([], check_profile_for_mode(mode), export_fixes="fixes.yaml")[1:])
+        elif name in ("valgrind", "python runtime", "sanitizers") and stdin_data:
+            # The program's findings depend on its input
+            options = f"{options} stdin={stdin_data}"
+        version = "; ".join(get_tool_version(command) for command in commands)
+        cache_keys[name] = make_cache_key(checked_code, checked_language, name, version, options)
+    return cache_keys
+
+def is_cacheable_result(result):
+    """
+    Decide whether a check result is deterministic enough to cache. Results caused by a missing or crashing 
+    tool, or cut short by a deadline, are not cached, so they are retried on the next submission.
+
+    params:
+        result (any): The check result.
+
+    returns:
+        cacheable (bool): True if the result can be cached.
+    """
+    if result is None:
+        return False
+    if isinstance(result, dict):
+        return "error" not in result and result.get("status") != "timeout"
+    if isinstance(result, list):
+        return not any("error" in entry for entry in result)
+    return True
+
+def lookup_cached_results(cache_keys, skip=()):
+    """
+    Look up cached check results.
+
+    params:
+        cache_keys (dict): A dictionary mapping check names to cache keys.
+        skip (iterable): Check names that already have a result.
+
+    returns:
+        hits (dict): A dictionary mapping check names to their cached results.
+    """
+    cache = get_result_cache()
+    hits = {}
+    for name, key in cache_keys.items():
+        if name in skip:
+            continue
+        result = cache.get(key)
+        if result is not None:
+            log_info(f"Using cached result for {name}.")
+            hits[name] = result
+    return hits
+
+def store_cached_results(cache_keys, check_results, check_statuses):
+    """
+    Store the successful results of freshly run checks in the result cache.
+
+    params:
+        cache_keys (dict): A dictionary mapping check names to cache keys.
+        check_results (dict): A dictionary mapping check names to their results.
+        check_statuses (dict): A dictionary mapping check names to their graph status.
+    """
+    cache = get_result_cache()
+    for name, key in cache_keys.items():
+        if check_statuses.get(name) == "success" and is_cacheable_result(check_results.get(name)):
+            cache.put(key, check_results[name])
+
+def run_analysis(
+    mode, model, code, dafny_code, language, temp_code_file, precomputed=None, stdin_data=None, dynamic_analysis=None,
+    rankme_score=None
+):
+    """
+    Run the selected checks on one saved code file and score the results.
+
+    params:
+        mode (str): The mode of the application.
+        model (str): The model that generated the code.
+        code (str): The extracted code.
+        dafny_code (str): The extracted Dafny code, or an empty string.
+        language (str): The language of the code.
+        temp_code_file (str): The path of the saved code; other files are written next to it.
+        precomputed (dict): Check results already produced by a batch invocation, keyed by check name.
+        stdin_data (str): The input the program runs with in the dynamic analysis, or None for an empty input.
+        dynamic_analysis (str): The dynamic analysis requested, or None for the language's default.
+        rankme_score (float): The RankMe score already computed for the batch, or None to compute it.
+
+    returns:
+        results (dict): The analysis results, including the evaluation score.
+    """
+    # Choose the dynamic analysis once, so the cache keys and the checks agree however the load changes
+    dynamic_analysis = select_dynamic_analysis(language, dynamic_analysis) if mode == "mode_2" else None
+
+    # Reuse cached results of identical earlier submissions
+    cache_keys = result_cache_keys(mode, code, dafny_code, language, stdin_data, dynamic_analysis)
+    precomputed = dict(precomputed or {})
+    precomputed.update(lookup_cached_results(cache_keys, skip=precomputed))
+
+    # Tool selection based on language
+    run_pystatic = language in python_lang
+    run_clangtidy = language in clangtidy_lang
+    run_sonarqube = language in sonarqube_lang
+    dynamic_check = DYNAMIC_ANALYSES[dynamic_analysis][0] if dynamic_analysis is not None else None
+    run_dafny = language in dafny_lang
+
+    # Results dictionary
+    results = {}
+    results["model"] = model
+    results["generated_code"] = code
+
+    # Declare the selected checks as a dependency graph; independent checks run concurrently
+    nodes = []
+    if run_pystatic and "python static analysis" not in precomputed:
+        log_info("Running Python static analysis...")
+        nodes.append(CheckNode("python static analysis", run_pystatic_analysis, args=(temp_code_file,)))
+
+    if run_clangtidy and "clang_tidy" not in precomputed:
+        log_info("Running ClangTidy analysis...")
+        nodes.append(CheckNode("clang_tidy", run_clang_tidy, args=(temp_code_file, check_profile_for_mode(mode))))
+
+    if run_sonarqube and "sonarqube" not in precomputed:
+        log_info("Running SonarQube analysis...")
+        nodes.append(CheckNode("sonarqube", run_sonarqube_analysis, args=(temp_code_file, USERNAME, PASSWORD)))
+
+    if mode == "mode_2":
+        if dynamic_check == "valgrind" and "valgrind" not in precomputed:
+            log_info("Running Valgrind analysis...")
+            if needs_compilation(temp_code_file):
+                nodes.append(CheckNode("compile", compile_program, args=(temp_code_file,)))
+                nodes.append(CheckNode(
+                    "valgrind", 
+                    functools.partial(run_valgrind_for_compiled, stdin_data=stdin_data), 
+                    args=(temp_code_file,), 
+                    deps=("compile",), 
+                    pass_results=True,
+                    skip_result={"status": "failure", "error": "Compilation failed!"}
+                ))
+            else:
+                nodes.append(CheckNode("valgrind", run_valgrind_check, args=(temp_code_file, stdin_data)))
+
+        if dynamic_check == "python runtime" and "python runtime" not in precomputed:
+            log_info("Running Python runtime analysis...")
+            nodes.append(CheckNode("python runtime", run_python_runtime_check, args=(temp_code_file, stdin_data)))
+
+        if dynamic_check == "sanitizers" and "sanitizers" not in precomputed:
+            log_info("Running sanitizer analysis...")
+            nodes.append(CheckNode("compile", compile_program, args=(temp_code_file, SANITIZER_FLAGS)))
+            nodes.append(CheckNode(
+                "sanitizers", 
+                functools.partial(run_sanitizer_check, stdin_data=stdin_data), 
+                args=(temp_code_file,), 
+                deps=("compile",), 
+                pass_results=True,
+                skip_result={"status": "failure", "error": "Compilation failed!"}
+            ))
+
+        if run_dafny and dafny_code:
+            if "dafny" not in precomputed:
+                temp_dafny_file = save_code_to_temp(dafny_code, "dfy", os.path.dirname(temp_code_file))
+                log_info("Running Dafny analysis...")
+                nodes.append(CheckNode("dafny", run_dafny_code, args=(temp_dafny_file,)))
+        else:
+            results["dafny"] = {"verification_status": "no code provided"}
+
+    check_results, check_statuses = run_check_graph(nodes)
+    store_cached_results(cache_keys, check_results, check_statuses)
+    check_results.update(precomputed)
+
+    for name in ("python static analysis", "clang_tidy", "valgrind", "python runtime", "sanitizers", "dafny"):
+        if name in check_results:
+            results[name] = check_results[name]
+
+    if run_sonarqube:
+        if "sonarqube" in precomputed or check_statuses["sonarqube"] == "success":
+            results["sonarqube"] = check_results["sonarqube"]
+        else:
+            log_info("SonarQube scanner execution failed.")
+
+    results["evaluation_score"] = calculate_scores(results, mode, rankme_score)
+    return results
+
+def extract_analysis_input(data):
+    """
+    Extract and validate the analysis input of one API payload.
+
+    params:
+        data (dict): The decoded JSON payload.
+
+    returns:
+        analysis_input (tuple): (mode, model, code, dafny_code, language, stdin_data, dynamic_analysis), or None if 
+                                code or language is missing. stdin_data is the optional "stdin" field, the input 
+                                of the program, and dynamic_analysis the optional "dynamic_analysis" field.
+    """
+    mode, model, text, dafny_text, language = extract_code_from_input(data)
+    if not text or not language:
+        log_error("Missing code or language")
+        return None
+    
+    # Extract and select best code block
+    code = extract_and_select_best_code_block(text)
+
+    # Check if dafny_text is None
+    if dafny_text is None:
+        dafny_code = ""
+    else:
+        dafny_code = extract_and_select_best_code_block(dafny_text)
+
+    stdin_data = data.get("stdin")
+    if stdin_data is not None:
+        stdin_data = str(stdin_data)
+
+    dynamic_analysis = data.get("dynamic_analysis")
+    if dynamic_analysis is not None:
+        dynamic_analysis = str(dynamic_analysis)
+
+    return mode, model, code, dafny_code, language, stdin_data, dynamic_analysis
+
+def analyze_payload(data):
+    """
+    Run the full analysis pipeline for one API payload. Shared by the synchronous endpoint and the job workers.
+
+    params:
+        data (dict): The decoded JSON payload.
+
+    returns:
+        body (dict): The analysis results, or an error description.
+        status_code (int): The HTTP status code matching the body.
+    """
+    try:
+        analysis_input = extract_analysis_input(data)
+        if analysis_input is None:
+            return {"error": "Output and language fields are required"}, 400
+        mode, model, code, dafny_code, language, stdin_data, dynamic_analysis = analysis_input
+
+        # Every request works in its own workspace, removed as a unit afterwards
+        with request_workspace() as workspace:
+            temp_code_file = save_code_to_temp(code, language, workspace)
+            results = run_analysis(
+                mode, model, code, dafny_code, language, temp_code_file, 
+                stdin_data=stdin_data, dynamic_analysis=dynamic_analysis
+            )
+
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, "w") as file:
+            json.dump(results, file, indent=4)
+
+        log_info("Code analysis completed successfully.")
+        return results, 200
+
+    except Exception as e:
+        # Log and return error
+        error_details = traceback.format_exc()
+        log_error(f"Error in code analysis: {error_details}")
+        return {"error": "Internal server error"}, 500
+
+def run_clang_tidy_profiles(files_by_profile):
+    """
+    Run Clangtidy once per check profile over the files checked with it.
+
+    params:
+        files_by_profile (dict): A dictionary mapping check profile names to file paths.
+
+    returns:
+        outputs (dict): A dictionary mapping each file path to its Clangtidy output dictionary.
+    """
+    outputs = {}
+    for profile, file_paths in files_by_profile.items():
+        outputs.update(run_clang_tidy_batch(file_paths, profile))
+    return outputs
+
+def analyze_batch(payloads):
+    """
+    Analyze many payloads in one call. Identical extracted code is analyzed once, tools that accept several 
+    files per invocation run once over the whole batch, and the remaining checks run per unique code block.
+
+    params:
+        payloads (list): The decoded JSON payloads, each in the shape accepted by /analyze.
+
+    returns:
+        responses (list): One result or error dictionary per payload, in input order.
+    """
+    entries = []                    # Per payload: (dedup key, model) or an error dictionary
+    unique = {}                     # Dedup key -> (mode, code, dafny_code, language, stdin_data, dynamic_analysis)
+    for data in payloads:
+        analysis_input = extract_analysis_input(data) if isinstance(data, dict) else None
+        if analysis_input is None:
+            entries.append({"error": "Output and language fields are required"})
+            continue
+        mode, model, code, dafny_code, language, stdin_data, dynamic_analysis = analysis_input
+        key = (mode, language, code, dafny_code, stdin_data, dynamic_analysis)
+        unique.setdefault(key, (mode, code, dafny_code, language, stdin_data, dynamic_analysis))
+        entries.append((key, model))
+    log_info(f"Batch of {len(payloads)} payloads has {len(unique)} unique code blocks.")
+
+    temp_files = {}
+    unique_results = {}
+    with request_workspace() as workspace:
+        for key, (mode, code, dafny_code, language, _, _) in unique.items():
+            # One subdirectory per code block keeps compiled binaries and renamed Java files apart
+            temp_files[key] = save_code_to_temp(code, language, tempfile.mkdtemp(dir=workspace))
+
+        # Cached results of batch-capable tools need no batch run
+        cache_keys = {}
+        precomputed = {}
+        for key, analysis_input in unique.items():
+            cache_keys[key] = result_cache_keys(*analysis_input)
+            batchable_keys = {
+                name: cache_key for name, cache_key in cache_keys[key].items() 
+                if name in ("python static analysis", "clang_tidy")
+            }
+            precomputed[key] = lookup_cached_results(batchable_keys)
+
+        # Tools that accept several files per invocation run once over the whole batch
+        python_files = [
+            temp_files[key] for key in unique 
+            if key[1] in python_lang and "python static analysis" not in precomputed[key]
+        ]
+        clang_files = {}            # Check profile -> files checked with it
+        for key in unique:
+            if key[1] in clangtidy_lang and "clang_tidy" not in precomputed[key]:
+                clang_files.setdefault(check_profile_for_mode(key[0]), []).append(temp_files[key])
+        nodes = []
+        if python_files:
+            nodes.append(CheckNode("python static analysis", run_pystatic_analysis_batch, args=(python_files,)))
+        if clang_files:
+            nodes.append(CheckNode("clang_tidy", run_clang_tidy_profiles, args=(clang_files,)))
+        batch_results, _ = run_check_graph(nodes)
+
+        for key in unique:
+            for name, per_file in batch_results.items():
+                if isinstance(per_file, dict) and temp_files[key] in per_file:
+                    precomputed[key][name] = per_file[temp_files[key]]
+                    if is_cacheable_result(per_file[temp_files[key]]):
+                        get_result_cache().put(cache_keys[key][name], per_file[temp_files[key]])
+
+        # RankMe scores all scored code blocks at once, with one shared vocabulary; very large ones are streamed.
+        # RankMe and its NumPy/SciPy stack are only loaded for scored modes
+        rankme_scores = {}
+        if any(key[0] == "mode_2" for key in unique):
+            from Checks.rankme.rankme import preprocess_text, compute_rankme_scores
+            from Checks.rankme.streaming import RANKME_STREAMING_CHARS
+            scored_keys = [key for key in unique if key[0] == "mode_2" and len(key[2]) <= RANKME_STREAMING_CHARS]
+            scores = compute_rankme_scores([preprocess_text(key[2]) for key in scored_keys])
+            rankme_scores = dict(zip(scored_keys, scores))
+
+        # The remaining checks run per unique code block across the batch worker pool
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+            futures = {
+                key: executor.submit(
+                    run_analysis, mode, None, code, dafny_code, language, temp_files[key], precomputed[key], 
+                    stdin_data, dynamic_analysis, rankme_scores.get(key)
+                )
+                for key, (mode, code, dafny_code, language, stdin_data, dynamic_analysis) in unique.items()
+            }
+            for key, future in futures.items():
+                try:
+                    unique_results[key] = future.result()
+                except Exception:
+                    log_error(f"Error in batch code analysis: {traceback.format_exc()}")
+                    unique_results[key] = {"error": "Internal server error"}
+
+    responses = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            responses.append(entry)
+            continue
+        key, model = entry
+        result = dict(unique_results[key])
+        if "error" not in result:
+            result["model"] = model
+        responses.append(result)
+    return responses
 
 """
 API endpoint for analyzing code with improved error handling, concurrency, and security. 
@@ -61,88 +528,98 @@ Returns:
 """
 @app_routes.route('/analyze', methods=['POST'])
 def analyze_code():
-    temp_code_file = None  
-    temp_dafny_file = None
+    # Validate JSON input
+    if not request.is_json:
+        return jsonify({"error": "Invalid JSON format"}), 400
+    body, status_code = analyze_payload(request.get_json())
+    return jsonify(body), status_code
+
+"""
+API endpoint for submitting code for asynchronous analysis. The analysis runs on the job worker pool, 
+so the request returns a job id right away instead of holding an HTTP worker.
+
+Paras:
+    None
+
+Returns:
+    JSON response with the job id and the URL to poll
+"""
+@app_routes.route('/analyze/submit', methods=['POST'])
+def submit_analysis():
+    if not request.is_json:
+        return jsonify({"error": "Invalid JSON format"}), 400
     try:
-        # Validate JSON input
-        if not request.is_json:
-            return jsonify({"error": "Invalid JSON format"}), 400
-        data = request.get_json()
-
-        # Extract and validate input
-        mode, model, text, dafny_text, language = extract_code_from_input(data)
-        if not text or not language:
-            log_error("Missing code or language")
-            return jsonify({"error": "Output and language fields are required"}), 400
-        
-        # Extract and select best code block
-        code = extract_and_select_best_code_block(text)
-
-        # Check if dafny_text is None
-        if dafny_text is None:
-            dafny_code = ""
-        else:
-            dafny_code = extract_and_select_best_code_block(dafny_text)
-
-        # Tool selection based on language
-        run_pystatic = language in python_lang
-        run_clangtidy = language in clangtidy_lang
-        run_sonarqube = language in sonarqube_lang
-        run_valgrind = language in valgrind_lang
-        run_dafny = language in dafny_lang
-
-        # Generate unique temp file for each request
-        temp_code_file = save_code_to_temp(code, language)
-        
-        # Results dictionary
-        results = {}
-        results["model"] = model
-        results["generated_code"] = code
-        
-        # Run analyses based on tool selection
-        if run_pystatic:
-            log_info("Running Python static analysis...")
-            results["python static analysis"] = run_pystatic_analysis(temp_code_file)
-
-        if run_clangtidy:
-            log_info("Running ClangTidy analysis...")
-            results["clang_tidy"] = run_clang_tidy(temp_code_file)
-
-        if run_sonarqube:
-            log_info("Running SonarQube analysis...")
-            if run_sonar_scanner():
-                report = fetch_detailed_report(SONAR_PROJECT_KEY, USERNAME, PASSWORD)
-                results["sonarqube"] = report
-            else:
-                log_info("SonarQube scanner execution failed.")
+        job_id = get_job_manager().submit(analyze_payload, request.get_json())
+    except queue.Full:
+        log_error("Analysis job queue is full")
+        return jsonify({"error": "Too many pending analyses, retry later"}), 503
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}), 202
 
-        if mode == "mode_2":
-            if run_valgrind:
-                log_info("Running Valgrind analysis...")
-                results["valgrind"] = run_valgrind_check(temp_code_file)
+"""
+API endpoint for polling an asynchronous analysis job.
 
-            if run_dafny and dafny_code:
-                temp_dafny_file = save_code_to_temp(dafny_code, "dfy")
-                log_info("Running Dafny analysis...")
-                results["dafny"] = run_dafny_code(temp_dafny_file)
-            else:
-                results["dafny"] = {"verification_status": "no code provided"}
+Paras:
+    job_id (str): The id returned by /analyze/submit
 
-        results["evaluation_score"] = calculate_scores(results, mode)
+Returns:
+    JSON response with the job status, and the analysis result once the job is done
+"""
+@app_routes.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job id"}), 404
+    return jsonify(job), 200
 
-        with open(RESULTS_FILE, "w") as file:
-            json.dump(results, file, indent=4)
+"""
+API endpoint for analyzing many payloads in one call, e.g. several candidate completions of one prompt.
+Results are returned in input order.
 
-        log_info("Code analysis completed successfully.")
-        return jsonify(results)
+Paras:
+    None
 
+Returns:
+    JSON response with one analysis result per payload
+"""
+@app_routes.route('/analyze/batch', methods=['POST'])
+def analyze_code_batch():
+    if not request.is_json:
+        return jsonify({"error": "Invalid JSON format"}), 400
+    data = request.get_json()
+    payloads = data.get("payloads") if isinstance(data, dict) else data
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({"error": "A non-empty list of payloads is required"}), 400
+    if len(payloads) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} payloads are accepted per batch"}), 413
+    try:
+        return jsonify({"results": analyze_batch(payloads)}), 200
     except Exception as e:
-        # Log and return error
-        error_details = traceback.format_exc()
-        log_error(f"Error in code analysis: {error_details}")
+        log_error(f"Error in batch code analysis: {traceback.format_exc()}")
         return jsonify({"error": "Internal server error"}), 500
 
-    finally:
-        # Clean up temp files
-        selected_files = ["sonar-project.properties"]
-        cleanup_except_selected(TEMP_DIR, selected_files)
\ No newline at end of file
+"""
+API endpoint for inspecting the result cache.
+
+Paras:
+    None
+
+Returns:
+    JSON response with the cache hit/miss counters and tier sizes
+"""
+@app_routes.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_result_cache().stats()), 200
+
+"""
+API endpoint for inspecting the per-check clang-tidy timings aggregated while check profiling is enabled.
+
+Paras:
+    limit (query, optional): The maximum number of checks to return
+
+Returns:
+    JSON response with the checks' run counts and total wall, user and system seconds, slowest first
+"""
+@app_routes.route('/clang-tidy/profile', methods=['GET'])
+def clang_tidy_profile():
+    limit = request.args.get("limit", type=int)
+    return jsonify(check_profile_summary(limit)), 200
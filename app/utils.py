@@ -11,13 +11,12 @@ import os
 import uuid
 import glob
 from logs import setup_logger
-from Checks.rankme.rankme import compute_rankme_score, preprocess_text
 
 # Directory for temporary code files
 TEMP_DIR = "temp/code_files"
 
-# Ensure temp directory exists
-os.makedirs(TEMP_DIR, exist_ok=True)
+# Dynamic analysis statuses scored 0; a program stopped at its deadline never completed its run
+FAILED_RUN_STATUSES = ("failure", "timeout")
 
 # Setup logger
 logger = setup_logger()
@@ -44,13 +43,14 @@ def extract_code_from_input(data):
     logger.info(f"Received data: {data}")
     return mode, model, output, dafny_text, language
 
-def save_code_to_temp(code, language):
+def save_code_to_temp(code, language, directory=TEMP_DIR):
     """
     Save code to a temporary file based on the provided language.
     
     params:
         code (str): The code to save.
         language (str): The language of the code.
+        directory (str): The directory to save the file in, usually the request's workspace.
         
     Returns:
         file_path (str): The path to the saved file.    
@@ -88,7 +88,8 @@ def save_code_to_temp(code, language):
     # Get extension from mapping
     ext = lang_to_ext.get(language.lower(), language.lower())
     
-    filename = f"{TEMP_DIR}/temp_code_{uuid.uuid4()}.{ext}"
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{directory}/temp_code_{uuid.uuid4()}.{ext}"
     with open(filename, "w") as file:
         file.write(code)
         
@@ -149,13 +150,14 @@ def log_error(message):
     """
     logger.error(message)
 
-def calculate_scores(data, mode):
+def calculate_scores(data, mode, precomputed_rankme=None):
     """
     Calculate scores based on the provided data and mode.
     
     params:
         data (dict): The data containing analysis results.
         mode (str): The mode of the application.
+        precomputed_rankme (float): The RankMe score of the generated code computed by a batch, or None to compute it.
         
     Returns: 
         scores (dict): A json object containing:
@@ -169,16 +171,17 @@ def calculate_scores(data, mode):
     
     # Python Static Analysis Scores
     if "python static analysis" in data:
-        mypy_score = 10 if "Success" in data["python static analysis"][0]["output"] else 0                              # Mypy score
-        pylint_score = float(data["python static analysis"][1]["output"].split("rated at")[1].split("/10")[0].strip())  # Pylint score
-        bandit_score = 10 if "No issues identified" in data["python static analysis"][2]["output"] else 0               # Bandit score
+        mypy, pylint, bandit = data["python static analysis"]                     # Parsed result records; "error" if a tool failed
+        mypy_score = 10 if "error" not in mypy and mypy["counts"]["error"] == 0 else 0  # Mypy score
+        pylint_score = pylint.get("score", 0)                                           # Pylint score
+        bandit_score = 10 if "error" not in bandit and not bandit["messages"] else 0    # Bandit score
         static_score = (mypy_score + pylint_score + bandit_score) / 3                                                   
 
     # Clanmgtidy Scores
     if "clang_tidy" in data:
-        clangtidy = data.get("clang-tidy", {})
-        warnings = len(clangtidy.get("warnings", []))                   # Count warnings
-        errors = len(clangtidy.get("errors", []))                       # Count errors
+        counts = (data["clang_tidy"] or {}).get("counts", {})          # Counts of the diagnostic records
+        warnings = counts.get("warning", 0)                             # Count warnings
+        errors = counts.get("error", 0)                                 # Count errors
 
         if errors > 0:
             static_score = 0                                            # Fail if there are any errors
@@ -238,19 +241,43 @@ def calculate_scores(data, mode):
         # Valgrind Score
         if "valgrind" in data:
             valgrind = data["valgrind"]
-            if valgrind["status"] == "failure":
+            if valgrind["status"] in FAILED_RUN_STATUSES:
                 valgrind_score = 0
             else:
                 valgrind_score = 5 if "still reachable" in valgrind["memory_issues"] else 10
 
+        # Python Runtime Score, the dynamic analysis score of Python code run natively
+        if "python runtime" in data:
+            runtime = data["python runtime"]
+            if runtime["status"] in FAILED_RUN_STATUSES:
+                valgrind_score = 0
+            else:
+                valgrind_score = 5 if runtime["memory_issues"]["retained_memory"] else 10
+
+        # Sanitizer Score, the dynamic analysis score of C/C++ code compiled with the sanitizers
+        if "sanitizers" in data:
+            sanitizers = data["sanitizers"]
+            if sanitizers["status"] in FAILED_RUN_STATUSES:
+                valgrind_score = 0
+            else:
+                valgrind_score = 5 if any(sanitizers["error_count"].values()) else 10
+
         # Dafny Score
         if "dafny" in data:
-            if "success" in data["dafny"]["verification_status"]:
+            if "success" in data["dafny"].get("verification_status", ""):
                 dafny_score = 10
 
-        # Rankme Score
-        split_texts = preprocess_text(data["generated_code"])
-        rankme_score = compute_rankme_score(split_texts)
+        # Rankme Score; RankMe and its NumPy/SciPy stack are only loaded for scored modes
+        from Checks.rankme.rankme import compute_rankme_score, compute_rankme_score_streaming, preprocess_text
+        from Checks.rankme.streaming import RANKME_STREAMING_CHARS
+        if precomputed_rankme is not None:
+            rankme_score = precomputed_rankme
+        elif len(data["generated_code"]) > RANKME_STREAMING_CHARS:
+            # Very large submissions are scored in constant memory
+            rankme_score = compute_rankme_score_streaming(data["generated_code"])
+        else:
+            split_texts = preprocess_text(data["generated_code"])
+            rankme_score = compute_rankme_score(split_texts)
 
     # Final Scores (Weighted)
     if static_score != -1 and valgrind_score != -1 and dafny_score != -1 and rankme_score != -1:
@@ -0,0 +1,69 @@
+#############################################################################################################################
+# Program: app/workspace.py                                                                                                 #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains the per-request workspaces. Every analysis writes its code files, binaries and tool   #
+# outputs into its own directory, which is removed as a unit when the analysis finishes.                                    #
+#############################################################################################################################
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from logs import setup_logger
+
+# Set up logger
+logger = setup_logger()
+
+# Root directory of the workspaces; point CDP_WORKSPACE_ROOT at a tmpfs mount (e.g. /dev/shm/cdp) to keep them in memory
+WORKSPACE_ROOT = os.environ.get("CDP_WORKSPACE_ROOT", "temp/code_files")
+
+def create_workspace(root=None):
+    """
+    Create a fresh, uniquely named workspace directory.
+
+    params:
+        root (str): The directory to create the workspace in; defaults to WORKSPACE_ROOT.
+
+    returns:
+        workspace (str): The path to the new workspace.
+    """
+    root = root or WORKSPACE_ROOT
+    os.makedirs(root, exist_ok=True)
+    workspace = tempfile.mkdtemp(prefix="ws_", dir=root)
+    logger.info(f"Created workspace {workspace}")
+    return workspace
+
+def remove_workspace(workspace):
+    """
+    Remove a workspace and everything in it.
+
+    params:
+        workspace (str): The path to the workspace.
+    """
+    try:
+        shutil.rmtree(workspace)
+        logger.info(f"Removed workspace {workspace}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Failed to remove workspace {workspace}: {e}")
+
+@contextmanager
+def request_workspace(root=None):
+    """
+    Provide a workspace for the duration of a with-block and remove it afterwards.
+
+    params:
+        root (str): The directory to create the workspace in; defaults to WORKSPACE_ROOT.
+
+    returns:
+        workspace (str): The path to the workspace.
+    """
+    workspace = create_workspace(root)
+    try:
+        yield workspace
+    finally:
+        remove_workspace(workspace)
@@ -0,0 +1,64 @@
+#############################################################################################################################
+# Program: benchmarks/dafny_incremental_benchmark.py                                                                        #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks re-verifying a Dafny file after a one-lemma edit, comparing a full verification      #
+# with the per-member incremental cache. Run it from the project root with:                                                 #
+#     python -m benchmarks.dafny_incremental_benchmark [path to dafny]                                                      #
+#############################################################################################################################
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+from Checks.formal_verification import run_dafny_check
+from Checks.formal_verification.run_dafny_check import run_dafny_code
+
+LEMMAS = 20                 # Lemmas in the benchmarked file
+EDITS = 5                   # One-lemma edits timed per variant
+
+def program(edit):
+    lemmas = [
+        f"lemma SumBound{i}(n: nat)\n  ensures Sum(n) >= n - {1 if i == edit else 0}\n"
+        f"{{\n  if n > 0 {{ SumBound{i}(n - 1); }}\n}}\n"
+        for i in range(LEMMAS)
+    ]
+    return "function Sum(n: nat): nat { if n == 0 then 0 else n + Sum(n - 1) }\n" + "".join(lemmas)
+
+def time_edits(path, incremental):
+    timings = []
+    for edit in range(EDITS):
+        with open(path, "w") as f:
+            f.write(program(edit))
+        start = time.perf_counter()
+        report = run_dafny_code(path, use_server=False, incremental=incremental)
+        timings.append(time.perf_counter() - start)
+        assert report["verification_status"] == "success", report
+    return timings
+
+def main():
+    dafny_path = sys.argv[1] if len(sys.argv) > 1 else run_dafny_check.DAFNY_PATH
+    if shutil.which(dafny_path) is None:
+        print(f"Dafny executable '{dafny_path}' not found; pass its path as the first argument.")
+        return
+    run_dafny_check.DAFNY_PATH = dafny_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.dfy")
+        full = time_edits(path, incremental=False)
+
+        # Prime the cache with the unedited file, then time the same edits
+        with open(path, "w") as f:
+            f.write(program(None))
+        run_dafny_code(path, use_server=False, incremental=True)
+        incremental = time_edits(path, incremental=True)
+
+    print(f"{EDITS} one-lemma edits of a file with {LEMMAS} lemmas, cold dafny verify")
+    print(f"full verification: {sum(full) / EDITS * 1000:.0f} ms/edit")
+    print(f"incremental:       {sum(incremental) / EDITS * 1000:.0f} ms/edit")
+
+if __name__ == "__main__":
+    main()
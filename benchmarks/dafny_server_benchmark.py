@@ -0,0 +1,68 @@
+#############################################################################################################################
+# Program: benchmarks/dafny_server_benchmark.py                                                                             #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks Dafny verification of short programs with cold "dafny verify" runs against the      #
+# resident language server. Run it from the project root with:                                                              #
+#     python -m benchmarks.dafny_server_benchmark [path to dafny]                                                           #
+#############################################################################################################################
+
+import os
+import sys
+import shutil
+import tempfile
+import time
+from Checks.formal_verification import run_dafny_check
+from Checks.formal_verification.run_dafny_check import run_dafny_code
+from Checks.formal_verification.dafny_server import get_dafny_server
+
+RUNS = 10                   # Verifications per variant
+
+PROGRAMS = [
+    "method Abs(x: int) returns (y: int)\n  ensures y >= 0\n{\n  if x < 0 { y := -x; } else { y := x; }\n}\n",
+    "function Fib(n: nat): nat { if n < 2 then n else Fib(n - 1) + Fib(n - 2) }\n"
+    "lemma FibPositive(n: nat)\n  requires n > 0\n  ensures Fib(n) > 0\n{\n  if n > 2 { FibPositive(n - 1); }\n}\n",
+    "method Max(a: array<int>) returns (m: int)\n  requires a.Length > 0\n  ensures forall i :: 0 <= i < a.Length ==> a[i] <= m\n"
+    "{\n  m := a[0];\n  var i := 1;\n  while i < a.Length\n    invariant 1 <= i <= a.Length\n"
+    "    invariant forall j :: 0 <= j < i ==> a[j] <= m\n  {\n    if a[i] > m { m := a[i]; }\n    i := i + 1;\n  }\n}\n",
+]
+
+def time_runs(paths, use_server):
+    timings = []
+    for path in paths:
+        start = time.perf_counter()
+        report = run_dafny_code(path, use_server=use_server)
+        timings.append(time.perf_counter() - start)
+        assert report["verification_status"] == "success", report
+    return timings
+
+def main():
+    dafny_path = sys.argv[1] if len(sys.argv) > 1 else run_dafny_check.DAFNY_PATH
+    if shutil.which(dafny_path) is None:
+        print(f"Dafny executable '{dafny_path}' not found; pass its path as the first argument.")
+        return
+    run_dafny_check.DAFNY_PATH = dafny_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(RUNS):
+            paths.append(os.path.join(directory, f"program_{i}.dfy"))
+            with open(paths[-1], "w") as f:
+                f.write(PROGRAMS[i % len(PROGRAMS)])
+
+        cold = time_runs(paths, use_server=False)
+
+        start = time.perf_counter()
+        get_dafny_server(dafny_path).start()
+        startup = time.perf_counter() - start
+        warm = time_runs(paths, use_server=True)
+        get_dafny_server(dafny_path).stop()
+
+    print(f"{RUNS} verifications of short programs")
+    print(f"cold dafny verify: {sum(cold) / RUNS * 1000:.0f} ms/program")
+    print(f"language server:   {sum(warm) / RUNS * 1000:.0f} ms/program (one-time startup {startup * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
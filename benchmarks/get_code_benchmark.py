@@ -0,0 +1,95 @@
+#############################################################################################################################
+# Program: benchmarks/get_code_benchmark.py                                                                                 #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks the code block extraction on adversarial inputs of doubling size against the         #
+# former regex implementation, which is only run up to REFERENCE_MAX_SIZE. It reports the time of every size and the        #
+# growth factor of the largest doubling, and exits with status 1 if that factor exceeds MAX_GROWTH, a super-linear case.    #
+# Run it from the project root with:                                                                                        #
+#     python -m benchmarks.get_code_benchmark                                                                               #
+#############################################################################################################################
+
+import re
+import sys
+import time
+from app.get_code import keywords, extract_and_select_best_code_block
+
+SIZES = [2000, 4000, 8000, 16000, 32000, 64000]     # Repetitions of every adversarial unit
+REFERENCE_MAX_SIZE = 8000                           # Largest size the former implementation is run on
+REPEATS = 5                                         # Runs per measurement, the fastest is kept
+MAX_GROWTH = 3.0                                    # Largest time factor of a doubling still counted as linear
+
+# The implementation the scanner replaced
+plain_code_regex = r"""
+    (?:(?:^|\n)[ \t]*)
+    (?:def\s+\w+\s*\([^)]*\):\s*
+    |class\s+\w+\s*
+    |for\s+\w+\s+in\s+.*?:\s*
+    |while\s+.*?:\s*
+    |if\s+.*?:\s*
+    |try\s*:\s*
+    |except\s+.*?:\s*
+    |finally\s*:\s*
+    |with\s+.*?:\s*
+    |return\s+.*?(?:\n|$))
+    (?:\s*.*(?:\n|$))*
+"""
+
+def regex_extract_and_select_best_code_block(text):
+    if not text or not isinstance(text, str):
+        return ""
+    code_blocks = re.findall(r"```(?:[a-zA-Z0-9]*\n)?([\s\S]*?)```", text, re.VERBOSE)
+    if not code_blocks:
+        code_blocks = re.findall(plain_code_regex, text, re.VERBOSE | re.DOTALL)
+    explanation_regex = rf"({'|'.join(keywords)})[\s\S]*?(?=```|$)"
+    for explanation in re.finditer(explanation_regex, text, re.IGNORECASE):
+        for code in code_blocks:
+            if text.find(code) > explanation.end():
+                return code.strip()
+    return code_blocks[0].strip()
+
+# Inputs that make a scan restart at every line, block or keyword
+ADVERSARIAL_INPUTS = {
+    "'if' lines without a colon": lambda size: "if x\n" * size + "return x",
+    "'for' lines without a colon": lambda size: "for item in items\n" * size + "return x",
+    "'def' lines without a ')'": lambda size: "def f(\n" * size + "return x",
+    "identical blocks after keywords": lambda size: "Updated code:\n```python\nx = 1\n```\n" * size,
+    "distinct blocks, then keywords": lambda size: "".join(f"```\nx_{i} = {i}\n```\n" for i in range(size)) + "revised " * size,
+    "unclosed fence, long tag": lambda size: "```" + "python" * size + "\nreturn x",
+    "backtick runs": lambda size: "`" * size + "\n" + "``" * size,
+    "keywords without fences": lambda size: "improved " * size + "\nreturn result",
+}
+
+def best_time(extract, text):
+    seconds = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        extract(text)
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+def main():
+    super_linear = []
+    for name, build in ADVERSARIAL_INPUTS.items():
+        print(f"\n{name}\n{'size':>7} {'chars':>9} {'regex ms':>9} {'scanner ms':>11}")
+        times = []
+        for size in SIZES:
+            text = build(size)
+            times.append(best_time(extract_and_select_best_code_block, text))
+            before = "-"
+            if size <= REFERENCE_MAX_SIZE:
+                before = f"{best_time(regex_extract_and_select_best_code_block, text) * 1000:.2f}"
+            print(f"{size:>7} {len(text):>9} {before:>9} {times[-1] * 1000:>11.2f}")
+        growth = times[-1] / times[-2]
+        print(f"growth of the last doubling: {growth:.2f}")
+        if growth > MAX_GROWTH:
+            super_linear.append(name)
+
+    print(f"\nsuper-linear cases: {', '.join(super_linear) or 'none'}")
+    if super_linear:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
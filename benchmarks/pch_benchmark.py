@@ -0,0 +1,58 @@
+#############################################################################################################################
+# Program: benchmarks/pch_benchmark.py                                                                                      #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks compiling typical C++ submissions with and without the precompiled standard         #
+# headers. Run it from the project root with:                                                                               #
+#     python -m benchmarks.pch_benchmark                                                                                    #
+#############################################################################################################################
+
+import os
+import tempfile
+import time
+from Checks.dynamic_analysis.run_valgrind_check import compile_program
+from Checks.dynamic_analysis.pch_cache import build_precompiled_headers
+
+RUNS = 10                   # Compilations per variant
+
+PROGRAM = """#include <algorithm>
+#include <iostream>
+#include <string>
+#include <vector>
+
+int main() {
+    std::vector<std::string> words = {"pear", "apple", "fig"};
+    std::sort(words.begin(), words.end());
+    for (const auto &word : words) {
+        std::cout << word << "\\n";
+    }
+    return 0;
+}
+"""
+
+def time_compiles(path, use_pch):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        compile_program(path, use_cache=False, use_pch=use_pch)
+    return (time.perf_counter() - start) / RUNS
+
+def main():
+    start = time.perf_counter()
+    built = build_precompiled_headers()
+    startup = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "main.cpp")
+        with open(path, "w") as f:
+            f.write(PROGRAM)
+        plain = time_compiles(path, use_pch=False)
+        precompiled = time_compiles(path, use_pch=True)
+
+    print(f"{RUNS} compilations of a C++ program including <algorithm>, <iostream>, <string> and <vector>")
+    print(f"without precompiled headers: {plain * 1000:.0f} ms/compile")
+    print(f"with precompiled headers:    {precompiled * 1000:.0f} ms/compile ({built} header sets built in {startup:.1f}s)")
+
+if __name__ == "__main__":
+    main()
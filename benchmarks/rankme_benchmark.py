@@ -0,0 +1,76 @@
+#############################################################################################################################
+# Program: benchmarks/rankme_benchmark.py                                                                                   #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks the RankMe engine against the former scikit-learn implementation (CountVectorizer,   #
+# randomized TruncatedSVD and a per-probability entropy loop) on generated programs of increasing size, and reports the     #
+# largest relative score difference, and then batched scoring of many candidates against one call per candidate. Run it     #
+# from the project root with:                                                                                               #
+#     python -m benchmarks.rankme_benchmark                                                                                 #
+#############################################################################################################################
+
+import time
+from collections import Counter
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.decomposition import TruncatedSVD
+from Checks.rankme.rankme import preprocess_text, filter_tokens, compute_rankme_score, compute_rankme_scores
+
+PROGRAM_LINES = [20, 200, 2000]         # Lines of the generated programs
+BATCH_SIZES = [10, 100, 1000]           # Candidates per batch
+BATCH_LINES = 30                        # Lines of every candidate
+SECONDS = 1.0                           # Minimum measuring time per variant
+
+def sklearn_rankme_score(texts):
+    # The implementation the engine replaced
+    entropies = []
+    for text in texts:
+        token_counts = Counter(filter_tokens(text.split()))
+        if token_counts:
+            total = sum(token_counts.values())
+            entropies.append(-sum(c / total * np.log(c / total) for c in token_counts.values()))
+    avg_entropy = np.mean(entropies) if entropies else 0
+    svd = TruncatedSVD(n_components=1)
+    svd.fit(CountVectorizer(stop_words=None).fit_transform(texts))
+    return np.exp(avg_entropy) * svd.singular_values_[0]
+
+def program(lines, variant=0):
+    statements = [
+        "int total_{i} = compute(values, {i}) + offset;",
+        "if (total_{i} > limit) {{ limit = total_{i} * 2; }}",
+        "for (int k = 0; k < size; k++) {{ values[k] += k * {i}; }}",
+        "printf(\"%d\\n\", total_{i});",
+        "return_value = merge(left_{i}, right_{i}, buffer);",
+    ]
+    return "\n".join(statements[i % len(statements)].format(i=(i + variant) % 50) for i in range(lines))
+
+def time_per_call(score, texts):
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        score(texts)
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+def main():
+    print(f"{'lines':>6} {'sklearn ms':>11} {'engine ms':>10} {'speedup':>8} {'rel diff':>9}")
+    for lines in PROGRAM_LINES:
+        texts = preprocess_text(program(lines))
+        before = time_per_call(sklearn_rankme_score, texts)
+        after = time_per_call(compute_rankme_score, texts)
+        expected = sklearn_rankme_score(texts)
+        difference = abs(compute_rankme_score(texts) - expected) / expected
+        print(f"{lines:>6} {before * 1000:>11.2f} {after * 1000:>10.2f} {before / after:>7.1f}x {difference:>9.1e}")
+
+    print(f"\n{'batch':>6} {'single ms':>10} {'batch ms':>9} {'speedup':>8} {'rel diff':>9}")
+    for size in BATCH_SIZES:
+        candidates = [preprocess_text(program(BATCH_LINES, variant)) for variant in range(size)]
+        before = time_per_call(lambda batch: [compute_rankme_score(texts) for texts in batch], candidates)
+        after = time_per_call(compute_rankme_scores, candidates)
+        singles = [compute_rankme_score(texts) for texts in candidates]
+        difference = max(abs(a - b) / b for a, b in zip(compute_rankme_scores(candidates), singles))
+        print(f"{size:>6} {before * 1000:>10.2f} {after * 1000:>9.2f} {before / after:>7.1f}x {difference:>9.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#############################################################################################################################
+# Program: benchmarks/rankme_streaming_benchmark.py                                                                         #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks the streaming RankMe mode against the exact engine on generated submissions of       #
+# several megabytes, and reports their time, their peak traced memory beyond the input text and the relative score          #
+# difference. Run it from the project root with:                                                                            #
+#     python -m benchmarks.rankme_streaming_benchmark                                                                       #
+#############################################################################################################################
+
+import time
+import tracemalloc
+from Checks.rankme.rankme import preprocess_text, compute_rankme_score, compute_rankme_score_streaming
+
+SUBMISSION_MEGABYTES = [1, 4, 8]        # Sizes of the generated submissions
+
+def submission(megabytes):
+    statements = [
+        "int total_{i} = compute(values_{j}, {i}) + offset_{k};",
+        "if (total_{i} > limit_{k}) {{ limit_{k} = total_{i} * 2; }}",
+        "for (int k = 0; k < size_{j}; k++) {{ values_{j}[k] += k * {i}; }}",
+        "printf(\"%d\\n\", total_{i});",
+        "result_{k} = merge(left_{j}, right_{i}, buffer_{k});",
+    ]
+    lines, size, i = [], 0, 0
+    while size < megabytes * 1024**2:
+        line = statements[i % len(statements)].format(i=i % 5000, j=i % 97, k=i % 13)
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    return "\n".join(lines)
+
+def measure(score, text):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = score(text)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, seconds, peak
+
+def main():
+    print(f"{'MB':>3} {'exact s':>8} {'exact MiB':>10} {'stream s':>9} {'stream MiB':>11} {'rel diff':>9}")
+    for megabytes in SUBMISSION_MEGABYTES:
+        text = submission(megabytes)
+        exact, exact_seconds, exact_peak = measure(lambda text: compute_rankme_score(preprocess_text(text)), text)
+        streamed, stream_seconds, stream_peak = measure(compute_rankme_score_streaming, text)
+        print(
+            f"{megabytes:>3} {exact_seconds:>8.2f} {exact_peak / 1024**2:>10.1f} "
+            f"{stream_seconds:>9.2f} {stream_peak / 1024**2:>11.1f} {abs(streamed - exact) / exact:>9.1e}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#############################################################################################################################
+# Program: benchmarks/sonar_client_benchmark.py                                                                             #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks fetching SonarQube reports against the local stub server, comparing one-off          #
+# requests.get calls with the pooled client. Run it from the project root with:                                             #
+#     python -m benchmarks.sonar_client_benchmark                                                                           #
+#############################################################################################################################
+
+import time
+import requests
+from requests.auth import HTTPBasicAuth
+from Checks.static_analysis.run_sonarqube_check import SonarQubeClient, SONAR_METRICS
+from tests.sonar_stub import SonarStubServer
+
+REPORTS = 500               # Reports fetched per variant
+
+def fetch_unpooled(url, project_key):
+    # The original access pattern: a fresh connection per request, no timeout, no retry
+    auth = HTTPBasicAuth("user", "password")
+    requests.get(f"{url}/api/components/search?qualifiers=TRK&componentKeys={project_key}", auth=auth).json()
+    requests.get(f"{url}/api/measures/component?component={project_key}&metricKeys={SONAR_METRICS}", auth=auth).json()
+
+def main():
+    with SonarStubServer() as stub:
+        start = time.perf_counter()
+        for i in range(REPORTS):
+            fetch_unpooled(stub.url, f"project-{i}")
+        unpooled = time.perf_counter() - start
+        unpooled_connections = len(stub.connections)
+
+        stub.connections.clear()
+        client = SonarQubeClient(stub.url, "user", "password")
+        start = time.perf_counter()
+        for i in range(REPORTS):
+            client.fetch_report(f"project-{i}")
+        pooled = time.perf_counter() - start
+        pooled_connections = len(stub.connections)
+
+    print(f"{REPORTS} reports, 2 requests each")
+    print(f"unpooled requests.get: {unpooled:.3f}s ({unpooled / REPORTS * 1000:.2f} ms/report, {unpooled_connections} connections)")
+    print(f"pooled client:         {pooled:.3f}s ({pooled / REPORTS * 1000:.2f} ms/report, {pooled_connections} connections)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#############################################################################################################################
+# Program: benchmarks/startup_benchmark.py                                                                                  #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks the cold import of the server, as paid by every start and by every forked or         #
+# recycled worker, in fresh interpreters. It reports the median import time, the slowest modules by cumulative import time  #
+# and the deferred dependencies, and exits with status 1 if the import exceeds STARTUP_BUDGET or loads a deferred one.      #
+# Run it from the project root with:                                                                                        #
+#     python -m benchmarks.startup_benchmark                                                                                #
+#############################################################################################################################
+
+import sys
+import json
+import statistics
+import subprocess
+
+RUNS = 15                                                       # Fresh interpreters measured
+STARTUP_BUDGET = 0.35                                           # Seconds the median import of main.py may take
+DEFERRED = ("sklearn", "numpy", "scipy", "requests", "yaml")    # Packages only loaded on first use
+TOP_MODULES = 10                                                # Slowest modules reported
+
+SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+def import_run(importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", SCRIPT]
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.splitlines()[-1]), output.stderr
+
+def slowest_modules(importtime_output):
+    # "import time: self [us] | cumulative | imported package" lines of -X importtime
+    modules = []
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].strip()))
+    return sorted(modules, reverse=True)[:TOP_MODULES]
+
+def main():
+    runs = [import_run()[0] for _ in range(RUNS)]
+    seconds = statistics.median(run["seconds"] for run in runs)
+    loaded = sorted(set(runs[0]["modules"]) & set(DEFERRED))
+
+    print(f"import main: median {seconds * 1000:.1f} ms over {RUNS} runs (budget {STARTUP_BUDGET * 1000:.0f} ms)")
+    print(f"deferred packages loaded at import: {', '.join(loaded) or 'none'}")
+    print(f"\n{'cumulative ms':>14}  module")
+    for microseconds, module in slowest_modules(import_run(importtime=True)[1]):
+        print(f"{microseconds / 1000:>14.1f}  {module}")
+
+    if seconds > STARTUP_BUDGET or loaded:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#############################################################################################################################
+# Program: benchmarks/valgrind_xml_benchmark.py                                                                             #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program benchmarks the incremental Valgrind XML parser on synthetic output of increasingly noisy        #
+# programs, reporting parse time and peak memory. Run it from the project root with:                                        #
+#     python -m benchmarks.valgrind_xml_benchmark                                                                           #
+#############################################################################################################################
+
+import time
+import tracemalloc
+from Checks.dynamic_analysis.valgrind_xml import ValgrindXmlParser, VALGRIND_READ_SIZE
+
+ERROR_COUNTS = [1000, 10000, 50000]     # Errors in the synthetic outputs
+
+def error_xml(i):
+    frames = "".join(
+        f"<frame><ip>0x{i + depth:x}</ip><obj>/tmp/a.out</obj><fn>function_{(i + depth) % 5000}</fn>"
+        f"<file>main.c</file><line>{depth + 1}</line></frame>"
+        for depth in range(12)
+    )
+    return (
+        f"<error><unique>0x{i:x}</unique><tid>1</tid><kind>Leak_DefinitelyLost</kind>"
+        f"<xwhat><text>16 bytes in 1 blocks are definitely lost in loss record {i}</text>"
+        f"<leakedbytes>16</leakedbytes><leakedblocks>1</leakedblocks></xwhat><stack>{frames}</stack></error>\n"
+    )
+
+def chunks(errors):
+    # Generated lazily, as Valgrind would write it to the pipe
+    buffer = "<?xml version=\"1.0\"?>\n<valgrindoutput><tool>memcheck</tool>\n"
+    for i in range(errors):
+        buffer += error_xml(i)
+        if len(buffer) >= VALGRIND_READ_SIZE:
+            yield buffer.encode()
+            buffer = ""
+    yield (buffer + "</valgrindoutput>\n").encode()
+
+def main():
+    print(f"{'errors':>8} {'XML MB':>8} {'parse s':>8} {'peak KB':>8} {'records':>8}")
+    for errors in ERROR_COUNTS:
+        size = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        parser = ValgrindXmlParser()
+        for chunk in chunks(errors):
+            size += len(chunk)
+            parser.feed(chunk)
+        output = parser.close()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        records = sum(output["error_count"].values())
+        print(f"{errors:>8} {size / 1024**2:>8.1f} {elapsed:>8.2f} {peak / 1024:>8.0f} {records:>8}")
+
+if __name__ == "__main__":
+    main()
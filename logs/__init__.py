@@ -1,34 +1,39 @@
 import logging
 from pathlib import Path
 
+LOG_DIR = Path(__file__).parent             # The logs package directory, which always exists
+
+def _configure_root_logger(file_name):
+    # Like logging.basicConfig(filename=...), but the file is only opened on the first record
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            handlers=[logging.FileHandler(LOG_DIR / file_name, delay=True)],
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
 def setup_logger():
     """
-    Sets up the logger for application-specific logging.
+    Sets up the logger for application-specific logging. Nothing is written to disk until the first record,
+    so modules can call this at import time.
     """
-    log_file_path = Path(__file__).parent.parent / 'logs' / 'app.log'
-    log_file_path.parent.mkdir(parents=True, exist_ok=True)
-    logging.basicConfig(
-        filename=log_file_path,
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    _configure_root_logger('app.log')
     return logging.getLogger('app_logger')
 
 def setup_global_logger():
     """
     Sets up the global logger for shared logging purposes.
     """
-    log_file_path = Path(__file__).parent.parent / 'logs' / 'logs.txt'
-    log_file_path.parent.mkdir(parents=True, exist_ok=True)
-    logging.basicConfig(
-        filename=log_file_path, 
-        level=logging.INFO, 
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    _configure_root_logger('logs.txt')
     return logging.getLogger('global_logger')
 
-# Initialize and expose loggers
-app_logger = setup_logger()
-global_logger = setup_global_logger()
+def __getattr__(name):
+    # The shared loggers are set up on first use instead of at import
+    loggers = {"app_logger": setup_logger, "global_logger": setup_global_logger}
+    if name not in loggers:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    logger = loggers[name]()
+    globals()[name] = logger
+    return logger
 
 __all__ = ["setup_logger", "setup_global_logger", "app_logger", "global_logger"]
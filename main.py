@@ -14,4 +14,8 @@ app = Flask(__name__)
 app.register_blueprint(app_routes)  
 
 if __name__ == "__main__":
+    # Only the server process builds the precompiled headers; importing the app (e.g. in a worker) does not
+    from Checks.dynamic_analysis.pch_cache import start_precompiled_header_build, PCH_COMPILER_TARGETS
+    from Checks.static_analysis.run_clangtidy_check import clang_tidy_pch_targets
+    start_precompiled_header_build(PCH_COMPILER_TARGETS + clang_tidy_pch_targets())
     app.run(host = "0.0.0.0", port = 5000)
\ No newline at end of file
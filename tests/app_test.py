@@ -9,9 +9,22 @@
 
 from app.get_code import extract_and_select_best_code_block
 from app.utils import calculate_scores
+from app.check_graph import CheckNode, run_check_graph
+from app.jobs import JobManager
+from app.cache import ResultCache, make_cache_key
+from app.workspace import request_workspace
+from app.utils import save_code_to_temp
+from app import routes
 from difflib import SequenceMatcher
 from pathlib import Path
+import os
 import json
+import time
+import queue
+import tempfile
+import threading
+import subprocess
+import sys
 
 def normalize_code(code):
     """
@@ -362,6 +375,29 @@ def test_extract_and_select_best_code_block():
     if code_1_passed and code_2_passed and code_3_passed and code_4_passed and code_5_passed and code_6_passed and code_7_passed and code_8_passed:
         print("Code extraction and valadation tests passed!")
 
+def test_code_extraction_selection_and_adversarial_inputs():
+    """
+    Test block selection after a keyword, language tags and unclosed fences, the plain code fallback, and the
+    results on adversarial inputs of about a megabyte, which made the former regex scans restart at every line.
+    Their linear time is checked by benchmarks/get_code_benchmark.py.
+    """
+    text = "Here is a first attempt:\n```python\nx = 1\n```\nAn optimized version:\n```c++\nx = 2\n```\n```python\nx = 3\n```"
+    assert extract_and_select_best_code_block(text) == "c++\nx = 2"
+    assert extract_and_select_best_code_block("```python\nx = 1\ny = 2\n```\nrevised:\n```python\nx = 1\n```") == "x = 1"
+    assert extract_and_select_best_code_block("```c\nint x;\n```\nThe corrected code:\n```c\nint y;") == "int x;"
+    assert extract_and_select_best_code_block("Use this:\n    def f(a):\n        return a\nthanks") == "def f(a):\n        return a\nthanks"
+    assert extract_and_select_best_code_block("if ready\nfor x in y\ndef g(\nreturn 1") == "return 1"
+    assert extract_and_select_best_code_block("") == ""
+
+    adversarial_inputs = [
+        ("for item in items\n" * 60000 + "return x", "return x"),
+        ("def f(\n" * 150000 + "return x", "return x"),
+        ("Updated code:\n```python\nx = 1\n```\n" * 30000, "x = 1"),
+        ("".join(f"```\nx_{i} = {i}\n```\n" for i in range(30000)) + "revised " * 30000, "x_0 = 0"),
+    ]
+    for text, expected in adversarial_inputs:
+        assert extract_and_select_best_code_block(text) == expected
+
 def utility_tests():
     """
     Utility tests.
@@ -373,8 +409,189 @@ def utility_tests():
     assert 0 <= scores["final_score"] <= 10
     print("Utility tests passed!")
 
+def test_check_graph_runs_independent_checks_concurrently():
+    """
+    Test that independent checks overlap instead of running one after another.
+    """
+    nodes = [CheckNode(f"sleep_{i}", time.sleep, args=(0.3,)) for i in range(4)]
+    start = time.perf_counter()
+    results, statuses = run_check_graph(nodes)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.9
+    assert set(results) == {"sleep_0", "sleep_1", "sleep_2", "sleep_3"}
+
+def test_check_graph_passes_results_and_skips_failed_dependencies():
+    """
+    Test that dependency results are forwarded and dependents of a failed check are skipped.
+    """
+    def fail():
+        raise RuntimeError("compile error")
+
+    nodes = [
+        CheckNode("compile", lambda: "a.out"),
+        CheckNode("run", lambda binary: {"status": "success", "binary": binary}, deps=("compile",), pass_results=True),
+        CheckNode("broken", fail),
+        CheckNode("after_broken", lambda: "never", deps=("broken",), skip_result={"status": "failure"}),
+        CheckNode("after_after", lambda: "never", deps=("after_broken",)),
+    ]
+    results, statuses = run_check_graph(nodes)
+    assert results["run"]["binary"] == "a.out"
+    assert statuses["broken"] == "failure"
+    assert statuses["after_broken"] == "skipped" and results["after_broken"] == {"status": "failure"}
+    assert statuses["after_after"] == "skipped"
+
+def wait_for_job(manager, job_id, timeout=5):
+    """
+    Poll a job until it leaves the queued/running states.
+
+    params:
+        manager (JobManager): The job manager.
+        job_id (str): The id of the job to wait for.
+        timeout (float): Seconds to wait before giving up.
+
+    returns:
+        job (dict): The last job snapshot.
+    """
+    deadline = time.time() + timeout
+    job = manager.get(job_id)
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+        job = manager.get(job_id)
+    return job
+
+def test_job_manager_runs_jobs_and_expires_results():
+    """
+    Test that submitted jobs return immediately, complete in the background and expire after the TTL.
+    """
+    manager = JobManager(workers=1, queue_size=4, result_ttl=0.2)
+    job_id = manager.submit(lambda data: ({"echo": data}, 200), {"code": 1})
+    job = wait_for_job(manager, job_id)
+    assert job["status"] == "done"
+    assert job["result"] == {"echo": {"code": 1}}
+
+    failed_id = manager.submit(lambda: ({"error": "bad input"}, 400))
+    assert wait_for_job(manager, failed_id)["status"] == "failed"
+
+    time.sleep(0.3)
+    assert manager.get(job_id) is None
+
+def test_job_manager_rejects_when_queue_is_full():
+    """
+    Test that the bounded queue rejects submissions instead of growing without limit.
+    """
+    release = threading.Event()
+    manager = JobManager(workers=1, queue_size=1)
+    blocking_id = manager.submit(lambda: (release.wait(), 200))
+    while manager.get(blocking_id)["status"] == "queued":
+        time.sleep(0.01)
+    manager.submit(lambda: ({}, 200))
+    try:
+        manager.submit(lambda: ({}, 200))
+        assert False, "Expected the queue to be full"
+    except queue.Full:
+        pass
+    finally:
+        release.set()
+
+def test_result_cache_tiers_and_eviction():
+    """
+    Test the in-memory LRU tier, persistence of the on-disk tier and size-bounded eviction.
+    """
+    key_a = make_cache_key("print(1)", "Python", "python static analysis", "mypy 1.13", "")
+    key_b = make_cache_key("print(1)\r\n", "Python", "python static analysis", "mypy 1.14", "")
+    assert key_a != key_b
+    assert key_a == make_cache_key("print(1)", "Python", "python static analysis", "mypy 1.13", "")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory=directory, memory_entries=1, disk_bytes=10_000)
+        cache.put(key_a, {"status": "success"})
+        cache.put(key_b, {"status": "failure"})
+        assert cache.get(key_b) == {"status": "failure"}
+        assert cache.get(key_a) == {"status": "success"}               # Evicted from memory, served from disk
+        assert cache.get("missing") is None
+        stats = cache.stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+        restarted = ResultCache(directory=directory, disk_bytes=10_000)
+        assert restarted.get(key_b) == {"status": "failure"}
+
+        small = ResultCache(directory=directory, disk_bytes=40)
+        small.put(key_a, {"output": "x" * 30})
+        assert small.stats()["disk_bytes"] <= 40
+        assert small.stats()["evictions"] >= 1
+
+def test_request_workspaces_are_isolated_and_removed():
+    """
+    Test that each request gets its own workspace and that it is removed as a unit.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        with request_workspace(root) as first, request_workspace(root) as second:
+            assert first != second
+            code_file = save_code_to_temp("print(1)", "Python", first)
+            assert os.path.dirname(code_file) == first
+            assert os.listdir(second) == []
+        assert not os.path.exists(first) and not os.path.exists(second)
+
+def test_dynamic_analysis_selection_follows_request_and_load():
+    """
+    Test that a request can choose its dynamic analysis, that unsupported choices fall back to the default,
+    and that C and C++ switch to the sanitizers while the job queue is loaded.
+    """
+    assert routes.select_dynamic_analysis("Python") == "native"
+    assert routes.select_dynamic_analysis("Python", "valgrind") == "valgrind"
+    assert routes.select_dynamic_analysis("C++", "sanitizers") == "sanitizers"
+    assert routes.select_dynamic_analysis("Java", "sanitizers") == "valgrind"
+    assert routes.select_dynamic_analysis("Go") is None
+
+    original_depth = routes.LOAD_QUEUE_DEPTH
+    try:
+        assert routes.select_dynamic_analysis("C") == "valgrind"
+        routes.LOAD_QUEUE_DEPTH = 0
+        assert routes.select_dynamic_analysis("C") == "sanitizers"
+        assert routes.select_dynamic_analysis("C", "valgrind") == "valgrind"
+        assert routes.select_dynamic_analysis("Java") == "valgrind"
+    finally:
+        routes.LOAD_QUEUE_DEPTH = original_depth
+
+STARTUP_SCRIPT = """
+import os, sys, json
+HEAVY = ("sklearn", "numpy", "scipy", "requests", "yaml")
+loaded = lambda: sorted({name.split(".")[0] for name in sys.modules} & set(HEAVY))
+import main
+report = {"import": loaded(), "files": sorted(os.listdir("."))}
+client = main.app.test_client()
+payload = {"mode": "mode_1", "model": "m", "generated_code": "```c\\nint main(void) { return 0; }\\n```", "language": "C"}
+report["status"] = [client.post("/analyze", json=payload).status_code, client.post("/analyze/batch", json=[payload]).status_code]
+report["mode_1"] = loaded()
+print(json.dumps(report))
+"""
+
+def test_server_startup_and_mode_1_load_no_heavy_dependencies():
+    """
+    Test that importing the server has no side effects on disk, and that neither importing it nor serving
+    mode_1 requests loads scikit-learn, the RankMe stack (NumPy, SciPy), requests or PyYAML.
+    """
+    root = str(Path(__file__).resolve().parent.parent)
+    with tempfile.TemporaryDirectory() as work_dir:
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=work_dir, env=dict(os.environ, PYTHONPATH=root),
+            capture_output=True, text=True, check=True
+        )
+    report = json.loads(output.stdout.splitlines()[-1])
+    assert report["import"] == [] and report["files"] == []
+    assert report["status"] == [200, 200]
+    assert report["mode_1"] == []
 
 # Run the tests
 if __name__ == "__main__":
     test_extract_and_select_best_code_block()
-    utility_tests()
\ No newline at end of file
+    test_code_extraction_selection_and_adversarial_inputs()
+    utility_tests()
+    test_check_graph_runs_independent_checks_concurrently()
+    test_check_graph_passes_results_and_skips_failed_dependencies()
+    test_job_manager_runs_jobs_and_expires_results()
+    test_job_manager_rejects_when_queue_is_full()
+    test_result_cache_tiers_and_eviction()
+    test_request_workspaces_are_isolated_and_removed()
+    test_dynamic_analysis_selection_follows_request_and_load()
+    test_server_startup_and_mode_1_load_no_heavy_dependencies()
@@ -7,15 +7,61 @@
 # Description: This program contains unit tests for the checks.                                                             #                                                                                                 
 #############################################################################################################################
 
-from Checks.dynamic_analysis.run_valgrind_check import run_valgrind_check
+from Checks.dynamic_analysis.run_valgrind_check import run_valgrind_check, compile_program
+from Checks.dynamic_analysis import compile_cache
+from Checks.dynamic_analysis import pch_cache
+from Checks.dynamic_analysis.valgrind_xml import MemoryIssueRecords, ValgrindXmlParser, run_valgrind_xml
+from Checks.dynamic_analysis import deadline
+from Checks.dynamic_analysis.deadline import run_with_deadline
+from Checks.dynamic_analysis.python_runtime import run_python_runtime_check
+from Checks.dynamic_analysis import sanitizers
+from Checks.dynamic_analysis.sanitizers import run_sanitizer_check, parse_sanitizer_reports
 from Checks.formal_verification.run_dafny_check import run_dafny_code
-from Checks.rankme.rankme import preprocess_text, compute_rankme_score
+from Checks.formal_verification.dafny_server import DafnyServer
+from Checks.formal_verification.dafny_incremental import MemberCache, split_dafny_members, verify_incrementally
+from Checks.rankme.rankme import (
+    preprocess_text, 
+    filter_tokens, 
+    compute_entropy, 
+    compute_text_entropy, 
+    compute_rankme_score,
+    compute_rankme_scores
+)
+from Checks.rankme.engine import top_singular_value, rankme_scores, RANKME_SCORE_TOLERANCE
+from Checks.rankme.streaming import iter_segments, StreamingRankMe, streaming_rankme_score
 from Checks.static_analysis.run_clangtidy_check import run_clang_tidy
-from Checks.static_analysis.run_py_check import run_pystatic_analysis
-from Checks.static_analysis.run_sonarqube_check import run_sonar_scanner
+from Checks.static_analysis import run_clangtidy_check
+from Checks.static_analysis.run_py_check import (
+    run_pystatic_analysis,
+    run_pystatic_analysis_batch,
+    parse_mypy_output,
+    parse_pylint_output,
+    parse_bandit_output,
+)
+from Checks.static_analysis.py_workers import PyCheckWorkerPool
+from Checks.static_analysis.mypy_daemon import MypyDaemon
+from Checks.static_analysis.run_sonarqube_check import (
+    run_sonar_scanner,
+    run_sonarqube_analysis,
+    fetch_detailed_report,
+    SonarQubeClient,
+)
+from Checks.static_analysis import run_sonarqube_check
+from tests.sonar_stub import SonarStubServer
+from app.utils import calculate_scores
 import subprocess
+import json
+import numpy as np
+import scipy.sparse
+from collections import Counter
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
 import sys
+import tempfile
+import tracemalloc
+import io
 from logs import setup_logger
 
 # Set up logger
@@ -98,10 +144,946 @@ def test_run_sonar_scanner():
     except subprocess.CalledProcessError as e:
         logger.error(f"An error occurred while running SonarQube: {e}")
 
+def test_run_pystatic_analysis_batch():
+    """
+    Test that one batch invocation per tool reports the same per-file verdicts and scores as single-file runs.
+    """
+    sources = {
+        "clean.py": '"""Module."""\n\n\ndef add(a: int, b: int) -> int:\n    """Add."""\n    return a + b\n',
+        "typed.py": "def f(x: int) -> str:\n    return x\n",
+        "shell.py": "import subprocess\nsubprocess.call('ls', shell=True)\n",
+        "matches.py": (
+            "def describe(value):\n    match value:\n        case 0:\n            return 'zero'\n"
+            "        case 1:\n            return 'one'\n        case _:\n            return 'many'\n"
+            "print(describe(3))\n"
+        ),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for name, source in sources.items():
+            path = os.path.join(directory, name)
+            with open(path, "w") as f:
+                f.write(source)
+            paths.append(path)
+
+        batch = run_pystatic_analysis_batch(paths)
+        for path in paths:
+            single = run_pystatic_analysis(path)
+            assert single[0]["counts"] == batch[path][0]["counts"]
+            assert single[1]["score"] == batch[path][1]["score"]
+            assert single[1]["counts"] == batch[path][1]["counts"]
+            assert single[2]["counts"] == batch[path][2]["counts"]
+
+def test_compile_program_writes_binary_next_to_source():
+    """
+    Test that concurrent compilations in separate workspaces do not share a binary path.
+    """
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        binaries = []
+        for directory in (first, second):
+            source = os.path.join(directory, "main.c")
+            with open(source, "w") as f:
+                f.write("int main(void) { return 0; }\n")
+            binaries.append(compile_program(source))
+        assert os.path.dirname(binaries[0]) == first and os.path.dirname(binaries[1]) == second
+        assert all(os.path.isfile(binary) for binary in binaries)
+
+def test_compile_cache_reuses_and_evicts_binaries():
+    """
+    Test that byte-identical sources reuse the cached binary and that the cache respects its size cap.
+    """
+    original_dir = compile_cache.COMPILE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as workspace:
+        compile_cache.COMPILE_CACHE_DIR = cache_dir
+        try:
+            source = os.path.join(workspace, "main.c")
+            with open(source, "w") as f:
+                f.write("int main(void) { return 0; }\n")
+            key = compile_cache.compile_cache_key(source, "gcc", [])
+            assert key != compile_cache.compile_cache_key(source, "gcc", ["-O2"])
+
+            binary = compile_program(source)
+            os.remove(binary)
+            assert compile_cache.fetch_cached_binary(key, binary)
+            assert subprocess.run([binary]).returncode == 0
+
+            compile_cache.evict_binaries(cache_dir, max_bytes=0)
+            assert not compile_cache.fetch_cached_binary(key, binary)
+        finally:
+            compile_cache.COMPILE_CACHE_DIR = original_dir
+
+def test_py_worker_pool_matches_subprocess_and_recycles():
+    """
+    Test that warm workers report the same pylint score and bandit verdict as the command line tools,
+    and that a worker is replaced after serving its maximum number of jobs.
+    """
+    pool = PyCheckWorkerPool(size=1, max_jobs=2)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "shell.py")
+        with open(path, "w") as f:
+            f.write("import subprocess\nsubprocess.call('ls', shell=True)\n")
+        try:
+            pylint_result = pool.run("pylint", path)
+            first_worker = pool._idle.queue[-1]
+            bandit_result = pool.run("bandit", path)
+            assert pool._idle.empty() and not first_worker.process.is_alive()
+
+            cli_pylint = subprocess.run(["pylint", "-f", "json2", path], capture_output=True, text=True).stdout
+            cli_bandit = subprocess.run(["bandit", "-f", "json", "-q", path], capture_output=True, text=True).stdout
+            assert pylint_result["tool"] == "pylint" and bandit_result["tool"] == "bandit"
+            assert parse_pylint_output(pylint_result["output"]) == parse_pylint_output(cli_pylint)
+            assert parse_bandit_output(bandit_result["output"]) == parse_bandit_output(cli_bandit)
+            assert "B602" in [message["test_id"] for message in parse_bandit_output(bandit_result["output"])["messages"]]
+        finally:
+            pool.close()
+
+def test_mypy_daemon_matches_cold_run_and_restarts():
+    """
+    Test that the mypy daemon reports the same errors as a cold mypy run, restarts after being killed,
+    and leaves files it cannot check safely (syntax errors, reused module names) to a cold run.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        daemon = MypyDaemon(status_file=os.path.join(directory, "dmypy.json"), cache_dir=os.path.join(directory, "cache"))
+        typed = os.path.join(directory, "temp_code_typed.py")
+        with open(typed, "w") as f:
+            f.write("def f(x: int) -> str:\n    return x\n")
+        broken = os.path.join(directory, "temp_code_broken.py")
+        with open(broken, "w") as f:
+            f.write("def f(:\n")
+        try:
+            cold = subprocess.run(["mypy", "--ignore-missing-imports", "-O", "json", typed], capture_output=True, text=True).stdout
+            assert daemon.check(typed) == cold
+
+            subprocess.run(["dmypy", "--status-file", daemon.status_file, "kill"], capture_output=True)
+            assert daemon.check(typed) == cold
+
+            assert daemon.check(broken) is None
+            os.makedirs(os.path.join(directory, "other"))
+            reused = os.path.join(directory, "other", "temp_code_typed.py")
+            with open(reused, "w") as f:
+                f.write("x: int = 1\n")
+            assert daemon.check(reused) is None
+        finally:
+            daemon.stop()
+
+def test_parse_py_tool_outputs():
+    """
+    Test that JSON tool outputs, including mypy's textual blocking errors, parse into compact records
+    and that unexpected output is rejected instead of misparsed.
+    """
+    mypy = parse_mypy_output(
+        '{"file": "a.py", "line": 2, "column": 11, "message": "Bad return", "hint": null, "code": "return-value", "severity": "error"}\n'
+        'b.py:1: error: invalid syntax  [syntax]\n'
+        'Found 2 errors in 2 files (errors prevented further checking)\n'
+    )
+    assert mypy["counts"] == {"error": 2, "note": 0}
+    assert mypy["messages"][1] == {"file": "b.py", "line": 1, "column": 0, "severity": "error", "code": "syntax", "message": "invalid syntax"}
+    assert parse_mypy_output("")["counts"]["error"] == 0
+
+    pylint = parse_pylint_output(json.dumps({
+        "messages": [{"path": "a.py", "line": 1, "column": 0, "messageId": "C0114", "symbol": "missing-module-docstring",
+                      "message": "Missing module docstring", "type": "convention"}],
+        "statistics": {"messageTypeCount": {"convention": 1}, "modulesLinted": 1, "score": 5.0},
+    }))
+    assert pylint["score"] == 5.0 and pylint["counts"]["convention"] == 1 and pylint["counts"]["error"] == 0
+
+    for parser, output in ((parse_mypy_output, "mypy: can't read file"), (parse_pylint_output, "Your code has been rated at 10/10")):
+        try:
+            parser(output)
+            assert False, "expected a ValueError"
+        except ValueError:
+            pass
+
+def test_sonar_client_waits_for_task_and_retries():
+    """
+    Test that the SonarQube client waits for the compute engine task before fetching measures,
+    retries transient server errors, reuses its connection, and reports failed tasks as missing reports.
+    """
+    with SonarStubServer(pending_polls=2, failures=1) as stub:
+        client = SonarQubeClient(stub.url, "user", "password", retries=2, backoff=0)
+        task = client.wait_for_task("task-1", poll_interval=0.01)
+        assert task["status"] == "SUCCESS"
+        report = client.fetch_report("project")
+        assert report["components"][0]["key"] == "project"
+        assert {m["metric"] for m in report["measures"]} >= {"bugs", "vulnerabilities"}
+
+        paths = [path for path, _ in stub.requests]
+        assert paths == ["/api/ce/task"] * 4 + ["/api/components/search", "/api/measures/component"]
+        assert len(stub.connections) == 1
+
+        try:
+            client.wait_for_task("task-2", poll_interval=0.01, timeout=0.015)
+            assert False, "expected a TimeoutError"
+        except TimeoutError:
+            pass
+
+    original_url = run_sonarqube_check.SONARQUBE_URL
+    with SonarStubServer(task_status="FAILED") as stub:
+        run_sonarqube_check.SONARQUBE_URL = stub.url
+        try:
+            assert fetch_detailed_report("project", "user", "password", {"ceTaskId": "task-3"}) is None
+            assert [path for path, _ in stub.requests] == ["/api/ce/task"]
+        finally:
+            run_sonarqube_check.SONARQUBE_URL = original_url
+
+FAKE_SONAR_SCANNER = """#!/usr/bin/env python3
+import os, sys, json, time, uuid
+properties = dict(arg[2:].split("=", 1) for arg in sys.argv[1:])
+start = time.time()
+time.sleep(0.5)
+os.makedirs(properties["sonar.working.directory"], exist_ok=True)
+with open(os.path.join(properties["sonar.working.directory"], "scan.json"), "w") as f:
+    scan = {"cwd": os.getcwd(), "properties": properties, "token": os.environ.get("SONAR_TOKEN")}
+    json.dump(dict(scan, start=start, end=time.time()), f)
+with open(os.path.join(properties["sonar.working.directory"], "report-task.txt"), "w") as f:
+    f.write(f"projectKey={properties['sonar.projectKey']}\\nceTaskId={uuid.uuid4()}\\n")
+"""
+
+def test_sonarqube_scans_run_concurrently_in_their_own_directories():
+    """
+    Test that concurrent SonarQube scans each analyze only their own file, from their own directory,
+    under distinct project keys, without changing the server's working directory, and that the scanner
+    gets its token from its environment rather than its command line.
+    """
+    original = (run_sonarqube_check.SONAR_SCANNER_PATH, run_sonarqube_check.SONARQUBE_URL, run_sonarqube_check.SONAR_TOKEN)
+    with tempfile.TemporaryDirectory() as directory, SonarStubServer() as stub:
+        scanner = os.path.join(directory, "sonar-scanner")
+        with open(scanner, "w") as f:
+            f.write(FAKE_SONAR_SCANNER)
+        os.chmod(scanner, 0o755)
+        run_sonarqube_check.SONAR_SCANNER_PATH = scanner
+        run_sonarqube_check.SONARQUBE_URL = stub.url
+        run_sonarqube_check.SONAR_TOKEN = "scan-token"
+
+        files = []
+        for name in ("first", "second"):
+            os.makedirs(os.path.join(directory, name))
+            files.append(os.path.join(directory, name, "Main.java"))
+            with open(files[-1], "w") as f:
+                f.write("class Main {}\n")
+        cwd = os.getcwd()
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                reports = list(executor.map(lambda path: run_sonarqube_analysis(path, "user", "password"), files))
+        finally:
+            run_sonarqube_check.SONAR_SCANNER_PATH, run_sonarqube_check.SONARQUBE_URL, run_sonarqube_check.SONAR_TOKEN = original
+
+        assert os.getcwd() == cwd
+        assert all(report is not None for report in reports)
+
+        scans = []
+        for path in files:
+            with open(os.path.join(os.path.dirname(path), ".scannerwork", "scan.json")) as f:
+                scans.append(json.load(f))
+        assert max(scan["start"] for scan in scans) < min(scan["end"] for scan in scans)    # The scans overlapped
+        for path, scan in zip(files, scans):
+            assert os.path.realpath(scan["cwd"]) == os.path.realpath(os.path.dirname(path))
+            assert scan["properties"]["sonar.sources"] == "Main.java"
+            assert scan["token"] == "scan-token"
+            assert not any("scan-token" in value or "password" in key for key, value in scan["properties"].items())
+        assert scans[0]["properties"]["sonar.projectKey"] != scans[1]["properties"]["sonar.projectKey"]
+        assert {reports[0]["components"][0]["key"], reports[1]["components"][0]["key"]} == {
+            scan["properties"]["sonar.projectKey"] for scan in scans
+        }
+
+FAKE_DAFNY_SERVER = """#!/usr/bin/env python3
+import sys, json
+def send(message):
+    payload = json.dumps(message).encode()
+    sys.stdout.buffer.write(b"Content-Length: %d\\r\\n\\r\\n" % len(payload) + payload)
+    sys.stdout.buffer.flush()
+while True:
+    headers = {}
+    line = sys.stdin.buffer.readline()
+    while line.strip():
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+        line = sys.stdin.buffer.readline()
+    if not line:
+        break
+    message = json.loads(sys.stdin.buffer.read(int(headers["content-length"])))
+    if message.get("method") == "initialize":
+        send({"jsonrpc": "2.0", "id": "server-1", "method": "client/registerCapability", "params": {}})
+        send({"jsonrpc": "2.0", "id": message["id"], "result": {"capabilities": {}}})
+    elif message.get("method") == "textDocument/didOpen":
+        uri, text = message["params"]["textDocument"]["uri"], message["params"]["textDocument"]["text"]
+        if "crash" in text:
+            sys.exit(1)
+        if "method {" in text:
+            send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {"uri": uri, "diagnostics": [
+                {"range": {"start": {"line": 0, "character": 7}}, "severity": 1, "message": "invalid MethodDecl"}]}})
+            send({"jsonrpc": "2.0", "method": "dafny/compilation/status", "params": {"uri": uri, "status": "ParsingFailed"}})
+            continue
+        failing = [i for i, line in enumerate(text.splitlines()) if "assert false" in line]
+        send({"jsonrpc": "2.0", "method": "dafny/textDocument/symbolStatus", "params": {"uri": uri, "namedVerifiables": [{"status": 2}]}})
+        send({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {"uri": uri, "diagnostics": [
+            {"range": {"start": {"line": i, "character": 2}}, "severity": 1, "message": "assertion might not hold"} for i in failing]}})
+        send({"jsonrpc": "2.0", "method": "dafny/textDocument/symbolStatus", "params": {"uri": uri, "namedVerifiables": [{"status": 4 if failing else 5}]}})
+"""
+
+def test_dafny_server_verifies_documents_and_restarts():
+    """
+    Test the language server client against a fake "dafny server": verified, failing and unparsable documents
+    get the same report shape as cold runs, and a crashed server is restarted for the next document.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        dafny = os.path.join(directory, "dafny")
+        with open(dafny, "w") as f:
+            f.write(FAKE_DAFNY_SERVER)
+        os.chmod(dafny, 0o755)
+        sources = {
+            "good.dfy": "method M() {\n  assert true;\n}\n",
+            "bad.dfy": "method M() {\n  assert false;\n}\n",
+            "broken.dfy": "method {\n",
+            "crash.dfy": "// crash\n",
+        }
+        paths = {}
+        for name, source in sources.items():
+            paths[name] = os.path.join(directory, name)
+            with open(paths[name], "w") as f:
+                f.write(source)
+
+        server = DafnyServer(dafny, timeout=10)
+        try:
+            good = server.verify(paths["good.dfy"])
+            assert good["verification_status"] == "success"
+            assert good["stdout"] == "Dafny program verifier finished with 1 verified, 0 errors"
+
+            bad = server.verify(paths["bad.dfy"])
+            assert bad["stdout"].splitlines()[0] == f"{paths['bad.dfy']}(2,3): Error: assertion might not hold"
+            assert bad["stdout"].endswith("finished with 0 verified, 1 error")
+
+            broken = server.verify(paths["broken.dfy"])
+            assert broken["verification_status"] == "failure"
+            assert broken["stdout"].endswith("1 parse errors detected in broken.dfy")
+
+            first_process = server.process
+            try:
+                server.verify(paths["crash.dfy"])
+                assert False, "expected a DafnyServerError"
+            except Exception as e:
+                assert type(e).__name__ == "DafnyServerError"
+            assert server.verify(paths["good.dfy"])["verification_status"] == "success"
+            assert server.process is not first_process
+        finally:
+            server.stop()
+
+def fake_dafny_verify(path, calls):
+    """
+    Verify a file the way "dafny verify" reports it, failing every "assert false" in a member that is not {:verify false}.
+    """
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+    verified, errors, output, skipped = 0, 0, [], False
+    for number, line in enumerate(lines, start=1):
+        if line.startswith(("method", "lemma", "function", "predicate")):
+            skipped = "{:verify false}" in line
+            verified += not skipped
+            calls.append((re.search(r"(\w+)\(", line).group(1), skipped))
+        if "assert false" in line and not skipped:
+            output.append(f"{path}({number},3): Error: assertion might not hold")
+            errors += 1
+    verified -= errors
+    output += ["", f"Dafny program verifier finished with {verified} verified, {errors} error{'s' if errors != 1 else ''}"]
+    return {"stdout": "\n".join(output).strip(), "stderr": "", "verification_status": "success"}
+
+def test_dafny_incremental_verifies_only_changed_members():
+    """
+    Test that the incremental cache splits a file into its members, skips unchanged members with {:verify false},
+    re-verifies members whose dependencies changed, and merges cached errors at their new line numbers.
+    """
+    source = (
+        "// Helpers\n"
+        "function Double(x: int): int { x * 2 }\n"
+        "lemma DoubleIsEven(x: int)\n  ensures Double(x) % 2 == 0\n{\n}\n"
+        "method Broken() {\n  assert false; // \"}\" and /* { */ do not count\n}\n"
+        "method Other() {\n  assert true;\n}\n"
+    )
+    members = split_dafny_members(source)
+    assert [member.name for member in members] == ["Double", "DoubleIsEven", "Broken", "Other"]
+    assert "".join(source[member.start:member.end] for member in members) == source
+
+    cache = MemberCache()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.dfy")
+        with open(path, "w") as f:
+            f.write(source)
+        calls = []
+        first = verify_incrementally(path, lambda p: fake_dafny_verify(p, calls), cache=cache)
+        assert first["stdout"].splitlines()[0] == f"{path}(8,3): Error: assertion might not hold"
+        assert not any(skipped for _, skipped in calls)
+
+        # Edit Other only: everything else is reused, and Broken's cached error moves down with the inserted line
+        with open(path, "w") as f:
+            f.write("// Revised\n" + source.replace("assert true;", "assert 1 + 1 == 2;"))
+        calls.clear()
+        second = verify_incrementally(path, lambda p: fake_dafny_verify(p, calls), cache=cache)
+        assert dict(calls) == {"Double": True, "DoubleIsEven": True, "Broken": True, "Other": False}
+        assert second["stdout"].splitlines()[0] == f"{path}(9,3): Error: assertion might not hold"
+        assert "1 error (3 unchanged members reused from cache)" in second["stdout"]
+        assert not os.path.exists(os.path.join(directory, "program_incremental.dfy"))
+
+        # Changing Double changes the key of the lemma that uses it, but not of the unrelated methods
+        with open(path, "w") as f:
+            f.write(source.replace("x * 2", "x + x"))
+        calls.clear()
+        verify_incrementally(path, lambda p: fake_dafny_verify(p, calls), cache=cache)
+        assert dict(calls) == {"Double": False, "DoubleIsEven": False, "Broken": True, "Other": True}
+
+FAKE_CLANG_TIDY = """#!/usr/bin/env python3
+import sys, json, os
+checks = next(arg for arg in sys.argv if arg.startswith("--checks="))
+store = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--store-check-profile=")), None)
+sources = [arg for arg in sys.argv[1:sys.argv.index("--")] if not arg.startswith("-")]
+export = next(arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--export-fixes="))
+with open(export, "w") as f:
+    json.dump({"MainSourceFile": sources[0], "Diagnostics": [
+        {"DiagnosticName": "fake-check", "Level": "Error",
+         "DiagnosticMessage": {"Message": checks, "FilePath": source, "FileOffset": 0}} for source in sources]}, f)
+for source in sources:
+    if store is not None:
+        os.makedirs(store, exist_ok=True)
+        with open(os.path.join(store, os.path.basename(source) + ".json"), "w") as f:
+            json.dump({"file": source, "profile": {
+                "time.clang-tidy.bugprone-slow.wall": 0.5, "time.clang-tidy.bugprone-slow.user": 0.4,
+                "time.clang-tidy.bugprone-slow.sys": 0.1, "time.clang-tidy.readability-fast.wall": 0.01}}, f)
+sys.exit(1)
+"""
+
+def test_clang_tidy_check_profiles_and_timings():
+    """
+    Test that clang-tidy runs with the requested check profile and that check profiling aggregates
+    per-check timings across runs, slowest first.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        clang_tidy = os.path.join(directory, "clang-tidy")
+        with open(clang_tidy, "w") as f:
+            f.write(FAKE_CLANG_TIDY)
+        os.chmod(clang_tidy, 0o755)
+        source = os.path.join(directory, "program.c")
+        with open(source, "w") as f:
+            f.write("int main(void) { return 0; }\n")
+
+        original_path = run_clangtidy_check.CLANG_TIDY_PATH
+        run_clangtidy_check.CLANG_TIDY_PATH = clang_tidy
+        run_clangtidy_check.reset_check_profile()
+        try:
+            fast = run_clang_tidy(source, run_clangtidy_check.check_profile_for_mode("mode_1"))
+            assert fast["profile"] == "fast"
+            assert [error["message"] for error in fast["errors"]] == [f"--checks={run_clangtidy_check.CHECK_PROFILES['fast']}"]
+            assert "--enable-check-profile" not in fast["command"]
+            assert run_clangtidy_check.check_profile_summary() == []
+
+            run_clang_tidy(source, "thorough", profiling=True)
+            batch = run_clangtidy_check.run_clang_tidy_batch([source], "thorough", profiling=True)
+            assert batch[source]["profile"] == "thorough"
+            summary = run_clangtidy_check.check_profile_summary()
+            assert [entry["check"] for entry in summary] == ["bugprone-slow", "readability-fast"]
+            assert summary[0]["runs"] == 2 and abs(summary[0]["wall"] - 1.0) < 1e-9
+            assert run_clangtidy_check.check_profile_summary(limit=1) == summary[:1]
+        finally:
+            run_clangtidy_check.CLANG_TIDY_PATH = original_path
+            run_clangtidy_check.reset_check_profile()
+
+CLANG_TIDY_FIXES = """---
+MainSourceFile:  '{path}'
+Diagnostics:
+  - DiagnosticName:  readability-braces-around-statements
+    DiagnosticMessage:
+      Message:         statement should be inside braces
+      FilePath:        '{path}'
+      FileOffset:      46
+      Replacements:
+        - FilePath:        '{path}'
+          Offset:          46
+          Length:          0
+          ReplacementText: ' {{'
+    Level:           Warning
+    BuildDirectory:  '/tmp'
+  - DiagnosticName:  clang-diagnostic-error
+    DiagnosticMessage:
+      Message:         'use of undeclared identifier ''y'''
+      FilePath:        '{path}'
+      FileOffset:      65
+      Replacements:    []
+    Level:           Error
+    BuildDirectory:  '/tmp'
+  - DiagnosticName:  clang-diagnostic-error
+    DiagnosticMessage:
+      Message:         'no input files'
+      FilePath:        ''
+      FileOffset:      0
+      Replacements:    []
+    Level:           Error
+...
+"""
+
+def test_parse_clang_tidy_fixes_and_score():
+    """
+    Test that exported clang-tidy fixes become located diagnostic records and that their counts drive the score.
+    """
+    source = "int main(int argc, char **argv) {\n  if (argc) return 1;\n  return y;\n}\n"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.c")
+        with open(path, "w") as f:
+            f.write(source)
+        fixes = os.path.join(directory, "fixes.yaml")
+        with open(fixes, "w") as f:
+            f.write(CLANG_TIDY_FIXES.format(path=path))
+        diagnostics = run_clangtidy_check.parse_clang_tidy_fixes(fixes)
+        assert not run_clangtidy_check.parse_clang_tidy_fixes(os.path.join(directory, "missing.yaml"))
+
+    assert diagnostics[0] == {
+        "severity": "warning", "check": "readability-braces-around-statements", "file": path,
+        "line": 2, "column": 13, "message": "statement should be inside braces"
+    }
+    assert diagnostics[1]["message"] == "use of undeclared identifier 'y'"
+    assert (diagnostics[1]["line"], diagnostics[1]["column"]) == (3, 10)
+    assert diagnostics[2]["file"] == "" and diagnostics[2]["line"] == 0
+
+    warning_only = {"clang_tidy": {"counts": {"error": 0, "warning": 1}, "errors": [], "warnings": diagnostics[:1]}}
+    assert calculate_scores(warning_only, "mode_1")["stsatic_analysis"] == 9
+    with_error = {"clang_tidy": {"counts": {"error": 1, "warning": 1}, "errors": diagnostics[1:2], "warnings": diagnostics[:1]}}
+    assert calculate_scores(with_error, "mode_1")["stsatic_analysis"] == 0
+
+def test_precompiled_headers_match_includes_and_compile():
+    """
+    Test that a source gets the largest precompiled header set it includes entirely, that sources whose includes
+    are not covered (or follow another directive) fall back to plain compilation, and that the binary still runs.
+    """
+    original_dir, original_sets = pch_cache.PCH_CACHE_DIR, pch_cache.PCH_HEADER_SETS
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as workspace:
+        pch_cache.PCH_CACHE_DIR = cache_dir
+        pch_cache.PCH_HEADER_SETS = {"c": [["stdio.h"], ["stdio.h", "stdlib.h"]]}
+        try:
+            sources = {
+                "both.c": "#include <stdlib.h>\n#include <stdio.h>\nint main(void) { printf(\"%d\\n\", abs(-1)); return 0; }\n",
+                "define.c": "#include <stdio.h>\n#define N 3\n#include <stdlib.h>\nint main(void) { return 0; }\n",
+                "none.c": "#include <string.h>\nint main(void) { return (int)strlen(\"\"); }\n",
+            }
+            paths = {}
+            for name, source in sources.items():
+                paths[name] = os.path.join(workspace, name)
+                with open(paths[name], "w") as f:
+                    f.write(source)
+
+            assert pch_cache.leading_standard_includes(paths["define.c"]) == {"stdio.h"}
+            assert pch_cache.precompiled_header_flags("gcc", "gcc", [paths["none.c"]], wait=True) == []
+            narrow = pch_cache.precompiled_header_flags("gcc", "gcc", [paths["define.c"]], wait=True)
+            wide = pch_cache.precompiled_header_flags("gcc", "gcc", [paths["both.c"]], wait=True)
+            assert narrow[0] == wide[0] == "-include" and narrow[1] != wide[1]
+            assert os.path.isfile(wide[1] + ".gch")
+            with open(wide[1]) as f:
+                assert f.read() == "#include <stdio.h>\n#include <stdlib.h>\n"
+            assert pch_cache.precompiled_header_flags("gcc", "gcc", [paths["both.c"], paths["define.c"]]) == narrow
+
+            binary = compile_program(paths["both.c"], use_cache=False)
+            assert subprocess.run([binary], capture_output=True, text=True).stdout == "1\n"
+        finally:
+            pch_cache.PCH_CACHE_DIR, pch_cache.PCH_HEADER_SETS = original_dir, original_sets
+
+def valgrind_error_xml(unique, kind, what, function, leaked_bytes=None):
+    """
+    Render one Valgrind <error> element.
+    """
+    if leaked_bytes is None:
+        description = f"<what>{what}</what>"
+    else:
+        description = f"<xwhat><text>{what}</text><leakedbytes>{leaked_bytes}</leakedbytes><leakedblocks>1</leakedblocks></xwhat>"
+    frames = "".join(
+        f"<frame><ip>0x{i:x}</ip><obj>/tmp/a.out</obj><fn>{name}</fn><file>main.c</file><line>{i + 1}</line></frame>"
+        for i, name in enumerate([function, "helper", "main", "__libc_start_main", "_start", "extra"])
+    )
+    return f"<error><unique>0x{unique:x}</unique><tid>1</tid><kind>{kind}</kind>{description}<stack>{frames}</stack></error>"
+
+FAKE_VALGRIND = """#!/usr/bin/env python3
+import os, sys
+fd = int(next(arg for arg in sys.argv if arg.startswith("--xml-fd=")).split("=")[1])
+with open(sys.argv[-1]) as f:
+    xml = f.read()
+os.write(fd, xml.encode())
+"""
+
+def test_valgrind_xml_records_are_deduplicated_and_capped():
+    """
+    Test that Valgrind XML fed in small chunks becomes deduplicated records with their top frames,
+    that repeat counts and leaked bytes are summed, and that distinct errors past the cap are only counted.
+    """
+    errors = [
+        valgrind_error_xml(1, "InvalidRead", "Invalid read of size 4", "read_past_end"),
+        valgrind_error_xml(2, "UninitCondition", "Conditional jump depends on uninitialised value(s)", "branch"),
+        valgrind_error_xml(3, "Leak_DefinitelyLost", "40 bytes in 1 blocks are definitely lost", "malloc", 40),
+        valgrind_error_xml(4, "Leak_DefinitelyLost", "40 bytes in 1 blocks are definitely lost", "malloc", 40),
+        valgrind_error_xml(5, "InvalidFree", "Invalid free() / delete / delete[] / realloc()", "free"),
+    ]
+    xml = (
+        "<?xml version=\"1.0\"?>\n<valgrindoutput><protocolversion>4</protocolversion><tool>memcheck</tool>"
+        + "".join(errors)
+        + "<errorcounts><pair><count>7</count><unique>0x1</unique></pair></errorcounts></valgrindoutput>\n"
+    ).encode()
+
+    parser = ValgrindXmlParser(max_errors=3, max_frames=2)
+    for start in range(0, len(xml), 50):
+        parser.feed(xml[start:start + 50])
+    output = parser.close()
+    read = output["memory_issues"]["invalid_read_errors"][0]
+    assert read == {
+        "kind": "InvalidRead", "message": "Invalid read of size 4", "bytes": 4, "blocks": 0,
+        "frames": ["read_past_end (main.c:1)", "helper (main.c:2)"], "count": 7
+    }
+    leak = output["memory_issues"]["definitely_lost"][0]
+    assert (leak["bytes"], leak["blocks"], leak["count"]) == (80, 2, 2)
+    assert output["error_count"]["uninitialized_value_errors"] == 1
+    assert output["error_count"]["other_errors"] == 0 and output["dropped_errors"] == 1
+    assert not output["truncated"]
+    assert len(parser._root) == 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        valgrind = os.path.join(directory, "valgrind")
+        with open(valgrind, "w") as f:
+            f.write(FAKE_VALGRIND)
+        os.chmod(valgrind, 0o755)
+        report = os.path.join(directory, "report.xml")
+        with open(report, "wb") as f:
+            f.write(xml)
+        original_path = os.environ["PATH"]
+        os.environ["PATH"] = directory + os.pathsep + original_path
+        try:
+            output = run_valgrind_xml([report])
+            assert output["return_code"] == 0 and output["error_count"]["other_errors"] == 1
+            assert output["memory_issues"]["invalid_read_errors"][0]["count"] == 7
+
+            truncated = run_valgrind_xml([report], max_xml_bytes=len(xml) // 2)
+            assert truncated["truncated"] and truncated["error_count"]["invalid_read_errors"] == 1
+        finally:
+            os.environ["PATH"] = original_path
+
+SLOW_VALGRIND = """#!/usr/bin/env python3
+import os, subprocess, sys, time
+fd = int(next(arg for arg in sys.argv if arg.startswith("--xml-fd=")).split("=")[1])
+directory = os.path.dirname(os.path.abspath(sys.argv[0]))
+with open(os.path.join(directory, "stdin.txt"), "w") as f:
+    f.write(sys.stdin.read())
+os.write(fd, b"<?xml version=\\"1.0\\"?><valgrindoutput><error><unique>0x1</unique><kind>InvalidRead</kind>"
+             b"<what>Invalid read of size 4</what></error>")
+child = subprocess.Popen(["sleep", "60"])
+with open(os.path.join(directory, "child.pid"), "w") as f:
+    f.write(str(child.pid))
+time.sleep(60)
+"""
+
+def process_alive(pid):
+    """
+    Tell whether a process exists and is not a zombie.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+def test_deadlines_kill_process_group_and_keep_partial_findings():
+    """
+    Test that a program past its wall-clock deadline is killed with everything it started, that its input
+    is fed and closed, that the findings parsed before the deadline come back with a timeout status, and
+    that a timeout scores 0 for dynamic analysis.
+    """
+    original_limits = {tool: dict(limits) for tool, limits in deadline.TOOL_DEADLINES.items()}
+    original_path = os.environ["PATH"]
+    with tempfile.TemporaryDirectory() as directory:
+        valgrind = os.path.join(directory, "valgrind")
+        with open(valgrind, "w") as f:
+            f.write(SLOW_VALGRIND)
+        os.chmod(valgrind, 0o755)
+        program = os.path.join(directory, "program.py")
+        with open(program, "w") as f:
+            f.write("print(input())\n")
+        os.environ["PATH"] = directory + os.pathsep + original_path
+        deadline.TOOL_DEADLINES["valgrind"]["wall"] = 2
+        deadline.TOOL_DEADLINES["compile"].update(wall=0.5, cpu=1)
+        try:
+            start = time.monotonic()
+            output = run_valgrind_check(program, stdin_data="3 4\n")
+            assert time.monotonic() - start < 10
+            assert output["status"] == "timeout" and output["timed_out"] and output["truncated"]
+            assert output["memory_issues"]["invalid_read_errors"][0]["message"] == "Invalid read of size 4"
+            with open(os.path.join(directory, "stdin.txt")) as f:
+                assert f.read() == "3 4\n"
+            with open(os.path.join(directory, "child.pid")) as f:
+                child = int(f.read())
+            for _ in range(50):
+                if not process_alive(child):
+                    break
+                time.sleep(0.1)
+            assert not process_alive(child)
+
+            # A run stopped at its deadline scores like a failed run in every dynamic analysis
+            for tool in ("valgrind", "python runtime", "sanitizers"):
+                data = {
+                    "generated_code": "print(input())\n",
+                    "python static analysis": [{"counts": {"error": 0}}, {"score": 10}, {"messages": []}],
+                    tool: {"status": "timeout"},
+                }
+                assert calculate_scores(data, "mode_2")["dynamic_analysis_score"] == 0
+
+            assert run_with_deadline(["cat"], "compile", stdin_data="echo").stdout == "echo"
+            for command in (["sleep", "30"], [sys.executable, "-c", "while True: pass"]):
+                try:
+                    run_with_deadline(command, "compile")
+                    assert False, "the deadline did not stop the command"
+                except subprocess.TimeoutExpired:
+                    pass
+        finally:
+            os.environ["PATH"] = original_path
+            for tool, limits in original_limits.items():
+                deadline.TOOL_DEADLINES[tool] = limits
+
+PYTHON_RUNTIME_PROGRAMS = {
+    "echo.py": "numbers = [int(word) for word in input().split()]\nprint(sum(numbers))\n",
+    "raises.py": "def second(items):\n    return items[1]\n\nsecond([1])\n",
+    "exits.py": "import sys\nsys.exit(3)\n",
+    "crashes.py": "import ctypes\nctypes.string_at(0)\n",
+    "retains.py": "import sys\nsys.retained = [bytearray(4096) for _ in range(1000)]\n",
+    "spins.py": "while True:\n    pass\n",
+    "reads_more.py": "first = input()\nsecond = input()\nprint(first, second)\n",
+}
+
+def test_python_runtime_check_reports_crashes_and_memory():
+    """
+    Test that Python programs run natively report uncaught exceptions, exit codes, fatal signals, retained
+    memory and timeouts in the memory_issues/error_count shape, and that the scores follow them.
+    """
+    original_limits = dict(deadline.TOOL_DEADLINES["python"])
+    deadline.TOOL_DEADLINES["python"].update(wall=2, cpu=1)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = {}
+            for name, program in PYTHON_RUNTIME_PROGRAMS.items():
+                path = os.path.join(directory, name)
+                with open(path, "w") as f:
+                    f.write(program)
+                outputs[name] = run_python_runtime_check(path, stdin_data="1 2 3\n")
+    finally:
+        deadline.TOOL_DEADLINES["python"] = original_limits
+
+    echo = outputs["echo.py"]
+    assert echo["status"] == "success" and echo["exit_code"] == 0 and echo["crash"] is None
+    assert echo["peak_memory"] > 0 and not any(echo["error_count"].values())
+
+    raises = outputs["raises.py"]
+    assert raises["status"] == "failure" and raises["error_count"]["uncaught_exceptions"] == 1
+    assert raises["crash"]["type"] == "IndexError"
+    assert [frame.split(" ")[0] for frame in raises["crash"]["traceback"]] == ["second", "<module>"]
+
+    assert outputs["exits.py"]["status"] == "failure" and outputs["exits.py"]["exit_code"] == 3
+    crashes = outputs["crashes.py"]
+    assert crashes["crash"]["type"] == "SIGSEGV" and crashes["error_count"]["fatal_errors"] == 1
+    assert crashes["crash"]["message"].startswith("Fatal Python error")
+
+    retains = outputs["retains.py"]
+    assert retains["status"] == "success" and retains["allocation_growth"] >= 4096 * 1000
+    assert retains["memory_issues"]["retained_memory"][0]["location"].endswith("retains.py:2")
+    assert outputs["spins.py"]["status"] == "timeout"
+
+    def dynamic_score(output):
+        data = {
+            "generated_code": PYTHON_RUNTIME_PROGRAMS["raises.py"],
+            "python static analysis": [{"counts": {"error": 0}}, {"score": 10}, {"messages": []}],
+            "python runtime": output,
+        }
+        return calculate_scores(data, "mode_2")["dynamic_analysis_score"]
+
+    assert (dynamic_score(echo), dynamic_score(raises), dynamic_score(retains)) == (10, 0, 5)
+    assert dynamic_score(outputs["spins.py"]) == 0
+
+    # Reading past the end of the given input is not a crash, as under Valgrind
+    reads_more = outputs["reads_more.py"]
+    assert reads_more["status"] == "success" and reads_more["needs_input"] and reads_more["crash"] is None
+    assert not any(reads_more["error_count"].values()) and not echo["needs_input"]
+    assert dynamic_score(reads_more) == 10
+
+SANITIZER_PROGRAMS = {
+    "overflow.cpp": "int main() {\n    int *values = new int[2];\n    values[2] = 1;\n    return 0;\n}\n",
+    "leaks.c": (
+        "#include <limits.h>\n#include <stdlib.h>\n"
+        "struct node { struct node *next; };\n"
+        "int main(int argc, char **argv) {\n"
+        "    int big = INT_MAX;\n"
+        "    big += argc;\n"
+        "    struct node *head = malloc(sizeof *head);\n"
+        "    head->next = malloc(sizeof *head);\n"
+        "    head = 0;\n"
+        "    return 0;\n"
+        "}\n"
+    ),
+    "clean.c": (
+        "#include <stdio.h>\n"
+        "int main(void) {\n"
+        "    int a, b;\n"
+        "    if (scanf(\"%d %d\", &a, &b) != 2) return 1;\n"
+        "    printf(\"%d\\n\", a + b);\n"
+        "    return 0;\n"
+        "}\n"
+    ),
+}
+
+def test_sanitizer_check_reports_memory_issues():
+    """
+    Test that C and C++ programs compiled with the sanitizers report out-of-bounds writes, direct and indirect
+    leaks and undefined behavior as memory issue records, and that a clean program reads its input.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        outputs = {}
+        for name, program in SANITIZER_PROGRAMS.items():
+            path = os.path.join(directory, name)
+            with open(path, "w") as f:
+                f.write(program)
+            outputs[name] = run_sanitizer_check(path, stdin_data="3 4\n")
+
+    overflow = outputs["overflow.cpp"]
+    assert overflow["status"] == "success" and overflow["return_code"] == sanitizers.SANITIZER_EXIT_CODE
+    write = overflow["memory_issues"]["invalid_write_errors"][0]
+    assert (write["kind"], write["bytes"], write["frames"][0]) == ("heap-buffer-overflow", 4, "main (overflow.cpp:3)")
+
+    leaks = outputs["leaks.c"]["memory_issues"]
+    assert (leaks["definitely_lost"][0]["bytes"], leaks["definitely_lost"][0]["frames"][0]) == (8, "main (leaks.c:7)")
+    assert leaks["indirectly_lost"][0]["frames"][0] == "main (leaks.c:8)"
+    assert leaks["other_errors"][0]["kind"] == "undefined-behavior"
+    assert leaks["other_errors"][0]["message"].startswith("signed integer overflow")
+
+    clean = outputs["clean.c"]
+    assert clean["status"] == "success" and clean["return_code"] == 0 and not any(clean["error_count"].values())
+
+    records = MemoryIssueRecords(max_errors=1)
+    parse_sanitizer_reports([
+        "==7==ERROR: AddressSanitizer: attempting double-free on 0x602000000010 in thread T0:",
+        "    #0 0x7f01 in __interceptor_free ../../../../src/libsanitizer/asan/asan_malloc_linux.cpp:52",
+        "    #1 0x5601 in main /tmp/uaf.c:4",
+        "    #2 0x7f02  (/lib/x86_64-linux-gnu/libc.so.6+0x27249)",
+        "",
+        "main.c:9:3: runtime error: load of null pointer of type 'int'",
+    ], records)
+    output = records.results()
+    double_free = output["memory_issues"]["other_errors"][0]
+    assert double_free["kind"] == "double-free" and double_free["frames"] == ["main (uaf.c:4)", "libc.so.6+0x27249"]
+    assert output["dropped_errors"] == 1
+
+def test_rankme_engine_matches_sklearn_reference():
+    """
+    Test that the RankMe engine matches the former scikit-learn implementation within RANKME_SCORE_TOLERANCE,
+    that power iteration finds the exact leading singular value of larger matrices, and that a single
+    feature or no feature at all are handled.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.decomposition import TruncatedSVD
+
+    code = "\n".join(
+        f"int value_{i} = compute(items, {i}); if (value_{i} > Limit) {{ limit = value_{i} * 2; }}" for i in range(40)
+    )
+    texts = preprocess_text(code)
+    counts = CountVectorizer(stop_words=None).fit_transform(texts)
+    complexity = TruncatedSVD(n_components=1, random_state=0).fit(counts).singular_values_[0]
+    token_counts = [Counter(filter_tokens(text.split())) for text in texts]
+    entropies = [compute_entropy(counts) for counts in token_counts if counts]
+    expected = np.exp(np.mean(entropies)) * complexity
+    assert abs(compute_rankme_score(texts) - expected) <= RANKME_SCORE_TOLERANCE * expected
+    assert abs(compute_text_entropy(texts) - np.mean(entropies)) < 1e-12
+
+    random = np.random.default_rng(0)
+    matrix = scipy.sparse.random(600, 400, density=0.02, random_state=random, data_rvs=lambda n: random.integers(1, 4, n))
+    exact = np.linalg.svd(matrix.toarray(), compute_uv=False)[0]
+    assert abs(top_singular_value(matrix) - exact) <= 1e-9 * exact
+
+    assert abs(compute_rankme_score(["return x", "return"]) - np.sqrt(2)) < 1e-12
+    try:
+        compute_rankme_score(["x = 1", "y"])
+        assert False, "a text without tokens has no RankMe score"
+    except ValueError:
+        pass
+
+def test_rankme_scores_batch_matches_single_scores():
+    """
+    Test that batched RankMe scores equal the scores of the candidates one at a time, however the batch is
+    split into blocks, and that candidates without segments or without tokens are scored as 0 and None.
+    """
+    candidates = [
+        preprocess_text("\n".join(f"int value_{i} = compute(items, {i} + {j});" for i in range(j + 2)))
+        for j in range(12)
+    ]
+    candidates[3] = preprocess_text("\n".join(f"row_{i}, col_{i} = grid[{i}]" for i in range(400)))
+    candidates[5] = []
+    candidates[7] = ["x = 1", "y"]
+    expected = [None if i == 7 else compute_rankme_score(texts) for i, texts in enumerate(candidates)]
+
+    for block_segments in (1, 10, 10_000):
+        scores = rankme_scores(candidates, block_segments)
+        assert len(scores) == len(candidates)
+        assert scores[5] == 0 and scores[7] is None
+        for score, single in zip(scores, expected):
+            if single:
+                assert abs(score - single) <= 1e-12 * single
+    assert compute_rankme_scores(iter(candidates[:3])) == rankme_scores(candidates[:3])
+
+def test_streaming_rankme_is_close_in_constant_memory():
+    """
+    Test that streamed segments equal preprocess_text's however the text is chunked, that the hashed Gram
+    sketch is exact without hash collisions, that the streaming score is close to the exact one, and that its
+    peak memory does not grow with the input.
+    """
+    code = "\n".join(
+        f"int value_{i % 300} = compute(items, {i}); if (value_{i % 300} > limit_{i % 7}) {{ limit = value_{i % 300} * 2; }}"
+        for i in range(3000)
+    )
+    assert list(iter_segments(code)) == preprocess_text(code)
+    assert list(iter_segments(io.StringIO(code), chunk_size=7)) == preprocess_text(code)
+    assert list(iter_segments(["int a = 1; int", " b = 2;\n", "", "return a"])) == ["int a = 1", "int b = 2", "return a"]
+
+    small = "\n".join(f"total = add(total, item_{i % 5}); count = count + step_{i % 3}" for i in range(1000))
+    statistics = StreamingRankMe(block_segments=64)
+    statistics.add_segments(iter_segments(small))
+    assert abs(statistics.score() - compute_rankme_score(preprocess_text(small))) <= 1e-9 * statistics.score()
+
+    expected = compute_rankme_score(preprocess_text(code))
+    assert abs(streaming_rankme_score(code) - expected) <= 0.02 * expected
+    assert streaming_rankme_score("") == 0
+    try:
+        streaming_rankme_score("x = 1;\ny")
+        assert False, "a text without tokens has no RankMe score"
+    except ValueError:
+        pass
+
+    peaks = []
+    for repeats in (2, 12):
+        tracemalloc.start()
+        streaming_rankme_score(code + "\n" for _ in range(repeats))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < 1.2 * peaks[0]
+
 if __name__ == "__main__":
     test_run_valgrind_check()
     test_run_dafny_code()
     test_rankme()
     test_run_clang_tidy()
     test_run_pystatic_analysis()
-    test_run_sonar_scanner()
\ No newline at end of file
+    test_run_sonar_scanner()
+    test_run_pystatic_analysis_batch()
+    test_compile_program_writes_binary_next_to_source()
+    test_compile_cache_reuses_and_evicts_binaries()
+    test_py_worker_pool_matches_subprocess_and_recycles()
+    test_mypy_daemon_matches_cold_run_and_restarts()
+    test_parse_py_tool_outputs()
+    test_sonar_client_waits_for_task_and_retries()
+    test_sonarqube_scans_run_concurrently_in_their_own_directories()
+    test_dafny_server_verifies_documents_and_restarts()
+    test_dafny_incremental_verifies_only_changed_members()
+    test_clang_tidy_check_profiles_and_timings()
+    test_parse_clang_tidy_fixes_and_score()
+    test_precompiled_headers_match_includes_and_compile()
+    test_valgrind_xml_records_are_deduplicated_and_capped()
+    test_deadlines_kill_process_group_and_keep_partial_findings()
+    test_python_runtime_check_reports_crashes_and_memory()
+    test_sanitizer_check_reports_memory_issues()
+    test_rankme_engine_matches_sklearn_reference()
+    test_rankme_scores_batch_matches_single_scores()
+    test_streaming_rankme_is_close_in_constant_memory()
@@ -0,0 +1,105 @@
+#############################################################################################################################
+# Program: tests/sonar_stub.py                                                                                              #
+# Author: Yuming Xie                                                                                                        #
+# Date: 11/20/2024                                                                                                          #
+# Version: 1.0.1                                                                                                            #
+# License: [MIT License]                                                                                                    #
+# Description: This program contains a local stub of the SonarQube web API used by the client, so the report path can be    #
+# tested and benchmarked offline. The stub answers compute engine task, component and measure requests, and can simulate    #
+# slow compute engine tasks, transient server errors and response latency.                                                  #
+#############################################################################################################################
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_MEASURES = [
+    {"metric": "bugs", "value": "0"},
+    {"metric": "vulnerabilities", "value": "0"},
+    {"metric": "complexity", "value": "3"},
+    {"metric": "duplicated_lines_density", "value": "0.0"},
+]
+
+class SonarStubServer:
+    """
+    A SonarQube stub serving on a free local port in a background thread.
+
+    params:
+        pending_polls (int): The number of task polls answered with IN_PROGRESS before the task succeeds.
+        task_status (str): The final status of every task.
+        failures (int): The number of requests answered with 503 before the stub starts answering normally.
+        latency (float): Seconds each response is delayed.
+        measures (list): The measures of every project.
+    """
+    def __init__(self, pending_polls=0, task_status="SUCCESS", failures=0, latency=0.0, measures=None):
+        self.pending_polls = pending_polls
+        self.task_status = task_status
+        self.failures = failures
+        self.latency = latency
+        self.measures = DEFAULT_MEASURES if measures is None else measures
+        self.requests = []                  # (path, query) of every request
+        self.connections = set()            # Client (host, port) pairs, one per TCP connection
+        self._polls = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, path, query):
+        with self._lock:
+            self.requests.append((path, query))
+            if self.failures > 0:
+                self.failures -= 1
+                return 503, {"errors": [{"msg": "Service unavailable"}]}
+
+            if path == "/api/ce/task":
+                task_id = query["id"]
+                self._polls[task_id] = self._polls.get(task_id, 0) + 1
+                status = "IN_PROGRESS" if self._polls[task_id] <= self.pending_polls else self.task_status
+                return 200, {"task": {"id": task_id, "status": status}}
+            if path == "/api/components/search":
+                return 200, {"components": [{"key": query["componentKeys"], "qualifier": "TRK"}]}
+            if path == "/api/measures/component":
+                return 200, {"component": {"key": query["component"], "measures": self.measures}}
+            return 404, {"errors": [{"msg": f"Unknown path {path}"}]}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"           # Keep connections alive, as SonarQube does
+            disable_nagle_algorithm = True          # Headers and body are written separately
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                with stub._lock:
+                    stub.connections.add(self.client_address)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, body = stub._respond(parsed.path, query)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler